@@ -0,0 +1,96 @@
+"""
+Times finding the colour-scale limits of windows of a measurement from its block histograms,
+against the exact quantiles of the positive values in each window they replaced,
+and reports the largest error of the estimates in histogram bin widths.
+
+Run from the top of the repository:
+
+    python benchmarks/dynamic_range.py [-samples N] [-channels N]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy
+from numpy import ndarray
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from spacelabel.models.dataset.rebin import (  # noqa: E402
+    STATISTICS_BLOCK_SIZE, block_histograms, histogram_edges, histogram_quantiles
+)
+
+FRAC_DYN_RANGE: Tuple[float, float] = (0.05, 0.95)
+REPEATS: int = 5  # Windows timed at each size
+
+
+def exact(values: ndarray) -> ndarray:
+    """
+    The original limits, as drawing each page worked them out.
+    """
+    positive: ndarray = values[values > 0.]
+    return numpy.array([numpy.quantile(positive, FRAC_DYN_RANGE[0]), numpy.quantile(positive, FRAC_DYN_RANGE[1])])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-samples', type=int, dest='samples', default=200000)
+    parser.add_argument('-channels', type=int, dest='channels', default=200)
+    arguments = parser.parse_args()
+
+    rng = numpy.random.default_rng(0)
+    values: ndarray = 10 ** rng.normal(-18., 1.5, size=(arguments.samples, arguments.channels))
+    values[rng.random(values.shape) < 0.05] = 0.
+
+    time_start: float = time.perf_counter()
+    edges: ndarray = histogram_edges(values[values > 0.].min(), values.max())
+    counts: ndarray = block_histograms(values, edges)
+    width: float = edges[1] - edges[0]
+    print(
+        f"{arguments.samples} samples x {arguments.channels} channels: "
+        f"histograms made once, at preprocessing, in {time.perf_counter() - time_start:.2f} s"
+    )
+    print(f"{'window':>10} {'exact':>10} {'histogram':>10} {'speed-up':>9} {'error (bins)':>13}")
+
+    for window_size in (4096, 32768, 131072):
+        if window_size > arguments.samples:
+            break
+        starts: List[int] = rng.integers(0, arguments.samples - window_size, REPEATS).tolist()
+
+        time_start = time.perf_counter()
+        limits_exact: List[ndarray] = [exact(values[start:start + window_size]) for start in starts]
+        time_exact: float = (time.perf_counter() - time_start) / REPEATS
+
+        time_start = time.perf_counter()
+        limits_estimate: List[ndarray] = [
+            histogram_quantiles(
+                counts[start // STATISTICS_BLOCK_SIZE:-(-(start + window_size) // STATISTICS_BLOCK_SIZE)].sum(axis=0),
+                edges, list(FRAC_DYN_RANGE)
+            )
+            for start in starts
+        ]
+        time_estimate: float = (time.perf_counter() - time_start) / REPEATS
+
+        # The blocks summed may run up to a block either side of the window, so compare over those samples too
+        error: float = max(
+            numpy.abs(
+                numpy.log10(estimate) - numpy.log10(exact(values[
+                    start // STATISTICS_BLOCK_SIZE * STATISTICS_BLOCK_SIZE:
+                    -(-(start + window_size) // STATISTICS_BLOCK_SIZE) * STATISTICS_BLOCK_SIZE
+                ]))
+            ).max() / width
+            for start, estimate in zip(starts, limits_estimate)
+        )
+        drift: float = max(
+            numpy.abs(numpy.log10(estimate) - numpy.log10(limits)).max() / width
+            for estimate, limits in zip(limits_estimate, limits_exact)
+        )
+        print(
+            f"{window_size:>10} {time_exact * 1000:>8.2f}ms {time_estimate * 1000:>8.3f}ms "
+            f"{time_exact / time_estimate:>8.0f}x {error:>6.2f} ({drift:.2f} vs window)"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Times adding features one at a time to the feature index and finding those in one-day windows,
+with and without a feature spanning the whole mission, against the index bounded by the longest feature
+that it replaced, and checks they find the same features.
+
+Run from the top of the repository:
+
+    python benchmarks/feature_index.py [-features N] [-windows N]
+"""
+import argparse
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Any, List, Tuple
+
+import numpy
+from numpy import ndarray
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from spacelabel.models.index import FeatureIndex  # noqa: E402
+
+DAY: float = 86400.
+
+
+class BoundedIndex:
+    """
+    The previous index: boxes in lists sorted by start, searched from the longest box's length before the window.
+    """
+    def __init__(self):
+        self._starts: List[float] = []
+        self._entries: List[Tuple[float, float, float, Any]] = []
+        self._duration_max: float = 0.
+
+    def add(self, item: Any, time_start: float, time_end: float, freq_min: float, freq_max: float):
+        position: int = bisect_right(self._starts, time_start)
+        self._starts.insert(position, time_start)
+        self._entries.insert(position, (time_end, freq_min, freq_max, item))
+        self._duration_max = max(self._duration_max, time_end - time_start)
+
+    def query(self, time_start: float, time_end: float) -> List[Any]:
+        first: int = bisect_left(self._starts, time_start - self._duration_max)
+        last: int = bisect_right(self._starts, time_end)
+        return [item for end, _, _, item in self._entries[first:last] if end >= time_start]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-features', type=int, dest='features', default=100000)
+    parser.add_argument('-windows', type=int, dest='windows', default=200)
+    arguments = parser.parse_args()
+
+    # Features of up to an hour over ten years, added in a random order
+    rng = numpy.random.default_rng(0)
+    years: float = 10. * 365. * DAY
+    starts: ndarray = rng.uniform(0., years, arguments.features)
+    boxes: ndarray = numpy.column_stack((
+        starts, starts + rng.uniform(0., 3600., len(starts)), numpy.ones(len(starts)), numpy.full(len(starts), 10.)
+    ))
+    windows: ndarray = rng.uniform(0., years - DAY, arguments.windows)
+
+    print(f"{arguments.features} features, {arguments.windows} one-day windows")
+    print(f"{'':>22} {'add all':>9} {'per query':>10}")
+    for spanning in (False, True):
+        indexes: List = [BoundedIndex(), FeatureIndex()]
+        results: List[List[List[Any]]] = []
+        for index in indexes:
+            time_start: float = time.perf_counter()
+            if spanning:
+                index.add(-1, -DAY, years + DAY, 1., 10.)
+            for item, box in enumerate(boxes.tolist()):
+                index.add(item, *box)
+            time_add: float = time.perf_counter() - time_start
+
+            time_start = time.perf_counter()
+            results.append([index.query(window, window + DAY) for window in windows.tolist()])
+            time_query: float = (time.perf_counter() - time_start) / arguments.windows
+
+            label: str = f"{type(index).__name__}{', spanning' if spanning else ''}"
+            print(f"{label:>22} {time_add:>8.2f}s {time_query * 1000:>8.3f}ms")
+
+        for previous, current in zip(*results):
+            assert sorted(previous) == sorted(current)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Times filling the gaps in 1D series of increasing length with NaNs, against the per-sample loop it replaced,
+and checks both give the same series. The loop grows its output one interval at a time, so it takes time
+quadratic in the length of the series; the vectorised version is linear.
+
+Run from the top of the repository:
+
+    python benchmarks/fill_gaps.py [-days 1 7 30] [-skip_loop_above DAYS]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Tuple
+
+import numpy
+import pandas as pd
+from numpy import ndarray
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from spacelabel.models.dataset.cdf import _fill_gaps  # noqa: E402
+
+STEP = numpy.timedelta64(60, 's')
+
+
+def loop(time: ndarray, data: ndarray, time_step: numpy.timedelta64) -> Tuple[ndarray, ndarray]:
+    """
+    The original padding, with each gap's range running up to the sample after it.
+    """
+    new_time: ndarray = numpy.array([], dtype='datetime64[ns]')
+    new_data: ndarray = numpy.array([], dtype='float64')
+    for t in range(0, len(time) - 1):
+        if time[t + 1] - time[t] > time_step:
+            periods: int = int(numpy.ceil((time[t + 1] - time[t]) / time_step))
+            new_time = numpy.concatenate((
+                new_time, numpy.array(pd.date_range(time[t], time[t + 1], periods)[:-1])
+            ))
+            new_data = numpy.concatenate((new_data, numpy.array([data[t]] + [numpy.nan] * (periods - 2))))
+        else:
+            new_time = numpy.concatenate((new_time, numpy.array([time[t]])))
+            new_data = numpy.concatenate((new_data, numpy.array([data[t]])))
+    return numpy.concatenate((new_time, time[-1:])), numpy.concatenate((new_data, data[-1:]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-days', type=int, nargs='+', dest='days', default=[1, 7, 30, 365])
+    parser.add_argument('-skip_loop_above', type=int, dest='skip_loop_above', default=30)
+    arguments = parser.parse_args()
+
+    rng = numpy.random.default_rng(0)
+    print(f"{'days':>5} {'samples':>8} {'vectorised':>11} {'loop':>9} {'speed-up':>9}")
+    for days in arguments.days:
+        # A sample a minute, with 2% dropped at random and a 90 minute gap every 50 hours
+        samples: int = days * 1440
+        keep: ndarray = rng.random(samples) > 0.02
+        for start in range(0, samples, 3000):
+            keep[start:start + 90] = False
+        keep[0] = keep[-1] = True
+        series_time: ndarray = (numpy.datetime64('2017-01-01', 'ns') + numpy.arange(samples) * STEP)[keep]
+        series_data: ndarray = rng.random(len(series_time))
+
+        time_start: float = time.perf_counter()
+        filled: Tuple[ndarray, ndarray] = _fill_gaps(series_time, series_data, STEP)
+        time_vectorised: float = time.perf_counter() - time_start
+
+        if days > arguments.skip_loop_above:
+            print(f"{days:>5} {len(series_time):>8} {time_vectorised * 1000:>9.2f}ms {'-':>9} {'-':>9}")
+            continue
+
+        time_start = time.perf_counter()
+        expected: Tuple[ndarray, ndarray] = loop(series_time, series_data, STEP)
+        time_loop: float = time.perf_counter() - time_start
+        numpy.testing.assert_array_equal(filled[0], expected[0].astype('datetime64[ns]'))
+        numpy.testing.assert_array_equal(filled[1], expected[1])
+        print(
+            f"{days:>5} {len(series_time):>8} {time_vectorised * 1000:>9.2f}ms {time_loop:>8.2f}s "
+            f"{time_loop / time_vectorised:>8.0f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
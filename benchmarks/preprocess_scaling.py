@@ -0,0 +1,102 @@
+"""
+Times preprocessing a synthetic Cassini-format HDF5 file in memory, in chunks, and over increasing numbers of
+worker processes, and checks each gives the same measurements as in memory.
+
+Run from the top of the repository:
+
+    python benchmarks/preprocess_scaling.py [-samples N] [-channels N] [-w 1 2 4 8]
+"""
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy
+from h5py import File
+from numpy import ndarray
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from spacelabel.models.dataset.hdf5 import DataSetHDF5  # noqa: E402
+
+MEASUREMENTS = ('Flux density', 'Power', 'Degree of polarization')
+JD_START: float = 2453371.5  # 2005-01-01
+
+
+def write_cassini(path: Path, samples: int, channels: int):
+    """
+    Writes a Cassini-format HDF5 file of random measurements, 3 seconds apart.
+    """
+    rng = numpy.random.default_rng(0)
+    with File(path, 'w') as file:
+        file['t'] = JD_START + numpy.arange(samples) * 3. / 86400.
+        file['f'] = numpy.geomspace(3.5, 16000., channels)
+        for name, low, high in (('s', -21., -19.), ('p', -6., -4.)):
+            file[name] = 10 ** rng.uniform(low, high, size=(channels, samples))
+        file['v'] = rng.uniform(-1., 1., size=(channels, samples))
+
+
+def run(path: Path, settings: Dict, chunk_size: Optional[int], workers: Optional[int]) -> Dict[str, ndarray]:
+    """
+    Preprocesses the file one way, printing how long it took, and returns the measurements written.
+    """
+    dataset: DataSetHDF5 = DataSetHDF5(path, config_name='cassini')
+    time_start: float = time.perf_counter()
+    if chunk_size or workers:
+        output: Path = dataset.preprocess(**settings, chunk_size=chunk_size, workers=workers)
+    else:
+        dataset.load()
+        output: Path = dataset.preprocess(**settings)
+    elapsed: float = time.perf_counter() - time_start
+
+    with File(output, 'r') as file:
+        measurements: Dict[str, ndarray] = {name: numpy.array(file[name]) for name in MEASUREMENTS}
+    output.unlink()
+    if not (chunk_size or workers):
+        label: str = 'in memory'
+    elif not workers or workers == 1:
+        # A single worker isn't worth starting a pool for, so this is done in this process too
+        label: str = f"chunks of {chunk_size}, -w {workers}, in this process"
+    else:
+        label: str = f"chunks of {chunk_size}, -w {workers}, over {workers} processes"
+    print(f"{label:>44}: {elapsed:7.2f} s")
+    return measurements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-samples', type=int, dest='samples', default=200000)
+    parser.add_argument('-channels', type=int, dest='channels', default=200)
+    parser.add_argument('-chunk_size', type=int, dest='chunk_size', default=20000)
+    parser.add_argument('-w', type=int, nargs='+', dest='workers', default=[1, 2, 4])
+    arguments = parser.parse_args()
+    settings: Dict = dict(frequency_resolution=100, time_minimum=60, pyramid=False)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path: Path = Path(directory) / 'cassini.hdf5'
+        write_cassini(path, arguments.samples, arguments.channels)
+        print(
+            f"{arguments.samples} samples x {arguments.channels} channels x {len(MEASUREMENTS)} measurements, "
+            f"on {os.cpu_count()} CPUs"
+        )
+
+        # What each worker process is sent to set it up: only what it needs to read the file, not any loaded data
+        dataset: DataSetHDF5 = DataSetHDF5(path, config_name='cassini')
+        dataset.load()
+        state: Dict = {name: getattr(dataset, name) for name in dataset._reader_attributes}
+        print(f"Worker set-up: {len(pickle.dumps(state)) / 1024:.1f} kB, "
+              f"against {len(pickle.dumps(dataset)) / 1024 ** 2:.1f} MB for the whole loaded dataset")
+
+        reference: Dict[str, ndarray] = run(path, settings, None, None)
+        runs: List = [(arguments.chunk_size, None)] + [(arguments.chunk_size, workers) for workers in arguments.workers]
+        for chunk_size, workers in runs:
+            measurements: Dict[str, ndarray] = run(path, settings, chunk_size, workers)
+            for name in MEASUREMENTS:
+                numpy.testing.assert_allclose(measurements[name], reference[name], rtol=1e-12, equal_nan=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Times drawing regular time-frequency grids of increasing size as a mesh and as an image on the Agg backend,
+and reports how many pixels of the two figures differ noticeably.
+
+Run from the top of the repository:
+
+    python benchmarks/render.py [-repeats N] [-grids 1200x49 1200x400 6000x400]
+"""
+import argparse
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import Optional, Tuple, Type
+
+import matplotlib
+import numpy
+from numpy import ndarray
+
+matplotlib.use('Agg')
+from matplotlib.axes import Axes  # noqa: E402
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+from matplotlib.colors import LogNorm  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from spacelabel.views.matplotlib import (  # noqa: E402
+    ImageRenderer, MeshRenderer, Renderer, get_renderer
+)
+
+FIGURE_SIZE: Tuple[float, float] = (15, 9)
+
+
+def grid(samples: int, channels: int) -> Tuple[ndarray, ndarray, ndarray]:
+    """
+    A preprocessed-style grid: a minute per sample, log-spaced channels and log-normal values.
+    """
+    rng = numpy.random.default_rng(0)
+    time: ndarray = numpy.datetime64('2005-01-01T00:00:30') + numpy.arange(samples) * numpy.timedelta64(60, 's')
+    freq: ndarray = numpy.geomspace(3.5, 16000., channels)
+    return time, freq, 10 ** rng.normal(-20., 0.5, size=(channels, samples))
+
+
+def draw(
+        renderer: Optional[Type[Renderer]], time: ndarray, freq: ndarray, values: ndarray, repeats: int
+) -> Tuple[float, ndarray]:
+    """
+    Draws the grid onto a new figure, and times drawing the figure.
+
+    :return: The quickest time taken, and the pixels of the figure
+    """
+    fig: Figure = Figure(figsize=FIGURE_SIZE)
+    canvas: FigureCanvasAgg = FigureCanvasAgg(fig)
+    axis: Axes = fig.add_subplot()
+    if renderer:
+        renderer.draw(axis, time, freq, values, cmap='viridis', norm=LogNorm(1e-21, 1e-19))
+    axis.set_xlim(time[0], time[-1])
+    axis.set_ylim(freq[0], freq[-1])
+    axis.set_yscale('log')
+
+    elapsed: float = numpy.inf
+    for _ in range(repeats):
+        time_start: float = perf_counter()
+        canvas.draw()
+        elapsed = min(elapsed, perf_counter() - time_start)
+    return elapsed, numpy.asarray(canvas.buffer_rgba())[..., :3].astype(int)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-repeats', type=int, dest='repeats', default=3)
+    parser.add_argument('-grids', type=str, nargs='+', dest='grids', default=['1200x49', '1200x400', '6000x400'])
+    arguments = parser.parse_args()
+
+    time_empty, _ = draw(None, *grid(2, 2), arguments.repeats)
+    print(f"{FIGURE_SIZE[0]}x{FIGURE_SIZE[1]} inch figure; empty axes draw in {time_empty:.3f} s")
+    print(f"{'samples x channels':>20} {'mesh':>8} {'image':>8} {'speed-up':>9} {'pixels differing':>17}")
+
+    for size in arguments.grids:
+        samples, channels = (int(count) for count in size.split('x'))
+        time, freq, values = grid(samples, channels)
+        assert get_renderer(time, freq) is ImageRenderer
+
+        time_mesh, pixels_mesh = draw(MeshRenderer, time, freq, values, arguments.repeats)
+        time_image, pixels_image = draw(ImageRenderer, time, freq, values, arguments.repeats)
+        # Antialiased cell edges in the mesh differ slightly, so only count differences that can be seen
+        differing: float = (numpy.abs(pixels_mesh - pixels_image).max(axis=-1) > 32).mean()
+        print(
+            f"{size:>20} {time_mesh:>7.3f}s {time_image:>7.3f}s {time_mesh / time_image:>8.1f}x "
+            f"{differing * 100:>16.2f}%"
+        )
+
+
+if __name__ == '__main__':
+    main()
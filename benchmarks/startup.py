@@ -0,0 +1,91 @@
+"""
+Measures how long the command line takes to start: the cumulative import time of the entry point,
+from `python -X importtime`, against importing up front the libraries and modules `main` now imports
+only once the arguments are parsed, and the wall-clock time of `spacelabel -h`.
+Exits with an error if the entry point's import time is over budget.
+
+Run from the top of the repository:
+
+    python benchmarks/startup.py [-repeats N] [-budget MILLISECONDS]
+"""
+import argparse
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Set, Tuple
+
+ROOT: Path = Path(__file__).parent.parent
+
+# What `main` imports after parsing the arguments, which used to be imported at the top of the entry point
+DEFERRED: List[str] = [
+    'astropy.time',
+    'spacelabel.models.dataset.load',
+    'spacelabel.models.dataset.hdf5',
+    'spacelabel.models.dataset.cdf',
+    'spacelabel.models.dataset.preprocessed',
+    'spacelabel.presenters',
+    'spacelabel.views.matplotlib',
+]
+
+
+def import_time(modules: List[str]) -> Tuple[float, Set[str]]:
+    """
+    Imports the modules in a fresh interpreter, returning the total cumulative import time in seconds,
+    and the modules that couldn't be imported in this environment, with why.
+    """
+    script: str = (
+        "import importlib, sys\n"
+        f"for name in {modules!r}:\n"
+        "    try:\n"
+        "        importlib.import_module(name)\n"
+        "    except ImportError as error:\n"
+        "        print(f'{name}: {error}', file=sys.stdout)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+    # Each line is 'import time: self | cumulative | name', with the names of nested imports indented
+    total: int = 0
+    for match in re.finditer(r'^import time:\s+\d+ \|\s+(\d+) \| (\S.*)$', result.stderr, flags=re.MULTILINE):
+        total += int(match.group(1))
+    return total / 1e6, set(result.stdout.splitlines())
+
+
+def wall_time(arguments: List[str]) -> float:
+    """
+    Runs a command in a fresh interpreter, returning how long it took in seconds.
+    """
+    time_start: float = time.perf_counter()
+    subprocess.run([sys.executable] + arguments, cwd=ROOT, capture_output=True, check=True)
+    return time.perf_counter() - time_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-repeats', type=int, dest='repeats', default=5)
+    parser.add_argument('-budget', type=float, dest='budget', default=100., help="In milliseconds")
+    arguments = parser.parse_args()
+
+    # Once first, so every measurement is made with the bytecode cached and the files in the page cache
+    _, failures = import_time(['spacelabel.__main__'] + DEFERRED)
+    for failure in sorted(failures):
+        print(f"Could not import {failure}; the time importing everything up front is an underestimate")
+
+    entry: float = min(import_time(['spacelabel.__main__'])[0] for _ in range(arguments.repeats))
+    eager: float = min(import_time(['spacelabel.__main__'] + DEFERRED)[0] for _ in range(arguments.repeats))
+    interpreter: float = min(wall_time(['-c', 'pass']) for _ in range(arguments.repeats))
+    help_: float = min(wall_time(['-m', 'spacelabel', '-h']) for _ in range(arguments.repeats))
+
+    print(f"{'import spacelabel.__main__':>40}: {entry * 1000:7.1f} ms (budget {arguments.budget:.0f} ms)")
+    print(f"{'importing everything up front':>40}: {eager * 1000:7.1f} ms")
+    print(f"{'spacelabel -h':>40}: {help_ * 1000:7.1f} ms, of which {interpreter * 1000:.1f} ms starting Python")
+
+    if entry * 1000 > arguments.budget:
+        sys.exit(f"The entry point takes {entry * 1000:.1f} ms to import, over the {arguments.budget:.0f} ms budget")
+
+
+if __name__ == '__main__':
+    main()
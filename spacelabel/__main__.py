@@ -1,18 +1,20 @@
 #! /usr/bin/python3
 import argparse
-import json
 import logging
 import os
-from astropy.time import Time
-from h5py import File
 from pathlib import Path
 
-from typing import Dict, Type, Tuple
+from typing import Dict, Optional, TYPE_CHECKING
 
-from spacelabel.models.dataset import DataSet
-from spacelabel.models.dataset.load import load_dataset, DATASET_TYPES
-from spacelabel.views.matplotlib import ViewMatPlotLib
-from spacelabel.presenters import Presenter
+from spacelabel.models.cache import CACHE_SIZE_DEFAULT
+from spacelabel.options import FREQUENCY_METHODS, NORMALISATIONS, POOLS, PREFETCH_DEPTH, TIME_METHODS
+
+# The models, views and presenters are imported once the arguments are parsed,
+# so the scientific and GUI libraries aren't loaded just to show the help or report a bad argument.
+if TYPE_CHECKING:
+    from spacelabel.models.dataset import DataSet
+    from spacelabel.presenters import Presenter
+    from spacelabel.views.matplotlib import ViewMatPlotLib
 
 
 def main():
@@ -44,6 +46,36 @@ def main():
         help="The minimum width of time bin, in seconds, to rebin the data to. "
              "To override a spacecraft default with 'Do not rebin', set to 0."
     )
+    parser.add_argument(
+        '-frequency_method', type=str, dest='frequency_method', metavar="FREQUENCY_METHOD", default=None,
+        choices=FREQUENCY_METHODS,
+        help="How to rebin the frequency bins: 'interpolate' between the original channels (default), "
+             "or 'average' the channels overlapping each bin (flux-conserving)."
+    )
+    parser.add_argument(
+        '-time_method', type=str, dest='time_method', metavar="TIME_METHOD", default=None,
+        choices=TIME_METHODS,
+        help="How to combine the samples falling in each time bin: 'mean' (default), 'median' or 'max'. "
+             "Time bins without any data are left blank."
+    )
+    parser.add_argument(
+        '-chunk_size', type=int, nargs=1, dest='chunk_size', metavar="CHUNK_SIZE", default=None,
+        help="Preprocess the file in chunks of this many time samples, writing each to the preprocessed file "
+             "as it goes. This keeps memory use bounded for files too large to load in one go."
+    )
+    parser.add_argument(
+        '-w', type=int, nargs=1, dest='workers', metavar="WORKERS", default=None,
+        help="The number of processes to preprocess the file with. "
+             "Implies preprocessing in chunks, with a default chunk size if -chunk_size is not given."
+    )
+    parser.add_argument(
+        '-readers', type=int, dest='readers', metavar="READERS", default=None,
+        help="The number of CDF files to read at once, when reading a set of daily CDF files."
+    )
+    parser.add_argument(
+        '-reader_pool', type=str, dest='reader_pool', metavar="READER_POOL", default=POOLS[0], choices=POOLS,
+        help="What to read the CDF files over: 'thread' (default), or 'process' to scale with the number of cores."
+    )
     parser.add_argument(
         '-fig_size', type = float,  nargs = 2, dest = 'fig_size', metavar="FIGURE_SIZE", default=(15, 9),
         help = "Size of the matplotlib figure"
@@ -74,16 +106,53 @@ def main():
              "Values must be in the same units as the data."
               "Lines can be toggled using check boxes."
     )
+    parser.add_argument(
+        '-prefetch', type=int, dest='prefetch_depth', metavar='PREFETCH_DEPTH', default=PREFETCH_DEPTH,
+        help="The number of windows either side of the one shown to fetch in the background, "
+             "so moving to them with Next and Prev is quicker. Set to 0 to turn off."
+    )
+    parser.add_argument(
+        '-cache_size', type=float, dest='cache_size', metavar='CACHE_SIZE', default=CACHE_SIZE_DEFAULT,
+        help="The memory, in megabytes, to keep windows already viewed in, so going back to them is quicker. "
+             "Set to 0 to turn off."
+    )
+    parser.add_argument(
+        '-normalisation', type=str, dest='normalisation', metavar='NORMALISATION', default=NORMALISATIONS[0],
+        choices=NORMALISATIONS,
+        help="What the colour scale covers the dynamic range of: the 'window' shown (default), "
+             "or the whole dataset ('global'), so the colours mean the same on every page."
+    )
+    parser.add_argument(
+        '--not_pyramid', dest='not_pyramid', action='store_true',
+        help="If not_pyramid is called, the preprocessed file is written without the time-decimated levels "
+             "used to draw wide time windows quickly. By default: the levels are written"
+    )
+    parser.add_argument(
+        '--not_persistent', dest='not_persistent', action='store_true',
+        help="If not_persistent is called, the figure is rebuilt for each window when moving with Next and Prev. "
+             "By default: the figure is built once, and the data drawn on it is replaced"
+    )
+    parser.add_argument(
+        '--not_lazy', dest='not_lazy', action='store_true',
+        help="If not_lazy is called, a preprocessed file is read fully into memory on start-up. "
+             "By default: lazy mode, only the data in the window being displayed is read from the file"
+    )
+    parser.add_argument(
+        '--window_only', dest='window_only', action='store_true',
+        help="If window_only is called, only the CDF files covering the date range are read, "
+             "and no preprocessed file is written. Next and Prev show no data outside the date range. "
+             "By default: the whole set of files is read"
+    )
     parser.add_argument(
         '--not_verbose', dest='not_verbose', action='store_false',
         help="If not_verbose is called, the debug log will not be printed. By default: verbose mode"
     )
-        
-
-
 
     arguments = parser.parse_args()
 
+    from astropy.time import Time
+    from spacelabel.models.dataset.load import load_dataset, DATASET_TYPES
+
     # ==================== INPUT FILE ====================
     # First, we load the input file
     input_file: Path = Path(arguments.file[0])
@@ -109,19 +178,57 @@ def main():
         logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO"))
 
     # Set up the MVP and go!
-    dataset: DataSet = load_dataset(
+    dataset: 'DataSet' = load_dataset(
         file_path=input_file,
         config_name=arguments.config,
-        log_level=logging.DEBUG
+        log_level=logging.DEBUG,
+        lazy=not arguments.not_lazy,
+        readers=arguments.readers,
+        pool=arguments.reader_pool,
+        time_range=(date_start, date_end) if arguments.window_only else None
     )
     dataset.validate_dates((date_start, date_end))
-    dataset.load()  # Load the dataset if the dates are valid
-    dataset.preprocess(
+    preprocess_settings: Dict = dict(
         frequency_resolution=(arguments.frequency_resolution[0] if arguments.frequency_resolution else None),
-        time_minimum=(arguments.time_minimum[0] if arguments.time_minimum else None)
+        time_minimum=(arguments.time_minimum[0] if arguments.time_minimum else None),
+        frequency_method=arguments.frequency_method,
+        time_method=arguments.time_method,
+        pyramid=not arguments.not_pyramid
+    )
+    # Only part of the input is read if it's limited to the date range, so it's small enough not to need streaming
+    streamed: bool = bool(arguments.chunk_size or arguments.workers) and not arguments.window_only
+    if streamed:
+        # Stream the preprocessing straight from the input file
+        preprocessed_file: Optional[Path] = dataset.preprocess(
+            **preprocess_settings,
+            chunk_size=(arguments.chunk_size[0] if arguments.chunk_size else None),
+            workers=(arguments.workers[0] if arguments.workers else None)
+        )
+    else:
+        dataset.load()  # Load the dataset if the dates are valid
+        preprocessed_file: Optional[Path] = dataset.preprocess(**preprocess_settings)
+
+    if preprocessed_file:
+        # Read the results back from the preprocessed file, so it can be read lazily and its pyramid used
+        dataset = load_dataset(
+            file_path=input_file,
+            config_name=arguments.config,
+            log_level=logging.DEBUG,
+            lazy=not arguments.not_lazy
+        )
+        dataset.load()
+    elif streamed:
+        dataset.load()
+
+    # Only now is the GUI needed
+    from spacelabel.presenters import Presenter
+    from spacelabel.views.matplotlib import ViewMatPlotLib
+
+    view: 'ViewMatPlotLib' = ViewMatPlotLib(log_level=logging.INFO, persistent=not arguments.not_persistent)
+    presenter: 'Presenter' = Presenter(
+        dataset, view, log_level=logging.INFO, prefetch_depth=arguments.prefetch_depth,
+        cache_size=arguments.cache_size, normalisation=arguments.normalisation
     )
-    view: ViewMatPlotLib = ViewMatPlotLib(log_level=logging.INFO)
-    presenter: Presenter = Presenter(dataset, view, log_level=logging.INFO)
     presenter.request_measurements()
 
     presenter.request_data_time_range(
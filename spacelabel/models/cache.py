@@ -0,0 +1,112 @@
+import logging
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+CACHE_SIZE_DEFAULT: int = 512  # Default memory budget of the window cache, in megabytes
+BYTES_PER_MEGABYTE: int = 1024 * 1024
+
+
+class WindowCache:
+    """
+    A least-recently-used cache of the windows of data drawn, so paging back and forth doesn't fetch them again.
+
+    Entries are evicted, least recently used first, once their total size goes over a memory budget.
+    The cache can be shared between threads.
+    """
+    _entries: 'OrderedDict[Hashable, Tuple[Any, int]]' = None  # Each value, and its size in bytes
+    _size_max: int = None
+    _size: int = 0
+    _lock: Lock = None
+    hits: int = 0
+    misses: int = 0
+
+    def __init__(self, size_max: int = CACHE_SIZE_DEFAULT * BYTES_PER_MEGABYTE, log_level: Optional[int] = None):
+        """
+        Initializes an empty cache.
+
+        :param size_max: The memory budget for the cache, in bytes
+        :param log_level: The level of logging to show from this object
+        """
+        self._entries = OrderedDict()
+        self._size_max = size_max
+        self._lock = Lock()
+
+        if log_level:
+            log.setLevel(log_level)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Looks up a value, marking it as the most recently used.
+
+        :param key: The key of the value
+        :return: The value, or None if it's not in the cache
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            else:
+                self.misses += 1
+                return None
+
+    def put(self, key: Hashable, value: Any, size: int):
+        """
+        Adds a value to the cache, then evicts the least recently used values until the cache is within budget.
+        Values larger than the whole budget aren't cached.
+
+        :param key: The key of the value
+        :param value: The value
+        :param size: The size of the value, in bytes
+        """
+        if size > self._size_max:
+            log.debug(f"put: Not caching a value of {size} bytes, as it is larger than the cache")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._size += size
+
+            while self._size > self._size_max:
+                _, (_, size_evicted) = self._entries.popitem(last=False)
+                self._size -= size_evicted
+
+    def discard(self, condition: Callable[[Hashable], bool]):
+        """
+        Removes the values whose keys meet a condition, e.g. as they've gone out of date.
+
+        :param condition: Function taking a key, returning True if its value should be removed
+        """
+        with self._lock:
+            for key in [key for key in self._entries.keys() if condition(key)]:
+                self._size -= self._entries.pop(key)[1]
+
+    def clear(self):
+        """
+        Removes all the values from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Reports how well the cache is working, for tuning its size.
+
+        :return: The number of hits, misses and entries, and the memory used and budget in bytes
+        """
+        with self._lock:
+            return {
+                'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries),
+                'size': self._size, 'size_max': self._size_max
+            }
@@ -0,0 +1,233 @@
+import logging
+
+import numpy
+from numpy import ndarray
+from typing import Dict, List, Optional, Tuple
+
+from spacelabel.models.feature import Feature
+from spacelabel.models.index import FeatureIndex
+
+log = logging.getLogger(__name__)
+
+CAPACITY_INITIAL: int = 1024  # Number of vertexes the buffers are first made big enough for
+SECONDS_PER_DAY: float = 86400.
+JD_UNIX_EPOCH: float = 2440587.5  # The Julian date of the start of Unix time
+
+
+def _grow(buffer: ndarray, size: int) -> ndarray:
+    """
+    Makes sure a buffer can hold at least a given number of entries, doubling it if not.
+
+    :param buffer: The buffer
+    :param size: The number of entries it needs to hold
+    :return: The buffer, or a bigger copy of it
+    """
+    if size <= len(buffer):
+        return buffer
+    grown: ndarray = numpy.empty(max(2 * len(buffer), size), dtype=buffer.dtype)
+    grown[:len(buffer)] = buffer
+    return grown
+
+
+class FeatureCatalogue:
+    """
+    The features labelled on a dataset, stored as columns rather than as separate objects.
+
+    The vertexes of all the features are held in flat buffers of Unix time and frequency,
+    with each feature's vertexes running from its offset to the next one's.
+    Features are handed out as lightweight `Feature` handles onto the buffers,
+    and the whole catalogue can be queried and serialised in vectorised passes.
+    """
+    _time: ndarray = None  # The time of each vertex, as Unix time
+    _freq: ndarray = None  # The frequency of each vertex
+    _offsets: ndarray = None  # The index of the first vertex of each feature, and then the end of the last
+    _names: List[str] = None
+    _count: int = 0  # The number of features
+    _size: int = 0  # The number of vertexes
+    _index: FeatureIndex = None
+
+    def __init__(self, log_level: Optional[int] = None):
+        """
+        Initializes an empty catalogue.
+
+        :param log_level: The level of logging to show from this object
+        """
+        self._time = numpy.empty(CAPACITY_INITIAL, dtype=float)
+        self._freq = numpy.empty(CAPACITY_INITIAL, dtype=float)
+        self._offsets = numpy.zeros(CAPACITY_INITIAL, dtype=numpy.int64)
+        self._names = []
+        self._index = FeatureIndex(log_level=log_level)
+
+        if log_level:
+            log.setLevel(log_level)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, feature_id: int) -> Feature:
+        if not 0 <= feature_id < self._count:
+            raise IndexError(f"No feature {feature_id} in a catalogue of {self._count}")
+        return Feature(self, feature_id)
+
+    def __iter__(self):
+        return (Feature(self, feature_id) for feature_id in range(self._count))
+
+    def add(self, name: str, time: ndarray, freq: ndarray) -> Feature:
+        """
+        Adds a feature to the catalogue.
+
+        :param name: The name of the feature
+        :param time: The times of its vertexes, as Unix time
+        :param freq: The frequencies of its vertexes
+        :return: The handle of the new feature
+        """
+        time = numpy.asarray(time, dtype=float)
+        freq = numpy.asarray(freq, dtype=float)
+        size: int = self._size + len(time)
+
+        self._time = _grow(self._time, size)
+        self._freq = _grow(self._freq, size)
+        self._offsets = _grow(self._offsets, self._count + 2)
+        self._time[self._size:size] = time
+        self._freq[self._size:size] = freq
+        self._offsets[self._count + 1] = size
+        self._names.append(name)
+
+        self._index.add(
+            self._count, time_start=time.min(), time_end=time.max(), freq_min=freq.min(), freq_max=freq.max()
+        )
+        self._count += 1
+        self._size = size
+        return Feature(self, self._count - 1)
+
+    def extend(self, names: List[str], time: ndarray, freq: ndarray, offsets: ndarray):
+        """
+        Adds many features to the catalogue at once, e.g. when loading it from file.
+
+        :param names: The name of each feature
+        :param time: The times of the vertexes of all the features, as Unix time
+        :param freq: The frequencies of the vertexes of all the features
+        :param offsets: The index of the first vertex of each feature, and then the end of the last
+        """
+        if not names:
+            return
+
+        starts: ndarray = offsets[:-1]
+        size: int = self._size + len(time)
+        count: int = self._count + len(names)
+
+        self._time = _grow(self._time, size)
+        self._freq = _grow(self._freq, size)
+        self._offsets = _grow(self._offsets, count + 1)
+        self._time[self._size:size] = time
+        self._freq[self._size:size] = freq
+        self._offsets[self._count + 1:count + 1] = self._size + offsets[1:]
+        self._names.extend(names)
+
+        self._index.extend(
+            list(range(self._count, count)),
+            time_start=numpy.minimum.reduceat(time, starts), time_end=numpy.maximum.reduceat(time, starts),
+            freq_min=numpy.minimum.reduceat(freq, starts), freq_max=numpy.maximum.reduceat(freq, starts)
+        )
+        self._count = count
+        self._size = size
+
+    def get_name(self, feature_id: int) -> str:
+        """
+        :param feature_id: The ID of the feature
+        :return: The name of the feature
+        """
+        return self._names[feature_id]
+
+    def get_arrays(self, feature_id: int) -> Tuple[ndarray, ndarray]:
+        """
+        :param feature_id: The ID of the feature
+        :return: The Unix times and frequencies of the feature's vertexes
+        """
+        start, stop = self._offsets[feature_id], self._offsets[feature_id + 1]
+        return self._time[start:stop], self._freq[start:stop]
+
+    def query(self, time_start: float, time_end: float) -> List[Feature]:
+        """
+        Finds the features that overlap a time range, including any that span all of it.
+
+        :param time_start: The start of the time range, as Unix time (inclusive)
+        :param time_end: The end of the time range, as Unix time (inclusive)
+        :return: The handles of the features, in order of start time
+        """
+        return [Feature(self, feature_id) for feature_id in self._index.query(time_start, time_end)]
+
+    def _get_orientations(self) -> ndarray:
+        """
+        Works out whether each feature's vertexes run counter-clockwise, by the sign of its area.
+        The areas are found for all the features at once, using the shoelace formula.
+
+        :return: Whether each feature is counter-clockwise
+        """
+        starts: ndarray = self._offsets[:self._count]
+        lengths: ndarray = numpy.diff(self._offsets[:self._count + 1])
+
+        # Times are taken relative to each feature's first vertex, so the products don't lose precision
+        time: ndarray = self._time[:self._size] - numpy.repeat(self._time[starts], lengths)
+        freq: ndarray = self._freq[:self._size]
+        following: ndarray = numpy.arange(1, self._size + 1)
+        following[self._offsets[1:self._count + 1] - 1] = starts
+
+        areas: ndarray = numpy.add.reduceat(time * freq[following] - time[following] * freq, starts)
+        return areas > 0.
+
+    def to_tfcat_features(self) -> List[Dict]:
+        """
+        Expresses the catalogue as a list of TFCat features, with vertexes counter-clockwise as TFCat requires.
+
+        :return: A list of dictionaries. Times are returned as Unix time, not calendar time
+        """
+        if not self._count:
+            return []
+
+        coordinates: List[List[float]] = numpy.column_stack(
+            (self._time[:self._size], self._freq[:self._size])
+        ).tolist()
+        bounds: List[int] = self._offsets[:self._count + 1].tolist()
+
+        features: List[Dict] = []
+        for feature_id, (name, is_ccw) in enumerate(zip(self._names, self._get_orientations().tolist())):
+            ring: List[List[float]] = coordinates[bounds[feature_id]:bounds[feature_id + 1]]
+            features.append(
+                {
+                    "type": "Feature",
+                    "id": feature_id,
+                    "geometry": {
+                        "type": "Polygon",
+                        "coordinates": [
+                            ring if is_ccw else ring[::-1]
+                        ]
+                    },
+                    "properties": {
+                        "feature_type": name
+                    }
+                }
+            )
+        return features
+
+    def to_text_summaries(self) -> List[str]:
+        """
+        Summarises the extent of each feature, with the times as Julian dates.
+
+        :return: A string for each feature with its name, and its minimum and maximum time and frequency
+        """
+        if not self._count:
+            return []
+
+        starts: ndarray = self._offsets[:self._count]
+        julian: ndarray = self._time[:self._size] / SECONDS_PER_DAY + JD_UNIX_EPOCH
+        return [
+            f"{name}, {time_min}, {time_max}, {freq_min}, {freq_max}"
+            for name, time_min, time_max, freq_min, freq_max in zip(
+                self._names,
+                numpy.minimum.reduceat(julian, starts).tolist(),
+                numpy.maximum.reduceat(julian, starts).tolist(),
+                numpy.minimum.reduceat(self._freq[:self._size], starts).tolist(),
+                numpy.maximum.reduceat(self._freq[:self._size], starts).tolist()
+            )
+        ]
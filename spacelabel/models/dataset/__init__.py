@@ -2,31 +2,184 @@
 Data sets from satellites.
 """
 
+import hashlib
 import json
 import logging
+import os
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union, TYPE_CHECKING, Type
+from typing import Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union, TYPE_CHECKING, Type
 import shutil
-import math
+from collections import deque
+from itertools import chain
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from threading import Lock
 import numpy
-from astropy.timeseries import TimeSeries, aggregate_downsample
 from astropy.time import Time, TimeDelta
-from astropy import units
 from h5py import File
 from numpy import ndarray  # Explicit import to make Typing easier
-from pandas import DataFrame
-from tfcat.validate import validate_file
-from tqdm import trange
+from tqdm import tqdm
 
 
+from spacelabel.models.dataset.rebin import (
+    FREQUENCY_METHODS, TIME_METHODS, PYRAMID_REDUCTIONS, frequency_weights, rebin_frequency, time_bins,
+    downsample_time, rebin_block, pyramid_factors, decimate, STATISTICS_BLOCK_SIZE, histogram_edges,
+    block_histograms, histogram_quantiles
+)
+from spacelabel.models.catalogue import FeatureCatalogue
 from spacelabel.models.feature import Feature
+from spacelabel.models.journal import CatalogueJournal
+from spacelabel.options import NORMALISATIONS, SHOULD_MEASUREMENT_BE_LOG
 
 if TYPE_CHECKING:
     from spacelabel.presenters import Presenter
 
 log = logging.getLogger(__name__)
 
+SECONDS_PER_DAY: float = 86400.
+CHUNK_SIZE_DEFAULT: int = 50000  # Number of time samples per chunk, if preprocessing in parallel without a chunk size
+
+
+class PyramidLevel(NamedTuple):
+    """
+    One level of the display pyramid stored in a preprocessed file, decimated in time from the full data.
+    """
+    factor: int  # The number of full-resolution samples combined into each sample of this level
+    time_index: ndarray  # The mean time of each sample, as Julian dates
+    data: Dict[str, Dict[str, ndarray]]  # The measurements at this level, for each of PYRAMID_REDUCTIONS
+    data_1d: Dict[str, Dict[str, ndarray]]  # The 1D time series at this level, for each of PYRAMID_REDUCTIONS
+
+
+class HistogramStatistics(NamedTuple):
+    """
+    Histograms of the positive values of a measurement, for estimating its dynamic range over any time window.
+    """
+    edges: ndarray  # The edges of the bins, in log10 of the values
+    block_size: int  # The number of time samples in each block
+    blocks: ndarray  # The counts in each bin for each block of time, of shape (blocks, bins)
+    total: ndarray  # The counts in each bin for the whole dataset
+
+
+# The dataset and settings used by each preprocessing worker process, set when the process starts
+_worker_dataset: Optional['DataSet'] = None
+_worker_weights: Optional[ndarray] = None
+_worker_time_method: Optional[str] = None
+
+
+def _initialise_worker(
+        dataset_class: Type['DataSet'], state: Dict[str, object], weights: Optional[ndarray], time_method: str
+):
+    """
+    Sets up a preprocessing worker process with the dataset to read from, and how to process it.
+
+    The dataset is rebuilt from just the attributes it reads the source file with,
+    rather than sent over whole with any data already loaded into it.
+
+    :param dataset_class: The type of dataset to read chunks from
+    :param state: The attributes it needs to read them, as listed in its `_reader_attributes`
+    :param weights: The frequency weight matrix, if rebinning frequency
+    :param time_method: How to reduce the samples in each time bin
+    """
+    global _worker_dataset, _worker_weights, _worker_time_method
+    _worker_dataset = dataset_class.__new__(dataset_class)
+    _worker_dataset.__dict__.update(state)
+    _worker_weights = weights
+    _worker_time_method = time_method
+
+
+def _preprocess_worker(
+        name: str, row_start: int, row_stop: int, time: ndarray, edges: Optional[ndarray]
+) -> Tuple[str, Tuple[int, ...]]:
+    """
+    Reads a chunk of a measurement from the source file and preprocesses it, in a worker process.
+    The result is left in a shared memory block, rather than pickled back to the parent process.
+
+    :param name: The name of the measurement
+    :param row_start: The first time row to read
+    :param row_stop: The time row to read up to (exclusive)
+    :param time: The times of the rows
+    :param edges: The edges of the time bins the chunk covers, if downsampling time
+    :return: The name of the shared memory block, and the shape of the result within it
+    """
+    measurement: ndarray = rebin_block(
+        _worker_dataset._read_source_rows(name, row_start, row_stop),
+        time=time, edges=edges, weights=_worker_weights, time_method=_worker_time_method,
+        positive_only=SHOULD_MEASUREMENT_BE_LOG.get(name, True)
+    )
+    shared: SharedMemory = SharedMemory(create=True, size=max(measurement.nbytes, 1))
+    numpy.ndarray(measurement.shape, dtype=measurement.dtype, buffer=shared.buf)[...] = measurement
+    shared.close()
+    return shared.name, measurement.shape
+
+
+def _collect_shared(result: Tuple[str, Tuple[int, ...]]) -> ndarray:
+    """
+    Copies a preprocessed chunk out of the shared memory block a worker left it in, then frees the block.
+
+    :param result: The name of the shared memory block, and the shape of the result within it
+    :return: The preprocessed chunk
+    """
+    name, shape = result
+    shared: SharedMemory = SharedMemory(name=name)
+    measurement: ndarray = numpy.ndarray(shape, dtype=float, buffer=shared.buf).copy()
+    shared.close()
+    shared.unlink()
+    return measurement
+
+
+def _split_bins(row_bounds: ndarray, chunk_size: int) -> List[Tuple[int, int]]:
+    """
+    Splits a run of time bins into chunks of whole bins, each holding about a chunk size of time samples.
+
+    :param row_bounds: The first time sample row of each bin, and then the end of the last
+    :param chunk_size: The number of time samples to aim for in each chunk
+    :return: The first bin and the bin to stop at (exclusive) of each chunk, counted from the start of the run
+    """
+    bin_breaks: ndarray = numpy.unique(
+        numpy.concatenate(
+            (
+                numpy.searchsorted(
+                    row_bounds, numpy.arange(row_bounds[0], row_bounds[-1], chunk_size), side='right'
+                ) - 1,
+                [len(row_bounds) - 1]
+            )
+        ).clip(min=0)
+    )
+    return list(zip(bin_breaks[:-1].tolist(), bin_breaks[1:].tolist()))
+
+
+def _file_digest(path: Path) -> str:
+    """
+    Works out the SHA-256 hash of a file's contents.
+
+    :param path: The path to the file
+    :return: The hash, as hexadecimal
+    """
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _read_digest(path: Path) -> Optional[str]:
+    """
+    Reads the hash recorded for a file the last time it was validated, from the `.sha256` file alongside it.
+
+    :param path: The path to the file
+    :return: The hash, or None if there isn't one
+    """
+    path_digest: Path = path.with_suffix(path.suffix + '.sha256')
+    return path_digest.read_text().strip() if path_digest.exists() else None
+
+
+def _write_digest(path: Path, digest: str):
+    """
+    Records the hash of a file that has been validated, in a `.sha256` file alongside it.
+
+    :param path: The path to the file
+    :param digest: The hash of its contents, as hexadecimal
+    """
+    path.with_suffix(path.suffix + '.sha256').write_text(digest)
+
 
 class DataSet(ABC):
     """
@@ -35,17 +188,25 @@ class DataSet(ABC):
     """
     _file_path: Path = None  # The suffix-less file path
     _observer: str = None
-    _time: Time = None
+    _time: Optional[Time] = None  # The time axis, unless only the parts of it needed are made from the time index
+    _time_index: ndarray = None  # The times as contiguous, sorted Julian dates in the same scale, for fast lookup
+    _time_scale: str = None  # The time scale of the time index
     _time_1d: Time = None #for storing time series data for 1d time series
     _freq: ndarray = None
-    _data: Dict[str, ndarray] = {}  # Private dictionary containing the data for the variables
-    _data_1d: Dict[str, ndarray] = {}  # Private dictionary containing the data for 1d time series
-    _units: Dict[str, str] = {}
-    _units_1d: Dict[str, str] = {}
-    _features: List[Feature] = []
+    _data: Dict[str, ndarray] = None  # Private dictionary containing the data for the variables
+    _data_1d: Dict[str, ndarray] = None  # Private dictionary containing the data for 1d time series
+    _units: Dict[str, str] = None
+    _units_1d: Dict[str, str] = None
+    _pyramid: List[PyramidLevel] = None  # The levels of the display pyramid, from finest to coarsest, if any
+    _statistics: Dict[str, HistogramStatistics] = None  # The histograms of each measurement, if worked out
+    _catalogue: FeatureCatalogue = None  # The features labelled on the data
+    _journal: Optional[CatalogueJournal] = None  # The features added since the catalogue was last saved
+    _lock: Lock = None  # Guards the catalogue and statistics, as the presenter reads them from background threads
     _presenter: 'Presenter' = None
     _log_level: Optional[int] = None  # Passed to Features
     _config: Optional[Dict] = None  # The configuration used
+    _preprocess_settings: Optional[Dict] = None  # The settings the data was preprocessed with, recorded in the file
+    _reader_attributes: Tuple[str, ...] = ('_file_path', '_config')  # All `_read_source_rows` needs, for workers
 
     @staticmethod
     @abstractmethod
@@ -58,6 +219,29 @@ class DataSet(ABC):
         """
         raise NotImplementedError("A dataset must have the ability to look for pre-processed versions of itself")
 
+    @staticmethod
+    def is_preprocessed_outdated(file_path: Path, preprocessed_path: Path) -> bool:
+        """
+        Implemented in the specific subtypes that are built from several source files, this checks whether
+        source files have been added, removed or replaced since the pre-processed file was written.
+
+        :param file_path: The path to the file
+        :param preprocessed_path: The path to the preprocessed file
+        :return: Whether the preprocessed file needs updating
+        """
+        return False
+
+    def update_preprocessed(self, preprocessed_path: Path) -> Path:
+        """
+        Implemented in the specific subtypes that are built from several source files, this brings an outdated
+        pre-processed file up to date with the source files, without reprocessing the ones it already contains.
+
+        :param preprocessed_path: The path to the preprocessed file
+        :raises NotImplementedError: if not implemented for this DataSet
+        :return: The path to the preprocessed file
+        """
+        raise NotImplementedError("This dataset cannot update its pre-processed file")
+
     def __init__(self, file_path: Path, config_name: Optional[str] = None, log_level: Optional[int] = None):
         """
         Initializes the dataset. Mostly used to set log level.
@@ -70,6 +254,15 @@ class DataSet(ABC):
         :param log_level: The level of logging to show from this object
         """
         self._file_path = file_path
+        self._catalogue = FeatureCatalogue(log_level=log_level)
+        # Each dataset gets its own containers, so data loaded into one is never seen by another
+        self._data = {}
+        self._data_1d = {}
+        self._units = {}
+        self._units_1d = {}
+        self._pyramid = []
+        self._statistics = {}
+        self._lock = Lock()
 
         if log_level:
             log.setLevel(log_level)
@@ -104,12 +297,27 @@ class DataSet(ABC):
         frequency_resolution: Optional[int] = None,
         time_minimum: Optional[float] = None,
         frequency_guide: Optional[list] = None,
-    ):
+        frequency_method: Optional[str] = None,
+        time_method: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        pyramid: bool = True
+    ) -> Optional[Path]:
         """
         Rescales the frequency and/or time, and all measurements depending on them, then saves to an HDF5 file.
 
+        If a chunk size or a number of workers is given, the measurements are instead streamed from the source file
+        in chunks and written straight out to the HDF5 file, without needing to `load` them first.
+
         :param frequency_resolution: The number of frequency bins to rescale to (optional, positive).
         :param time_minimum: The minimum time bin width, in seconds (optional, positive).
+        :param frequency_method: How to rebin frequency, one of FREQUENCY_METHODS (optional, default 'interpolate').
+        :param time_method: How to reduce the samples in each time bin, one of TIME_METHODS (optional, default 'mean').
+        :param chunk_size: The number of time samples to read from the source file at once (optional, positive).
+        :param workers: The number of processes to stream the chunks over (optional, positive).
+            Implies a chunk size of CHUNK_SIZE_DEFAULT if none is given.
+        :param pyramid: Whether to also write a pyramid of time-decimated levels for display to the file.
+        :return: The path to the preprocessed file, if one was written
         """
         if not frequency_resolution:
             frequency_resolution = self._config['preprocess'].get('frequency_resolution', None)
@@ -117,136 +325,647 @@ class DataSet(ABC):
             if frequency_resolution < 0:
                 raise ValueError(f"Requested a negative frequency resolution: {frequency_resolution}")
 
+        if not frequency_method:
+            frequency_method = self._config['preprocess'].get('frequency_method', 'interpolate')
+        if frequency_method not in FREQUENCY_METHODS:
+            raise ValueError(
+                f"Requested an unknown frequency rebinning method: {frequency_method}. "
+                f"Methods are: {', '.join(FREQUENCY_METHODS)}"
+            )
+
         if not time_minimum:
             time_minimum = self._config['preprocess'].get('time_minimum', None)
         if time_minimum:
             if time_minimum < 0:
                 raise ValueError(f"Requested a negative minimum time bin: {time_minimum}")
-            elif TimeDelta(time_minimum, format='sec') < (self._time[1] - self._time[0]):
+            elif TimeDelta(time_minimum, format='sec') < (self._get_time(1) - self._get_time(0)):
                 log.warning("preprocess: The target time bin is smaller than the time bins in the data; skipping.")
                 time_minimum = None
 
+        if not time_method:
+            time_method = self._config['preprocess'].get('time_method', 'mean')
+        if time_method not in TIME_METHODS:
+            raise ValueError(
+                f"Requested an unknown time downsampling method: {time_method}. "
+                f"Methods are: {', '.join(TIME_METHODS)}"
+            )
+
+        # Recorded in the preprocessed file, so it can be updated the same way when new source data arrives
+        self._preprocess_settings = dict(
+            frequency_resolution=frequency_resolution, time_minimum=time_minimum,
+            frequency_method=frequency_method, time_method=time_method
+        )
+
+        if workers and not chunk_size:
+            chunk_size = CHUNK_SIZE_DEFAULT
+
+        if chunk_size:
+            if chunk_size < 0:
+                raise ValueError(f"Requested a negative chunk size: {chunk_size}")
+            return self._preprocess_chunked(
+                frequency_resolution=frequency_resolution, time_minimum=time_minimum,
+                frequency_method=frequency_method, time_method=time_method, chunk_size=chunk_size,
+                workers=workers, pyramid=pyramid
+            )
+
         if time_minimum:
             # If we're rescaling the time resolution, do that.
             log.info(
                 f"preprocessing: Downsampling time bin width of {len(self._data.keys())} "
-                f"measurements to {time_minimum} seconds... this might take a while!"
+                f"measurements to {time_minimum} seconds by {time_method}..."
+            )
+            time_original: ndarray = self._time_index
+            time_rescaled, time_edges = time_bins(
+                time_original[0], time_original[-1], time_minimum / SECONDS_PER_DAY
             )
-
-            time_original: Time = self._time
-            
-            
-            
-            time_rescaled: Time = TimeSeries(
-                time_start=time_original[0],
-                time_delta=time_minimum * units.s,
-                n_samples=math.ceil((time_original[-1] - time_original[0]).to(units.s).value/time_minimum)
-            ).time
-            self._time = time_rescaled
 
             for name, measurement_original in self._data.items():
-                log.info(
-                    f"preprocessing: Downsampling time of {len(self._data.keys())} "
-                    f"by a factor of 1/{(time_minimum)/(time_original[1]-time_original[0]).to(units.s)}"
+                self._data[name] = downsample_time(
+                    time_original, measurement_original, time_edges, method=time_method,
+                    positive_only=SHOULD_MEASUREMENT_BE_LOG.get(name, True)
                 )
-                measurement_new = numpy.zeros(
-                    (
-                        len(time_rescaled),
-                        len(self._freq)
-                    )
-                )
-
-                for i in trange(len(self._freq)):
-                    measurement_new[:, i] = numpy.interp(
-                        time_rescaled.value, time_original.value[measurement_original[:,i] > 0], measurement_original[measurement_original[:,i] > 0, i]
-                        )
 
-                self._data[name] = measurement_new
-                
             for name, measurement_original in self._data_1d.items():
-                log.info(
-                    f"preprocessing: Downsampling time of {len(self._data.keys())} "
-                    f"by a factor of 1/{(time_minimum)/(time_original[1]-time_original[0]).to(units.s)}"
+                self._data_1d[name] = downsample_time(
+                    self._time_1d, measurement_original, time_edges, method=time_method,
+                    positive_only=SHOULD_MEASUREMENT_BE_LOG.get(name, True)
                 )
-                measurement_new = numpy.zeros(
-                    (
-                        len(time_rescaled)
-                    )
-                )
-
-                for i in range(0, len(self._freq)):
-                    measurement_new = numpy.interp(
-                        time_rescaled.value, self._time_1d[measurement_original > 0], measurement_original[measurement_original > 0]
-                        )
-                        
-                self._data_1d[name] = measurement_new
 
+            self._set_time(Time(time_rescaled, format='jd', scale=self._time_scale), time_rescaled)
             self._time_1d = None
-    
-
 
         if frequency_resolution:
             freq_original: ndarray = self._freq
-            freq_rescaled: ndarray = 10 ** (
-                numpy.arange(
-                    start=numpy.log10(freq_original[0]),
-                    stop=numpy.log10(freq_original[-1]),
-                    step=(
-                        numpy.log10(max(freq_original)) - numpy.log10(min(freq_original))
-                    ) / (frequency_resolution - 1),
-                    dtype=float
-                )
-            )
-
-            # ====== THIS ISN'T DEPRECATED CODE! THIS IS THE EXAMPLE I WAS WORKING FROM ======
-            # f_new = 10 ** (np.arange(np.log10(frequency[0]), np.log10(frequency[-1]),
-            #                          (np.log10(max(frequency)) - np.log10(min(frequency))) / 399, dtype=float))
-            # data_new = np.zeros((f_new.size, len(time)), dtype=float)
-            # for i in range(len(time)):
-            #     data_new[:, i] = np.interp(f_new, frequency, data[:, i])
-            # ================================================================================
+            freq_rescaled: ndarray = self._rescale_frequency(frequency_resolution)
 
             log.info(
                 f"preprocessing: Rebinning frequency of {len(self._data.keys())} "
-                f"measurements to {frequency_resolution} bins..."
+                f"measurements to {frequency_resolution} bins by {frequency_method}..."
             )
+            weights: ndarray = frequency_weights(freq_original, freq_rescaled, method=frequency_method)
             for name, measurement_original in self._data.items():
-                # Turn into an array to move into memory, otherwise we do a disk read for each access...
-                measurement_new = numpy.zeros(
-                    (
-                        len(self._time),
-                        len(freq_rescaled)
-                    ), dtype=float
-                )
-
-                for i in trange(len(self._time)):
-                    measurement_new[i, :] = numpy.interp(
-                        x=freq_rescaled,
-                        xp=freq_original,
-                        fp=measurement_original[i, :]
-                    )
-                    self._data[name] = measurement_new
+                self._data[name] = rebin_frequency(measurement_original, weights)
 
             self._freq = freq_rescaled
 
         if time_minimum or frequency_resolution:
-            self.save_to_hdf()
+            return self.save_to_hdf(pyramid=pyramid)
 
-    def save_to_hdf(self):
+    def _rescale_frequency(self, frequency_resolution: int) -> ndarray:
         """
-        Saves the data to disk as a pre-processed HDF5 file.
+        Works out the log-spaced frequency bins to rescale the frequency axis to.
+
+        :param frequency_resolution: The number of frequency bins to rescale to
+        :return: The centres of the new frequency bins
+        """
+        # ====== THIS ISN'T DEPRECATED CODE! THIS IS THE EXAMPLE I WAS WORKING FROM ======
+        # f_new = 10 ** (np.arange(np.log10(frequency[0]), np.log10(frequency[-1]),
+        #                          (np.log10(max(frequency)) - np.log10(min(frequency))) / 399, dtype=float))
+        # data_new = np.zeros((f_new.size, len(time)), dtype=float)
+        # for i in range(len(time)):
+        #     data_new[:, i] = np.interp(f_new, frequency, data[:, i])
+        # ================================================================================
+        return 10 ** (
+            numpy.arange(
+                start=numpy.log10(self._freq[0]),
+                stop=numpy.log10(self._freq[-1]),
+                step=(
+                    numpy.log10(max(self._freq)) - numpy.log10(min(self._freq))
+                ) / (frequency_resolution - 1),
+                dtype=float
+            )
+        )
+
+    def _get_source_measurements(self) -> Dict[str, str]:
+        """
+        Implemented in the specific subtypes, this lists the measurements that can be read from the source file,
+        without loading them.
+
+        :raises NotImplementedError: if not implemented for this DataSet
+        :return: Dictionary of the measurement names, and their units
+        """
+        raise NotImplementedError("This dataset cannot stream its measurements from file")
+
+    def _read_source_rows(self, measurement: str, start: int, stop: int) -> ndarray:
+        """
+        Implemented in the specific subtypes, this reads a block of time rows of a measurement from the source file.
+
+        :param measurement: The name of the measurement
+        :param start: The first time row to read
+        :param stop: The time row to read up to (exclusive)
+        :raises NotImplementedError: if not implemented for this DataSet
+        :return: The measurement for those rows, time-major
+        """
+        raise NotImplementedError("This dataset cannot stream its measurements from file")
+
+    def _load_series(self):
+        """
+        Implemented in the specific subtypes that have 1D time series, this loads them into memory.
+        The time series are small compared to the measurements, so are not streamed.
+        """
+        pass
+
+    def _get_sources(self) -> Optional[Dict[str, Tuple[float, float]]]:
+        """
+        Implemented in the specific subtypes that are built from several source files, this lists them
+        for the pre-processed file to record.
+
+        :return: Dictionary of the name of each source file, and the first and last times in it as Julian dates,
+            or None if the dataset has a single source file
+        """
+        return None
+
+    def _preprocess_chunked(
+            self,
+            frequency_resolution: Optional[int],
+            time_minimum: Optional[float],
+            frequency_method: str,
+            time_method: str,
+            chunk_size: int,
+            workers: Optional[int] = None,
+            pyramid: bool = True
+    ) -> Optional[Path]:
+        """
+        Rescales the frequency and/or time of the measurements a chunk of time rows at a time,
+        reading them from the source file and appending them to the HDF5 file as they are processed.
+        Peak memory use is set by the chunk size, not the file size.
+
+        :param frequency_resolution: The number of frequency bins to rescale to, if any
+        :param time_minimum: The minimum time bin width, in seconds, if any
+        :param frequency_method: How to rebin frequency
+        :param time_method: How to reduce the samples in each time bin
+        :param chunk_size: The number of time samples to read from the source file at once
+        :param workers: The number of processes to share the chunks between, if more than one
+        :param pyramid: Whether to also write a pyramid of time-decimated levels for display
+        :return: The path to the preprocessed file, if one was written
+        """
+        if not (time_minimum or frequency_resolution):
+            return None
+
+        measurements: Dict[str, str] = self._get_source_measurements()
+        log.info(
+            f"preprocessing: Streaming {len(measurements)} measurements in chunks of {chunk_size} time samples..."
+        )
+
+        time_original: ndarray = self._time_index
+        weights: Optional[ndarray] = None
+        if frequency_resolution:
+            freq_rescaled: ndarray = self._rescale_frequency(frequency_resolution)
+            weights = frequency_weights(self._freq, freq_rescaled, method=frequency_method)
+        else:
+            freq_rescaled: ndarray = self._freq
+
+        if time_minimum:
+            time_rescaled, time_edges = time_bins(
+                time_original[0], time_original[-1], time_minimum / SECONDS_PER_DAY
+            )
+            # Each chunk must hold whole time bins, so we break the bins up where the chunks of samples would start
+            row_bounds: ndarray = numpy.searchsorted(time_original, time_edges, side='left')
+            chunks: List[Tuple[int, int, Optional[ndarray]]] = [
+                (row_bounds[bin_start], row_bounds[bin_stop], time_edges[bin_start:bin_stop + 1])
+                for bin_start, bin_stop in _split_bins(row_bounds, chunk_size)
+            ]
+        else:
+            time_rescaled: ndarray = time_original
+            chunks: List[Tuple[int, int, Optional[ndarray]]] = [
+                (row_start, min(row_start + chunk_size, len(time_original)), None)
+                for row_start in range(0, len(time_original), chunk_size)
+            ]
+
+        self._freq = freq_rescaled
+        self._set_time(Time(time_rescaled, format='jd', scale=self._time_scale), time_rescaled)
+        output_file: File = self._create_hdf()
+        for name, units in measurements.items():
+            output_file.create_dataset(
+                name, shape=(0, len(freq_rescaled)), maxshape=(None, len(freq_rescaled)), dtype=float,
+                chunks=True, compression='lzf'
+            )
+            output_file[name].attrs['units'] = units
+
+        tasks: List[Tuple[str, int, int, ndarray, Optional[ndarray]]] = [
+            (name, row_start, row_stop, time_original[row_start:row_stop], edges)
+            for row_start, row_stop, edges in chunks for name in measurements.keys()
+        ]
+        if workers and workers > 1:
+            results = self._preprocess_parallel(tasks, weights, time_method, workers)
+        else:
+            results = (
+                rebin_block(
+                    self._read_source_rows(name, row_start, row_stop),
+                    time=time, edges=edges, weights=weights, time_method=time_method,
+                    positive_only=SHOULD_MEASUREMENT_BE_LOG.get(name, True)
+                ) for name, row_start, row_stop, time, edges in tasks
+            )
+
+        for (name, *_), measurement in zip(tqdm(tasks), results):
+            output_file[name].resize(output_file[name].shape[0] + measurement.shape[0], axis=0)
+            output_file[name][-measurement.shape[0]:] = measurement
+
+        # The 1D series are small enough to do in one go
+        self._load_series()
+        for name, series in self._data_1d.items():
+            if time_minimum:
+                series = downsample_time(
+                    self._time_1d, series, time_edges, method=time_method,
+                    positive_only=SHOULD_MEASUREMENT_BE_LOG.get(name, True)
+                )
+            output_file.create_dataset(name, data=series)
+            output_file[name].attrs['units'] = self._units_1d[name]
+
+        self._write_statistics(output_file)
+        if pyramid:
+            self._write_pyramid(output_file)
+        output_file.close()
+        log.info(f"preprocessing: Written '{self._file_path.with_suffix('.preprocessed.hdf5')}'")
+        return self._file_path.with_suffix('.preprocessed.hdf5')
+
+    def _preprocess_parallel(
+            self,
+            tasks: List[Tuple[str, int, int, ndarray, Optional[ndarray]]],
+            weights: Optional[ndarray],
+            time_method: str,
+            workers: int
+    ) -> Iterator[ndarray]:
+        """
+        Preprocesses chunks of the measurements over a pool of worker processes.
+        Each worker reads its chunk directly from the source file, and hands the result back in shared memory.
+
+        :param tasks: The measurement name, row range, times and time bin edges for each chunk
+        :param weights: The frequency weight matrix, if rebinning frequency
+        :param time_method: How to reduce the samples in each time bin
+        :param workers: The number of worker processes
+        :return: The processed chunks, in the same order as the tasks
+        """
+        log.info(f"preprocessing: Distributing {len(tasks)} chunks over {workers} processes...")
+        pending: Deque[Future] = deque()
+
+        with ProcessPoolExecutor(
+                max_workers=workers, mp_context=get_context('spawn'),
+                initializer=_initialise_worker,
+                initargs=(
+                    type(self), {name: getattr(self, name) for name in self._reader_attributes}, weights, time_method
+                )
+        ) as executor:
+            for task in tasks:
+                pending.append(executor.submit(_preprocess_worker, *task))
+                # Only keep a few chunks in flight, so the results waiting to be written don't fill memory
+                if len(pending) >= 2 * workers:
+                    yield _collect_shared(pending.popleft().result())
+
+            while pending:
+                yield _collect_shared(pending.popleft().result())
+
+    def _update_preprocessed(
+            self,
+            preprocessed_path: Path,
+            spans: List[Tuple[float, float]],
+            chunk_size: int = CHUNK_SIZE_DEFAULT,
+            workers: Optional[int] = None
+    ) -> Path:
+        """
+        Brings a pre-processed file up to date after some spans of time in the source data have changed,
+        using the settings recorded in the file.
+
+        Rows of the file clear of the changed spans are copied across as they are. Only the rows overlapping them
+        are read from the source and processed, a chunk at a time, and the new file then replaces the old one.
+        The time series, histograms and pyramid are remade over the whole file, as they're quick compared to
+        the measurements.
+
+        :param preprocessed_path: The path to the preprocessed file
+        :param spans: The first and last time of each span of the source data that has changed, as Julian dates
+        :param chunk_size: The number of time samples to read from the source file at once
+        :param workers: The number of processes to share the chunks between, if more than one
+        :return: The path to the preprocessed file
+        """
+        previous: File = File(preprocessed_path, 'r')
+        settings: Dict = json.loads(previous.attrs['preprocess'])
+        pyramid: bool = 'Pyramid' in previous
+        measurements: Dict[str, str] = self._get_source_measurements()
+
+        weights: Optional[ndarray] = None
+        if settings['frequency_resolution']:
+            freq_rescaled: ndarray = self._rescale_frequency(settings['frequency_resolution'])
+            weights = frequency_weights(self._freq, freq_rescaled, method=settings['frequency_method'])
+        else:
+            freq_rescaled: ndarray = self._freq
+
+        self._preprocess_settings = settings
+        if set(measurements) - set(previous.keys()) or not numpy.array_equal(freq_rescaled, previous['Frequency']):
+            log.warning(
+                f"preprocessing: '{preprocessed_path}' doesn't match the source data any more, so remaking it..."
+            )
+            previous.close()
+            return self._preprocess_chunked(**settings, chunk_size=chunk_size, workers=workers, pyramid=pyramid)
+
+        time_original: ndarray = self._time_index
+        time_previous: ndarray = numpy.array(previous['Time'], dtype=float)
+        if settings['time_minimum']:
+            # Stay on the grid of time bins the file already uses, extending it if the data now starts or ends later
+            width: float = settings['time_minimum'] / SECONDS_PER_DAY
+            bin_first, bin_last = numpy.floor((time_original[[0, -1]] - time_previous[0]) / width + 0.5).astype(int)
+            time_rescaled: ndarray = time_previous[0] + numpy.arange(bin_first, bin_last + 1) * width
+            time_edges: Optional[ndarray] = time_previous[0] + (numpy.arange(bin_first, bin_last + 2) - 0.5) * width
+            row_bounds: ndarray = numpy.searchsorted(time_original, time_edges, side='left')
+            bins_lower, bins_upper = time_edges[:-1], time_edges[1:]
+            tolerance: float = width / 4.
+        else:
+            time_rescaled: ndarray = time_original
+            time_edges: Optional[ndarray] = None
+            row_bounds: ndarray = numpy.arange(len(time_original) + 1)
+            bins_lower, bins_upper = time_original, time_original
+            tolerance: float = 0.
+
+        # Each row can be copied from the row at the same time in the old file, unless it has none or has changed
+        rows_previous: ndarray = numpy.searchsorted(time_previous, time_rescaled - tolerance, side='left')
+        matched: ndarray = rows_previous < len(time_previous)
+        matched[matched] &= time_previous[rows_previous[matched]] <= time_rescaled[matched] + tolerance
+        changed: ndarray = ~matched
+        for span_start, span_end in spans:
+            changed |= (bins_upper >= span_start) & (bins_lower <= span_end)
+
+        # Break the rows into runs to process, and runs to copy from a contiguous block of the old file
+        breaks: ndarray = numpy.flatnonzero(
+            (changed[1:] != changed[:-1]) | (~changed[1:] & (numpy.diff(rows_previous) != 1))
+        ) + 1
+        runs: List[Tuple[int, int]] = list(
+            zip([0] + breaks.tolist(), breaks.tolist() + [len(time_rescaled)])
+        )
+        log.info(
+            f"preprocessing: Updating '{preprocessed_path}', processing {changed.sum()} "
+            f"of {len(time_rescaled)} time rows and copying the rest..."
+        )
+
+        path_update: Path = preprocessed_path.with_suffix('.hdf5.tmp')
+        self._freq = freq_rescaled
+        self._set_time(Time(time_rescaled, format='jd', scale=self._time_scale), time_rescaled)
+        output_file: File = self._create_hdf(path_update)
+        for name, units in measurements.items():
+            # Rows left unwritten, in gaps in the data, read as NaN
+            output_file.create_dataset(
+                name, shape=(len(time_rescaled), len(freq_rescaled)), dtype=float, chunks=True,
+                compression='lzf', fillvalue=numpy.nan
+            )
+            output_file[name].attrs['units'] = units
+
+        tasks: List[Tuple[str, int, int, ndarray, Optional[ndarray]]] = []
+        offsets: List[int] = []  # The row of the file each task's result is written to
+        for run_start, run_stop in runs:
+            if changed[run_start]:
+                for bin_start, bin_stop in _split_bins(row_bounds[run_start:run_stop + 1], chunk_size):
+                    bin_start, bin_stop = run_start + bin_start, run_start + bin_stop
+                    for name in measurements.keys():
+                        tasks.append(
+                            (
+                                name, row_bounds[bin_start], row_bounds[bin_stop],
+                                time_original[row_bounds[bin_start]:row_bounds[bin_stop]],
+                                time_edges[bin_start:bin_stop + 1] if time_edges is not None else None
+                            )
+                        )
+                        offsets.append(bin_start)
+            else:
+                row_previous: int = rows_previous[run_start]
+                for name in measurements.keys():
+                    for row_start in range(run_start, run_stop, chunk_size):
+                        row_stop: int = min(row_start + chunk_size, run_stop)
+                        output_file[name][row_start:row_stop] = previous[name][
+                            row_previous + row_start - run_start:row_previous + row_stop - run_start
+                        ]
+        previous.close()
+
+        if workers and workers > 1:
+            results = self._preprocess_parallel(tasks, weights, settings['time_method'], workers)
+        else:
+            results = (
+                rebin_block(
+                    self._read_source_rows(name, row_start, row_stop),
+                    time=time, edges=edges, weights=weights, time_method=settings['time_method'],
+                    positive_only=SHOULD_MEASUREMENT_BE_LOG.get(name, True)
+                ) for name, row_start, row_stop, time, edges in tasks
+            )
+
+        for (name, *_), offset, measurement in zip(tqdm(tasks), offsets, results):
+            output_file[name][offset:offset + measurement.shape[0]] = measurement
+
+        self._load_series()
+        for name, series in self._data_1d.items():
+            if time_edges is not None:
+                series = downsample_time(
+                    self._time_1d, series, time_edges, method=settings['time_method'],
+                    positive_only=SHOULD_MEASUREMENT_BE_LOG.get(name, True)
+                )
+            output_file.create_dataset(name, data=series)
+            output_file[name].attrs['units'] = self._units_1d[name]
+
+        self._write_statistics(output_file)
+        if pyramid:
+            self._write_pyramid(output_file)
+        output_file.close()
+
+        os.replace(path_update, preprocessed_path)
+        log.info(f"preprocessing: Updated '{preprocessed_path}'")
+        return preprocessed_path
+
+    def _create_hdf(self, path: Optional[Path] = None) -> File:
+        """
+        Creates the pre-processed HDF5 file, with the time and frequency axes.
+
+        The settings it was preprocessed with, and the source files it was built from if there are several,
+        are recorded as JSON attributes, so the file can later be updated rather than remade.
+
+        :param path: The path to write the file to, if not the usual one
+        :return: The open file, for the measurements to be written to
         """
         output_file = File(
-            self._file_path.with_suffix('.preprocessed.hdf5'), 'w'
+            path if path else self._file_path.with_suffix('.preprocessed.hdf5'), 'w'
         )
         output_file.attrs.create('observer', self._observer)
-
-        # Has to be done differently as this is an Astropy quantity
-        output_file.create_dataset('Time', data=numpy.array(self._time.jd1+self._time.jd2))
+        if self._preprocess_settings:
+            output_file.attrs['preprocess'] = json.dumps(self._preprocess_settings)
+        sources: Optional[Dict[str, Tuple[float, float]]] = self._get_sources()
+        if sources:
+            output_file.attrs['sources'] = json.dumps(sources)
+
+        # Has to be done differently as this is an Astropy quantity, so we save the index of Julian dates
+        output_file.create_dataset('Time', data=self._time_index)
         output_file['Time'].attrs.create('units', self._units['Time'])
 
         output_file.create_dataset('Frequency', data=self._freq)
         output_file['Frequency'].attrs.create('units',  self._units['Frequency'])
+        return output_file
+
+    def _write_statistics(self, output_file: File):
+        """
+        Writes histograms of each measurement to the pre-processed HDF5 file, so the colour scale of any time window
+        can be set without sorting all the values in it.
+
+        Each measurement's histograms are stored as `Statistics/<name>`, with a row of counts for each block
+        of STATISTICS_BLOCK_SIZE time samples. The bin edges and the counts for the whole dataset are attributes.
+        The block histograms are a dataset rather than an attribute, as they can outgrow HDF5's attribute size limit.
+
+        :param output_file: The open pre-processed file, with the measurements written
+        """
+        names: List[str] = [
+            name for name in output_file.keys()
+            if name not in ('Time', 'Frequency') and output_file[name].ndim > 1
+        ]
+        log.info(f"preprocessing: Writing histograms for {len(names)} measurements...")
+
+        group = output_file.create_group('Statistics')
+        chunk_size: int = STATISTICS_BLOCK_SIZE * -(-CHUNK_SIZE_DEFAULT // STATISTICS_BLOCK_SIZE)
+        for name in tqdm(names):
+            # The bins have to cover the whole range of the measurement, so find that first
+            value_min, value_max = numpy.inf, 0.
+            for row_start in range(0, output_file[name].shape[0], chunk_size):
+                values: ndarray = output_file[name][row_start:row_start + chunk_size]
+                values = values[numpy.isfinite(values) & (values > 0.)]
+                if values.size:
+                    value_min, value_max = min(value_min, values.min()), max(value_max, values.max())
+
+            if not value_max:
+                log.warning(f"preprocessing: {name} has no positive values, so has no histogram")
+                continue
+
+            edges: ndarray = histogram_edges(value_min, value_max)
+            blocks: ndarray = numpy.concatenate(
+                [
+                    block_histograms(output_file[name][row_start:row_start + chunk_size], edges)
+                    for row_start in range(0, output_file[name].shape[0], chunk_size)
+                ]
+            )
+            group.create_dataset(name, data=blocks.astype(numpy.int32), compression='lzf')
+            group[name].attrs['edges'] = edges
+            group[name].attrs['block_size'] = STATISTICS_BLOCK_SIZE
+            group[name].attrs['total'] = blocks.sum(axis=0)
+
+    def _get_statistics(self, measurement: str) -> Optional[HistogramStatistics]:
+        """
+        Gets the histograms of a measurement. If they weren't loaded from file, they're worked out from the data
+        the first time they're needed.
+
+        :param measurement: The name of the measurement
+        :return: The histograms, or None if the measurement has no positive values
+        """
+        # Held while they're worked out, so a window fetched in the background and one drawn don't both do it
+        with self._lock:
+            if measurement not in self._statistics:
+                values: ndarray = numpy.asarray(self._data[measurement])
+                positive: ndarray = values[numpy.isfinite(values) & (values > 0.)]
+                if not positive.size:
+                    return None
+
+                edges: ndarray = histogram_edges(positive.min(), positive.max())
+                blocks: ndarray = block_histograms(values, edges)
+                self._statistics[measurement] = HistogramStatistics(
+                    edges=edges, block_size=STATISTICS_BLOCK_SIZE, blocks=blocks, total=blocks.sum(axis=0)
+                )
+
+            return self._statistics[measurement]
+
+    def get_dynamic_range(
+            self, time_start: Time, time_end: Time, frac_dyn_range: Tuple[float, float],
+            measurements: Union[None, str, List[str]] = None,
+            normalisation: str = 'window'
+    ) -> Dict[str, Tuple[float, float]]:
+        """
+        Estimates the range of values covering a fraction of the dynamic range of each measurement,
+        for setting the colour scale. The quantiles are interpolated from histograms of the values
+        in log space, so are accurate to within a bin width.
+
+        For the window, the histograms of the blocks of time overlapping it are summed,
+        so the range may include up to a block of samples either side of it.
+
+        :param time_start: The start of the time range (inclusive)
+        :param time_end: The end of the time range (inclusive)
+        :param frac_dyn_range: The lower and upper quantiles of the values to cover, between 0 and 1
+        :param measurements: The measurements to find the range of, all if None
+        :param normalisation: Whether to find the range in the time window, or in the whole dataset,
+            one of NORMALISATIONS
+        :return: Dictionary of the lower and upper limits of the measurements that have positive values
+        """
+        if normalisation not in NORMALISATIONS:
+            raise ValueError(
+                f"Requested an unknown normalisation: {normalisation}. "
+                f"Normalisations are: {', '.join(NORMALISATIONS)}"
+            )
+
+        if measurements and not isinstance(measurements, list):
+            measurements: List = [measurements]
+
+        window: slice = self._get_time_window(time_start, time_end)
+        dynamic_range: Dict[str, Tuple[float, float]] = {}
+        for measurement in measurements if measurements else self._data.keys():
+            statistics: Optional[HistogramStatistics] = self._get_statistics(measurement)
+            if not statistics:
+                continue
+
+            if normalisation == 'window':
+                counts: ndarray = statistics.blocks[
+                    window.start // statistics.block_size:-(-window.stop // statistics.block_size)
+                ].sum(axis=0)
+            else:
+                counts: ndarray = statistics.total
+
+            limits: ndarray = histogram_quantiles(counts, statistics.edges, [frac_dyn_range[0], frac_dyn_range[-1]])
+            if numpy.isfinite(limits).all():
+                dynamic_range[measurement] = tuple(limits)
+
+        return dynamic_range
+
+    def _write_pyramid(self, output_file: File):
+        """
+        Writes a pyramid of progressively time-decimated levels of the measurements and time series
+        to the pre-processed HDF5 file, for drawing wide time windows quickly.
+
+        Each level is stored as `Pyramid/<factor>`, with the mean time of each sample in `Time`,
+        and the `mean` and `max` of each measurement over the samples combined.
+        The levels are built from the full-resolution data already in the file, a chunk at a time.
+
+        :param output_file: The open pre-processed file, with the measurements written
+        """
+        factors: List[int] = pyramid_factors(len(self._time_index))
+        if not factors:
+            return
+
+        names: List[str] = [
+            name for name in output_file.keys() if name not in ('Time', 'Frequency', 'Statistics')
+        ]
+        log.info(f"preprocessing: Writing a pyramid of {len(factors)} levels for {len(names)} measurements...")
+
+        group = output_file.create_group('Pyramid')
+        for factor, (time, _) in zip(factors, decimate(self._time_index, factors)):
+            level = group.create_group(str(factor))
+            level.create_dataset('Time', data=time)
+            for reduction in PYRAMID_REDUCTIONS:
+                for name in names:
+                    dataset = level.create_dataset(
+                        f'{reduction}/{name}', shape=(len(time),) + output_file[name].shape[1:], dtype=float,
+                        chunks=True if output_file[name].ndim > 1 else None,
+                        compression='lzf' if output_file[name].ndim > 1 else None
+                    )
+                    dataset.attrs['units'] = output_file[name].attrs['units']
+
+        # Chunks must hold a whole number of samples of the coarsest level, so no sample is split between them
+        chunk_size: int = factors[-1] * -(-CHUNK_SIZE_DEFAULT // factors[-1])
+        for name in tqdm(names):
+            for row_start in range(0, len(self._time_index), chunk_size):
+                levels = decimate(
+                    output_file[name][row_start:row_start + chunk_size], factors,
+                    positive_only=SHOULD_MEASUREMENT_BE_LOG.get(name, True)
+                )
+                for factor, reduced in zip(factors, levels):
+                    for reduction, values in zip(PYRAMID_REDUCTIONS, reduced):
+                        group[f'{factor}/{reduction}/{name}'][
+                            row_start // factor:row_start // factor + len(values)
+                        ] = values
+
+    def save_to_hdf(self, pyramid: bool = True) -> Path:
+        """
+        Saves the data to disk as a pre-processed HDF5 file.
+
+        :param pyramid: Whether to also write a pyramid of time-decimated levels for display
+        :return: The path to the file
+        """
+        output_file: File = self._create_hdf()
 
         for key, value in self._data.items():
             output_file.create_dataset(key, data=value, compression='lzf')
@@ -257,9 +976,12 @@ class DataSet(ABC):
             output_file.create_dataset(key, data=value)
             output_file[key].attrs['units'] = self._units_1d[key]
 
-
+        self._write_statistics(output_file)
+        if pyramid:
+            self._write_pyramid(output_file)
 
         output_file.close()
+        return self._file_path.with_suffix('.preprocessed.hdf5')
 
     def register_presenter(self, presenter: 'Presenter'):
         """
@@ -279,24 +1001,132 @@ class DataSet(ABC):
         :param dates:
         :raise ValueError: If the dates are out of the time range in the file
         """
-        if dates[0] < self._time[0] or dates[1] > self._time[-1]:
+        time_start, time_end = self._get_time(0), self._get_time(-1)
+        if dates[0] < time_start or dates[1] > time_end:
             raise ValueError(
                 f"Date range {dates[0]} to {dates[-1]} is outside of the data file range "
-                f"{self._time[0].to_datetime()} to {self._time[1].to_datetime()}.\n"
+                f"{time_start.to_datetime()} to {time_end.to_datetime()}.\n"
                 f"Please check your date range is YYYY-MM-DD format."
             )
 
+    def _set_time(self, time: Optional[Time], time_index: Optional[ndarray] = None, scale: str = 'utc'):
+        """
+        Sets the time axis, and the index used to look up time windows on it.
+
+        :param time: The time axis, sorted. If not given, the parts of it needed are made from the time index
+        :param time_index: The time axis as Julian dates in the same time scale, if already available
+        :param scale: The time scale of the time index, if the time axis isn't given
+        """
+        self._time = time
+        self._time_scale = time.scale if time is not None else scale
+        self._time_index = numpy.ascontiguousarray(
+            time_index if time_index is not None else time.jd, dtype=float
+        )
+
+    def _get_time(self, rows: Union[int, slice]) -> Time:
+        """
+        Gets part of the time axis, making just that part from the time index if the whole axis wasn't made.
+
+        :param rows: The row, or slice of rows, of the time axis to get
+        :return: The times of the rows
+        """
+        if self._time is not None:
+            return self._time[rows]
+        return Time(self._time_index[rows], format='jd', scale=self._time_scale)
+
+    def _get_time_window(self, time_start: Time, time_end: Time) -> slice:
+        """
+        Finds the time rows within the time range. As time is sorted, they are a single contiguous block,
+        found by binary search on the time index. Slicing by it gives views rather than copies,
+        and means lazily-loaded data only has to read those rows.
+
+        :param time_start: The start of the time range (inclusive)
+        :param time_end: The end of the time range (inclusive)
+        :return: The slice of time rows in the range
+        """
+        return slice(
+            numpy.searchsorted(self._time_index, getattr(time_start, self._time_scale).jd, side='left'),
+            numpy.searchsorted(self._time_index, getattr(time_end, self._time_scale).jd, side='right')
+        )
+
+    def _get_pyramid_window(
+            self, time_start: Time, time_end: Time, resolution: Optional[int] = None
+    ) -> Tuple[Optional[PyramidLevel], slice]:
+        """
+        Picks the coarsest level of the display pyramid that still has at least one sample per pixel
+        in the time range, and finds the rows of that level within it.
+
+        :param time_start: The start of the time range (inclusive)
+        :param time_end: The end of the time range (inclusive)
+        :param resolution: The number of pixels the time range will be drawn across, if known
+        :return: The level, or None if the full-resolution data should be used, and the slice of rows in the range
+        """
+        if resolution:
+            jd_start: float = getattr(time_start, self._time_scale).jd
+            jd_end: float = getattr(time_end, self._time_scale).jd
+            for level in reversed(self._pyramid):
+                window: slice = slice(
+                    numpy.searchsorted(level.time_index, jd_start, side='left'),
+                    numpy.searchsorted(level.time_index, jd_end, side='right')
+                )
+                if window.stop - window.start >= resolution:
+                    log.debug(f"_get_pyramid_window: Using the level decimated by {level.factor}")
+                    return level, window
+
+        return None, self._get_time_window(time_start, time_end)
+
+    def _pool_to_resolution(
+            self, level: Optional[PyramidLevel], window: slice, data: Dict[str, ndarray],
+            resolution: int, reductions: Dict[str, str]
+    ) -> Tuple[ndarray, Dict[str, ndarray]]:
+        """
+        Resamples the data in a time window onto one time bin per pixel, if there are more samples than pixels.
+
+        Using the max means short, bright features are kept at the pixel they fall in, rather than averaged away;
+        using the mean keeps the sign of signed measurements.
+        Bins without any data (e.g. in gaps) are NaN, so they're drawn blank.
+
+        :param level: The level of the display pyramid the data is from, or None if it's the full-resolution data
+        :param window: The slice of rows of the level the data is from
+        :param data: The data in the time window
+        :param resolution: The number of pixels the time range will be drawn across
+        :param reductions: How samples are combined in each pixel for each measurement, one of PYRAMID_REDUCTIONS
+        :return: The Julian date of each sample, and the resampled data
+        """
+        time_index: ndarray = (level.time_index if level else self._time_index)[window]
+        if len(time_index) <= resolution:
+            return time_index, data
+
+        # Nudge the last edge up, so the last sample falls inside the last bin
+        edges: ndarray = numpy.linspace(time_index[0], time_index[-1], resolution + 1)
+        edges[-1] = numpy.nextafter(edges[-1], numpy.inf)
+        return (edges[:-1] + edges[1:]) / 2., {
+            key: downsample_time(
+                time_index, values, edges, method=reductions[key],
+                positive_only=SHOULD_MEASUREMENT_BE_LOG.get(key, True)
+            ) for key, values in data.items()
+        }
+
     def get_data_for_time_range(
             self, time_start: Time, time_end: Time,
-            measurements: Union[None, str, List[str]] = None
+            measurements: Union[None, str, List[str]] = None,
+            resolution: Optional[int] = None,
+            reduction: Union[str, Dict[str, str]] = 'mean'
     ) -> Tuple[Time, ndarray, Dict[str, ndarray]]:
         """
         Returns a dictionary containing the data for the specified time range.
         Implemented as returning a dictionary to make it easier to expand to multiple data types.
 
+        If the resolution is given and the file has a display pyramid, the data comes from the coarsest level
+        of it that still has at least one sample per pixel, so wide time ranges take no longer to draw.
+        If there are still more samples than pixels, they're then resampled to one per pixel.
+
         :param time_start: The start of the time range (inclusive)
         :param time_end: The end of the time range (inclusive)
         :param measurements: The types of parameter to get, all if None
+        :param resolution: The number of pixels the time range will be drawn across, if known
+        :param reduction: How samples are combined in the pyramid level used and the pixels,
+            one of PYRAMID_REDUCTIONS, or a dictionary of one for each measurement
         :return: Astropy Time, numpy frequency array, and a dictionary containing the keys 'flux'
             and possibly 'power' and 'polarization'
         """
@@ -306,18 +1136,26 @@ class DataSet(ABC):
             # If the user hasn't specified a list of measurements, convert to a single-entry list for ease of use
             measurements: List = [measurements]
 
-        time_mask: ndarray = (time_start <= self._time) & (self._time <= time_end)
+        level, window = self._get_pyramid_window(time_start, time_end, resolution)
         data: Dict[str, ndarray] = {}
         keys: List[str] = measurements if measurements else self._data.keys()
+        reductions: Dict[str, str] = reduction if isinstance(reduction, dict) else dict.fromkeys(keys, reduction)
 
         for key in keys:
-            data[key] = self._data[key][time_mask, :]
+            source: Dict[str, ndarray] = level.data[reductions[key]] if level else self._data
+            data[key] = source[key][window, :]
 
-        return self._time[time_mask], self._freq, data
+        if level or (resolution and window.stop - window.start > resolution):
+            time_index, data = self._pool_to_resolution(level, window, data, resolution, reductions)
+            return Time(time_index, format='jd', scale=self._time_scale), self._freq, data
+
+        return self._get_time(window), self._freq, data
         
     def get_1d_data_for_time_range(
             self, time_start: Time, time_end: Time,
-            measurements: Union[None, str, List[str]] = None
+            measurements: Union[None, str, List[str]] = None,
+            resolution: Optional[int] = None,
+            reduction: str = 'mean'
     ) -> Tuple[Time, Dict[str, ndarray]]:
         """
         Returns a dictionary containing the time series data for the specified time range.
@@ -326,6 +1164,9 @@ class DataSet(ABC):
         :param time_start: The start of the time range (inclusive)
         :param time_end: The end of the time range (inclusive)
         :param measurements: The types of parameter to get, all if None
+        :param resolution: The number of pixels the time range will be drawn across, if known
+        :param reduction: How samples are combined in the pyramid level used and the pixels,
+            one of PYRAMID_REDUCTIONS
         :return: Astropy Time and a dictionary containing the keys corresponding to whatever 1D time series are used
         """
         log.info(f"get_1d_data_for_time_range: From {time_start} ({time_start.jd}) to {time_end} ({time_end.jd})")
@@ -335,14 +1176,21 @@ class DataSet(ABC):
             measurements: List = [measurements]
  
 
-        time_mask: ndarray = (time_start <= self._time) & (self._time <= time_end)
+        level, window = self._get_pyramid_window(time_start, time_end, resolution)
         data_1d: Dict[str, ndarray] = {}
         keys: List[str] = measurements if measurements else self._data_1d.keys()
 
+        source: Dict[str, ndarray] = level.data_1d[reduction] if level else self._data_1d
         for key in keys:
-            data_1d[key] = self._data_1d[key][time_mask]
+            data_1d[key] = source[key][window]
+
+        if level or (resolution and window.stop - window.start > resolution):
+            time_index, data_1d = self._pool_to_resolution(
+                level, window, data_1d, resolution, dict.fromkeys(data_1d, reduction)
+            )
+            return Time(time_index, format='jd', scale=self._time_scale), data_1d
 
-        return self._time[time_mask], data_1d
+        return self._get_time(window), data_1d
 
 
 
@@ -354,29 +1202,26 @@ class DataSet(ABC):
         :param vertexes: A 2-d matplotlib array of coordinates as [time, freq]
         :return: The feature added
         """
-
-        self._features.append(
-            Feature(
-                name=name,
-                vertexes=vertexes,
-                feature_id=len(self._features),
-                log_level=self._log_level
-            )
-        )
+        time: ndarray = Time([vertex[0] for vertex in vertexes]).unix
+        freq: ndarray = numpy.array([vertex[1] for vertex in vertexes])
+        with self._lock:
+            feature: Feature = self._catalogue.add(name=name, time=time, freq=freq)
+            if self._journal is not None:
+                self._journal.append(len(self._catalogue) - 1, name, time, freq)
         log.debug(f"add_feature: {name} - {vertexes}")
-        return self._features[-1]
+        return feature
 
     def get_features_for_time_range(self, time_start: Time, time_end: Time) -> List[Feature]:
         """
-        Returns the Features that are contained within the specified time range.
+        Returns the Features that overlap the specified time range, including any spanning all of it.
+        These are looked up in the catalogue's index, rather than checking every feature.
 
         :param time_start: The start of the time range (inclusive)
         :param time_end: The end of the time range (inclusive)
         :return: A list of the features (in feature format)
         """
-        return [
-            feature for feature in self._features if feature.is_in_time_range(time_start, time_end)
-        ]
+        with self._lock:
+            return self._catalogue.query(time_start.unix, time_end.unix)
 
     def get_units(self) -> Dict[str, str]:
         return self._units
@@ -390,8 +1235,9 @@ class DataSet(ABC):
         """
         Returns the start and end dates in the time window.
         """
-        time_mask: ndarray = (time_start <= self._time) & (self._time <= time_end)
-        return self._time[time_mask][0], self._time[time_mask][-1]
+        window: slice = self._get_time_window(time_start, time_end)
+        time: Time = self._get_time(window)
+        return time[0], time[-1]
 
 
     def get_frequency_range(self) -> Tuple[float, float]:
@@ -414,23 +1260,25 @@ class DataSet(ABC):
         """
         path_tfcat_txt: Path = self._file_path.parent / f'catalogue_{self._observer}.txt'
         with open(path_tfcat_txt, 'w') as file_text:
-            for feature in self._features:
-                file_text.write(f'{feature.to_text_summary()}\n')
+            for summary in self._catalogue.to_text_summaries():
+                file_text.write(f'{summary}\n')
 
     
     def write_features_to_json(self):
         """
         Writes the details of the bounds of each feature, to a TFCat-format JSON file.
+
+        The file is written alongside and then moved into place, so it's never left half-written.
+        The previous version is kept as a copy. Once the file is in place, the journal is cleared.
         """
         path_tfcat: Path = self._file_path.parent / f'catalogue_{self._observer}.json'
+        path_temporary: Path = path_tfcat.with_suffix('.json.tmp')
 
-        with open(path_tfcat, 'w') as file_json:
+        with open(path_temporary, 'w') as file_json:
             json.dump(
                 {
                     "type": "FeatureCollection",
-                    "features": [
-                        feature.to_tfcat_dict() for feature in self._features
-                    ],
+                    "features": self._catalogue.to_tfcat_features(),
                     "crs": {
                         "type": "local",
                         "properties": {
@@ -446,42 +1294,78 @@ class DataSet(ABC):
                 },
                 file_json
             )
+            file_json.flush()
+            os.fsync(file_json.fileno())
+
+        if path_tfcat.exists():
+            shutil.copyfile(path_tfcat, self._file_path.parent / f'catalogue_{self._observer}_copy.json')
+        os.replace(path_temporary, path_tfcat)
+        # We wrote it in TFCat format ourselves, so there's no need to validate it when it's next loaded
+        _write_digest(path_tfcat, _file_digest(path_tfcat))
+        if self._journal is not None:
+            self._journal.clear()
+
         log.info(
             f"write_features_to_json: Writing '{path_tfcat}'"
         )
 
+    def has_unsaved_features(self) -> bool:
+        """
+        Whether any features have been added since the catalogue was last written to JSON.
+
+        :return: True if there are features only in the journal
+        """
+        return self._journal is not None and len(self._journal) > 0
+
     def load_features_from_json(self):
         """
-        Loads the features for this datafile from a JSON file.
+        Loads the features for this datafile from a JSON file,
+        then replays any features added after it was last written from the journal.
         """
         path_tfcat: Path = self._file_path.parent / f'catalogue_{self._observer}.json'
 
         if not path_tfcat.exists():
             log.info("load_features_from_json: No existing JSON catalogue file")
         else:
-            shutil.copyfile(path_tfcat, self._file_path.parent / f'catalogue_{self._observer}_copy.json')
             log.info(
                 f"load_features_from_json: Loading '{path_tfcat}'"
             )
-            validate_file(path_tfcat)
-
-            with open(path_tfcat, 'r') as file_json:
-                try:
-                    tfcat: Dict = json.load(file_json)
-                except json.decoder.JSONDecodeError as e:
-                    log.error("load_features_from_json: File is not valid JSON (is it blank?)")
-
-            for feature in tfcat["features"]:
-                vertexes = []
-                for vertex in feature['geometry']['coordinates'][0]:
-                    time = Time(vertex[0], format='unix')
-                    time.format = 'jd'  # This step prevents it being list comprehension
-                    vertexes.append((time, vertex[1]))
-
-                log.debug(
-                    f"load_features_from_json: Adding {feature['properties']['feature_type']} - {vertexes}"
-                )
-                self.add_feature(
-                    name=feature['properties']['feature_type'],
-                    vertexes=vertexes
-                )
+            content: bytes = path_tfcat.read_bytes()
+            digest: str = hashlib.sha256(content).hexdigest()
+            if digest == _read_digest(path_tfcat):
+                log.info("load_features_from_json: File unchanged since it was last validated")
+            else:
+                # Imported here as TFCat is slow to import, and only needed when there's a catalogue to check
+                from tfcat.validate import validate_file
+                validate_file(path_tfcat)
+                _write_digest(path_tfcat, digest)
+
+            try:
+                tfcat: Dict = json.loads(content)
+            except json.decoder.JSONDecodeError as e:
+                log.error("load_features_from_json: File is not valid JSON (is it blank?)")
+
+            # All the vertexes of all the features are converted to arrays in one go
+            rings: List[List[List[float]]] = [
+                feature['geometry']['coordinates'][0] for feature in tfcat["features"]
+            ]
+            if rings:
+                coordinates: ndarray = numpy.array(list(chain.from_iterable(rings)), dtype=float)
+                with self._lock:
+                    self._catalogue.extend(
+                        names=[feature['properties']['feature_type'] for feature in tfcat["features"]],
+                        time=coordinates[:, 0], freq=coordinates[:, 1],
+                        offsets=numpy.concatenate(([0], numpy.cumsum([len(ring) for ring in rings])))
+                    )
+            log.debug(f"load_features_from_json: Added {len(rings)} features")
+
+        # The journal is our own output, so doesn't need validating. Features already written to the JSON
+        # before the journal could be cleared are skipped.
+        self._journal = CatalogueJournal(
+            self._file_path.parent / f'catalogue_{self._observer}.jsonl', log_level=self._log_level
+        )
+        for feature_id, name, vertexes in self._journal.replay():
+            if feature_id >= len(self._catalogue):
+                coordinates: ndarray = numpy.array(vertexes, dtype=float)
+                with self._lock:
+                    self._catalogue.add(name=name, time=coordinates[:, 0], freq=coordinates[:, 1])
@@ -1,7 +1,11 @@
+import dataclasses
 import json
 import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from multiprocessing import get_context
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Tuple
 import pandas as pd
 import numpy
 from astropy.time import Time, TimeDelta
@@ -9,13 +13,332 @@ from astropy import units
 from astropy.units import Unit
 from astropy import constants
 from cdflib import CDF
+import cdflib.epochs_astropy  # noqa: F401 - Registers the CDF epoch formats with astropy, which cdflib 1.x doesn't
+from h5py import File
 from numpy import ndarray  # Explicit import to make Typing easier
 from tqdm import tqdm
 
 from spacelabel.models.dataset import DataSet
+from spacelabel.models.dataset.config import CONFIG_DIRECTORY, ConfigEntry, ConfigRegistry
+from spacelabel.options import POOLS
 
 log = logging.getLogger(__name__)
 
+INDEX_SUFFIX: str = '.index.json'  # Suffix of the file the bounds of each file in a set are cached in
+
+
+def _as_dict(info) -> dict:
+    """
+    Describes a file or variable the same way whichever cdflib is installed.
+    cdflib 0.4 returns the descriptions from `cdf_info` and `varinq` as dictionaries, and 1.x as dataclasses.
+
+    :param info: The description of the file or variable
+    :return: The description as a dictionary
+    """
+    return info if isinstance(info, dict) else dataclasses.asdict(info)
+
+
+def _global_attribute(file: CDF, name: str):
+    """
+    Reads a global attribute the same way whichever cdflib is installed.
+    cdflib 0.4 returns attributes with only one entry as that entry, and 1.x as a list of one.
+
+    :param file: The open file
+    :param name: The name of the attribute
+    :return: The entry of the attribute, or a list of them if it has more than one
+    """
+    value = file.globalattsget()[name]
+    return value[0] if isinstance(value, list) and len(value) == 1 else value
+
+
+def _read_variables(
+        cdf_path: Path,
+        variables: List[str],
+        records: Optional[Tuple[int, int]] = None,
+        variables_ranged: Tuple[str, ...] = ()
+) -> Tuple[Dict[str, ndarray], Dict[str, str]]:
+    """
+    Reads variables from a CDF file, opening it just the once. Runs in the pool the files are read over.
+    Variables that aren't in the file are left out, so the caller can decide what to do about them.
+
+    :param cdf_path: The path to the file
+    :param variables: The names of the variables to read
+    :param records: The first record to read, and the record to read up to (exclusive), if not all of them
+    :param variables_ranged: The variables to read just that range of records of. The rest are read whole
+    :return: Dictionary of the variables, and dictionary of their CDF data types
+    """
+    file: CDF = CDF(str(cdf_path))
+    values: Dict[str, ndarray] = {}
+    types: Dict[str, str] = {}
+    for variable in dict.fromkeys(variables):
+        try:
+            info: dict = _as_dict(file.varinq(variable))
+            if records and variable in variables_ranged:
+                # A single record may come back without its record dimension, so put it back
+                values[variable] = numpy.reshape(
+                    file.varget(variable, startrec=records[0], endrec=records[1] - 1),
+                    (records[1] - records[0],) + tuple(info['Dim_Sizes'])
+                )
+            else:
+                values[variable] = file[variable]
+            types[variable] = info['Data_Type_Description']
+        except Exception:
+            log.debug(f"_read_variables: No variable '{variable}' in '{cdf_path}'")
+    return values, types
+
+
+def _time_format(cdf_type: str) -> str:
+    """
+    Works out the astropy time format for a CDF epoch data type.
+
+    :param cdf_type: The CDF data type of the epochs
+    :return: The astropy time format
+    """
+    cdf_type = cdf_type.lower()
+    return 'cdf_tt2000' if cdf_type == 'cdf_time_tt2000' else cdf_type
+
+
+def _fill_gaps(time: ndarray, data: ndarray, time_step: numpy.timedelta64) -> Tuple[ndarray, ndarray]:
+    """
+    Fills the gaps in a 1D time series with NaNs, evenly spaced at no more than the time step apart,
+    so the series is drawn blank across them rather than joined up.
+
+    All the gaps are found from one difference of the times, and the output is written into arrays
+    allocated once at their final size, so this is linear in the length of the series.
+
+    :param time: The times of the samples, as datetime64, sorted
+    :param data: The samples
+    :param time_step: The longest interval between samples that isn't a gap
+    :return: The times of the filled series, as datetime64[ns], and the filled series
+    """
+    time = time.astype('datetime64[ns]').astype(numpy.int64)
+    intervals: ndarray = numpy.diff(time)
+
+    # Each interval between samples contributes its first sample, plus any NaNs needed to fill it
+    counts: ndarray = numpy.ones(len(intervals), dtype=numpy.int64)
+    if not numpy.isnat(time_step):
+        step: int = time_step.astype('timedelta64[ns]').astype(numpy.int64)
+        gaps: ndarray = intervals > step
+        counts[gaps] = numpy.ceil(intervals[gaps] / step).astype(numpy.int64) - 1
+
+    starts: ndarray = numpy.concatenate(([0], numpy.cumsum(counts)))
+    time_filled: ndarray = numpy.empty(starts[-1] + 1, dtype=numpy.int64)
+    data_filled: ndarray = numpy.full(starts[-1] + 1, numpy.nan)
+
+    interval_of: ndarray = numpy.repeat(numpy.arange(len(intervals)), counts)
+    position: ndarray = numpy.arange(starts[-1]) - starts[interval_of]
+    time_filled[:-1] = time[interval_of] + (position * (intervals[interval_of] / counts[interval_of])).astype(numpy.int64)
+    time_filled[-1] = time[-1]
+    data_filled[starts] = data
+
+    return time_filled.astype('datetime64[ns]'), data_filled
+
+
+def _config_columns(config: dict) -> List[str]:
+    """
+    Lists the columns a CDF configuration requires a file to have.
+
+    :param config: The configuration
+    :return: The names of the columns
+    """
+    config_columns: List[str] = list(config['time']) + list(config['frequency'])
+    for receiver in config['measurements']:
+        for measurement in receiver.values():
+            config_columns.append(measurement['value'])
+            if measurement.get('background', None):
+                config_columns.append(measurement['background'])
+    return config_columns
+
+
+# The configurations for CDF files, parsed once and kept up to date with the directory
+CONFIGS: ConfigRegistry = ConfigRegistry(CONFIG_DIRECTORY / 'cdf', _config_columns)
+
+
+def _file_dates(cdf_paths: List[Path]) -> ndarray:
+    """
+    Reads the date each file in a set is named for.
+
+    :param cdf_paths: The paths to the files, named in the format 'stuff_[...]_stuff_YYYYMMDD_vXX.cdf'
+    :return: The dates, as day-precision datetimes
+    """
+    return numpy.array(
+        [f'{date[:4]}-{date[4:6]}-{date[6:8]}' for date in (path.stem.split('_')[-2] for path in cdf_paths)],
+        dtype='datetime64[D]'
+    )
+
+
+def _files_named_between(cdf_paths: List[Path], time_start: Time, time_end: Time) -> ndarray:
+    """
+    Finds the files in a set that could cover a time range, from the dates in their names alone.
+    A file may run a little past the end of the day it is named for, so the day before the range is included.
+
+    :param cdf_paths: The paths to the files, named in the format 'stuff_[...]_stuff_YYYYMMDD_vXX.cdf'
+    :param time_start: The start of the time range
+    :param time_end: The end of the time range (exclusive)
+    :return: The positions of the files in the list
+    """
+    dates: ndarray = _file_dates(cdf_paths)
+    return numpy.flatnonzero(
+        (dates >= numpy.datetime64(time_start.utc.datetime, 'D') - numpy.timedelta64(1, 'D')) &
+        (dates < numpy.datetime64(time_end.utc.datetime, 'us'))
+    )
+
+
+class FileIndex:
+    """
+    An index of a set of daily CDF files, for finding the files that cover a time range without opening the rest.
+
+    Files are picked out by the dates in their names, then narrowed down by the times of their first and last epochs.
+    The epoch bounds and number of records of each file are cached in a JSON file alongside the set,
+    with the size and modification time of the file, so a file is only read again if it changes.
+    """
+    _path: Path = None  # The path to the cache
+    _cdf_paths: List[Path] = None
+    _time_variable: str = None  # The name of the epoch variable
+    _entries: Dict[str, dict] = None  # The cached bounds of each file, by name
+    _changed: bool = False  # Whether the entries need writing back to the cache
+
+    def __init__(self, file_path: Path, cdf_paths: List[Path], time_variable: str, log_level: Optional[int] = None):
+        """
+        Sets up the index, reading the cache if there is one.
+
+        :param file_path: The base path of the set, as `/a/b/c/stuff_[...]_stuff`
+        :param cdf_paths: The paths to the files in the set, sorted by date
+        :param time_variable: The name of the epoch variable in the files
+        :param log_level: The level of logging to show from this object
+        """
+        self._path = file_path.with_name(file_path.name + INDEX_SUFFIX)
+        self._cdf_paths = cdf_paths
+        self._time_variable = time_variable
+        self._entries = {}
+
+        if log_level:
+            log.setLevel(log_level)
+
+        if self._path.exists():
+            try:
+                cache: dict = json.loads(self._path.read_text())
+                if cache['time'] == time_variable:
+                    self._entries = cache['files']
+            except (json.decoder.JSONDecodeError, KeyError):
+                log.warning(f"FileIndex: Ignoring unreadable index '{self._path}'")
+
+    def record(self, position: int, records: int, time_start: float, time_end: float, scale: str):
+        """
+        Adds the bounds of a file to the index.
+
+        :param position: The position of the file in the set
+        :param records: The number of records in the file
+        :param time_start: The time of the first record, as a Julian date
+        :param time_end: The time of the last record, as a Julian date
+        :param scale: The time scale of the Julian dates
+        """
+        cdf_path: Path = self._cdf_paths[position]
+        status = cdf_path.stat()
+        self._entries[cdf_path.name] = {
+            'size': status.st_size, 'mtime': status.st_mtime_ns,
+            'records': records, 'start': time_start, 'end': time_end, 'scale': scale
+        }
+        self._changed = True
+
+    def _get_entry(self, position: int) -> dict:
+        """
+        Gets the bounds of a file, reading its epochs if they aren't cached or the file has changed since.
+
+        :param position: The position of the file in the set
+        :return: The cached entry, with the number of 'records' and the 'start' and 'end' times in the 'scale'
+        """
+        cdf_path: Path = self._cdf_paths[position]
+        status = cdf_path.stat()
+        entry: Optional[dict] = self._entries.get(cdf_path.name, None)
+        if not entry or entry['size'] != status.st_size or entry['mtime'] != status.st_mtime_ns:
+            log.debug(f"FileIndex: Reading the epochs of '{cdf_path}'")
+            values, types = _read_variables(cdf_path, [self._time_variable])
+            epoch: ndarray = values[self._time_variable]
+            if len(epoch):
+                time: Time = Time(epoch[[0, -1]], format=_time_format(types[self._time_variable]))
+                self.record(position, len(epoch), time.jd[0], time.jd[1], time.scale)
+            else:
+                self.record(position, 0, None, None, None)
+
+        return self._entries[cdf_path.name]
+
+    def __len__(self) -> int:
+        """
+        :return: The number of files in the set
+        """
+        return len(self._cdf_paths)
+
+    def find(self, time_start: Time, time_end: Time) -> List[int]:
+        """
+        Finds the files that cover a time range.
+
+        :param time_start: The start of the time range (inclusive)
+        :param time_end: The end of the time range (exclusive)
+        :return: The positions of the files in the set, in order
+        """
+        named: List[int] = _files_named_between(self._cdf_paths, time_start, time_end).tolist()
+        day_start: numpy.datetime64 = numpy.datetime64(time_start.utc.datetime, 'D')
+        if len(named) > 1 and _file_dates([self._cdf_paths[named[0]]])[0] < day_start:
+            # The day before the range is only needed if the range starts before the first day in it does
+            entry: dict = self._get_entry(named[1])
+            if entry['records'] and getattr(time_start, entry['scale']).jd >= entry['start']:
+                named = named[1:]
+
+        positions: List[int] = []
+        for position in named:
+            entry: dict = self._get_entry(position)
+            if entry['records'] and (
+                getattr(time_start, entry['scale']).jd <= entry['end'] and
+                getattr(time_end, entry['scale']).jd > entry['start']
+            ):
+                positions.append(position)
+
+        self.save()
+        return positions
+
+    def get_time_range(self, positions: Optional[List[int]] = None) -> Tuple[Time, Time]:
+        """
+        :param positions: The positions of the files to look at, in order, if not the whole set
+        :return: The times of the first and last records in the files
+        """
+        if positions is None:
+            positions = list(range(len(self._cdf_paths)))
+
+        # Only the files at each end need looking at, unless they're empty
+        first: dict = next(
+            entry for entry in map(self._get_entry, positions) if entry['records']
+        )
+        last: dict = next(
+            entry for entry in map(self._get_entry, reversed(positions)) if entry['records']
+        )
+        self.save()
+        return (
+            Time(first['start'], format='jd', scale=first['scale']),
+            Time(last['end'], format='jd', scale=last['scale'])
+        )
+
+    def save(self):
+        """
+        Writes the index back to its cache, if it has changed. Entries for files no longer in the set are dropped.
+        """
+        if not self._changed:
+            return
+
+        names: List[str] = [cdf_path.name for cdf_path in self._cdf_paths]
+        try:
+            self._path.write_text(
+                json.dumps(
+                    {
+                        'time': self._time_variable,
+                        'files': {name: self._entries[name] for name in names if name in self._entries}
+                    }
+                )
+            )
+            self._changed = False
+        except OSError:
+            log.warning(f"FileIndex: Could not write the index '{self._path}'")
+
 
 class DataSetCDF(DataSet):
     """
@@ -32,6 +355,44 @@ class DataSetCDF(DataSet):
         preprocessed_path: Path = file_path.with_name('_'.join(file_path.stem.split('_')[:-2])+'.preprocessed.hdf5')
         return preprocessed_path if preprocessed_path.exists() else None
 
+    @staticmethod
+    def _find_files(file_path: Path) -> List[Path]:
+        """
+        Lists the datafiles in the set, keeping only the latest version of each day.
+
+        :param file_path: The base path of the set, as `/a/b/c/stuff_[...]_stuff`
+        :return: The paths to the files, sorted by date
+        """
+        # We want to get a list of all the files, then sort it because you can't trust the OS to
+        cdf_paths: List[Path] = sorted(file_path.parent.glob(file_path.name+'*.cdf'))
+
+        # Versions are zero-padded, so sort in order and the last of each day is the latest
+        latest: Dict[str, Path] = {}
+        for cdf_path in cdf_paths:
+            latest[cdf_path.stem.split('_')[-2]] = cdf_path
+        return list(latest.values())
+
+    @staticmethod
+    def is_preprocessed_outdated(file_path: Path, preprocessed_path: Path) -> bool:
+        """
+        Have any days been added, removed or re-versioned since the pre-processed file was written?
+        Files written before the source files were recorded in them can't be checked, so are taken as up to date.
+
+        :param file_path: The path to the file. The filename must be in the format 'stuff_[...]_stuff_YYYYMMDD_vXX.cdf'
+        :param preprocessed_path: The path to the preprocessed file
+        :return: Whether the preprocessed file needs updating
+        """
+        with File(preprocessed_path, 'r') as preprocessed_file:
+            sources: Optional[str] = preprocessed_file.attrs.get('sources', None)
+            if sources is None or 'preprocess' not in preprocessed_file.attrs:
+                log.info(f"DataSetCDF: '{preprocessed_path}' doesn't list its source files, so can't be updated")
+                return False
+
+        cdf_paths: List[Path] = DataSetCDF._find_files(
+            file_path.with_name('_'.join(file_path.stem.split('_')[:-2]))
+        )
+        return {cdf_path.name for cdf_path in cdf_paths} != set(json.loads(sources).keys())
+
     @staticmethod
     def _find_config(columns: List[str], config_name: Optional[str]) -> dict:
         """
@@ -40,62 +401,27 @@ class DataSetCDF(DataSet):
         :param columns: The list of columns in the file
         :param config_name: If a config name was passed, what is it?
         """
-        configs: Dict[str, dict] = {}
-        configs_file_name: List[str] = {}
-        # Scan the configs directory for entries
-        for config_file in (Path(__file__).parent.parent.parent.parent / 'config' / 'cdf').glob('*.json'):
-            configs[config_file.stem] = json.load(config_file.open())
-            configs_file_name[config_file.stem] = config_file
-    
-
-
         if config_name:
             # If there was a config requested, get it!
-            if config_name[0] not in configs_file_name.keys():
-            #if config_name not in configs.keys():
-                raise KeyError(
-                    f"Requested a non-existent configuration '{config_name[0]}'. "
-                    f"Configurations are: {', '.join(configs.keys())}"
-                )
+            entry: ConfigEntry = CONFIGS.get(config_name[0])
 
             # Let's check the required columns from the config - do they all exist in the file?
-            config = configs[config_name[0]]
-            #config_columns = [config['time'], config['frequency']]
-            config_columns = [t for t in config['time']] + [f for f in config['frequency']]
-            for receiver in config['measurements']:
-                for measurement in receiver.values():
-                        config_columns.append(measurement['value'])
-                        if measurement.get('background', None):
-                            config_columns.append(measurement['background'])
-            print(config_columns)
-            if not set(config_columns).intersection(set(columns)):
+            log.debug(f"DataSetCDF: Configuration '{config_name[0]}' requires columns {', '.join(entry.columns)}")
+            if entry.columns - set(columns):
                 raise KeyError(
                     f"Requested configuration '{config_name[0]}' does not describe the input file. "
-                    f"Configuration file requires columns {', '.join(config_columns)}, "
+                    f"Configuration file requires columns {', '.join(entry.columns)}, "
                     f"but the file only contains the columns {', '.join(columns)}."
                 )
             else:
-                return config
+                return entry.config
 
         else:
-            # We iterate over each of the possible configurations.
-            # Once we find one (and only one) that fully describes the input file, we accept it as the configuration.
-            valid_configs: List[dict] = []
-
-            for config_entry in configs.values():
-                # Let's check the required columns from the config - do they all exist in the file?
-                config_columns = [t for t in config_entry['time']] + [f for f in config_entry['frequency']]
-                for receiver in config_entry['measurements']:
-                    for measurement in receiver.values():
-                        config_columns.append(measurement['value'])
-                        if measurement.get('background', None):
-                            config_columns.append(measurement['background'])
-                if not set(config_columns) - set(columns):
-                #if set(config_columns).intersection(set(columns)):
-                    valid_configs.append(config_entry)
-
-            print("####### valid config is: ##########")
-            print(valid_configs)
+            # Once we find one (and only one) configuration that fully describes the input file,
+            # we accept it as the configuration.
+            valid_configs: Dict[str, dict] = CONFIGS.match(columns)
+            log.debug(f"DataSetCDF: Valid configurations are: {', '.join(valid_configs.keys())}")
+
             if not valid_configs:
                 raise KeyError(
                     f"No configuration files describe the columns of input file. "
@@ -105,23 +431,40 @@ class DataSetCDF(DataSet):
                 raise KeyError(
                     f"Too many configuration files describe the columns of input file. "
                     f"Matching configuration files are: "
-                    f"{', '.join([config_name for config_name in valid_configs.keys()])}."
+                    f"{', '.join(valid_configs.keys())}."
                 )
             else:
-                return valid_configs[0]
+                return next(iter(valid_configs.values()))
+
+    _readers: Optional[int] = None  # The number of files to read at once, if more than one
+    _pool: str = POOLS[0]
+    _index: FileIndex = None
+    _time_range: Optional[Tuple[Time, Time]] = None  # The time range read, if only part of the set is read
+    _record_ranges: Optional[List[Tuple[int, int]]] = None  # The records read from each file, if not all of them
+    _positions: Optional[List[int]] = None  # The positions in the set of the files covering the time range, if any
+    _reader_attributes: Tuple[str, ...] = DataSet._reader_attributes + ('_cdf_paths', '_records', '_record_ranges')
 
     def __init__(
             self,
             file_path: Path,
             config_name: Optional[str] = None,
-            log_level: Optional[int] = None
+            log_level: Optional[int] = None,
+            readers: Optional[int] = None,
+            pool: str = POOLS[0],
+            time_range: Optional[Tuple[Time, Time]] = None
     ):
         """
         Sets up datafiles for reading.
 
+        If a time range is given, only the files covering it are opened, found from the index of the set,
+        and only the records within it are read from them.
+
         :param file_path: The path to the file. The filename must be in the format 'stuff_[...]_stuff_YYYYMMDD_vXX.cdf'
         :param config_name: The configuration file to use, if any
         :param log_level: The level of logging to show from this object
+        :param readers: The number of files to read at once (optional, positive)
+        :param pool: What to read the files over, one of POOLS (optional, default 'thread')
+        :param time_range: The start (inclusive) and end (exclusive) of the time to read, if not all of it (optional)
         """
         super().__init__(
             # This sets the base file path to be `/a/b/c/stuff_[...]_stuff`
@@ -132,42 +475,110 @@ class DataSetCDF(DataSet):
         if log_level:
             log.setLevel(log_level)
 
-        # We want to get a list of all the files, then sort it because you can't trust the OS to
-        cdf_paths = list(self._file_path.parent.glob(self._file_path.name+'*.cdf'))
-        cdf_paths.sort()
+        if pool not in POOLS:
+            raise ValueError(f"Requested an unknown pool: {pool}. Pools are: {', '.join(POOLS)}")
+        self._readers = readers
+        self._pool = pool
+        self._time_range = time_range
+
+        cdf_paths: List[Path] = self._find_files(self._file_path)
+        self._cdf_paths: List[Path] = cdf_paths
+
+        # Find the config for the file based on the column names, from a file in the time range if there is one.
+        # The last file is used, as the frequencies are read from it too.
+        config_path: Path = cdf_paths[-1]
+        if time_range:
+            named: ndarray = _files_named_between(cdf_paths, time_range[0], time_range[1])
+            if not len(named):
+                raise ValueError(
+                    f"Date range {time_range[0]} to {time_range[1]} is outside of the data file range.\n"
+                    f"Please check your date range is YYYY-MM-DD format."
+                )
+            config_path = cdf_paths[named[-1]]
 
-        # Find the config for the file based on the column names
+        file_config: CDF = CDF(str(config_path))
         self._config = self._find_config(
-            columns=CDF(str(cdf_paths[0])).cdf_info()['zVariables'],
+            columns=_as_dict(file_config.cdf_info())['zVariables'],
             config_name=config_name
         )
 
-        epochs: List[ndarray] = []
-        for cdf_path in tqdm(cdf_paths):
-            file: CDF = CDF(str(cdf_path))
-            if self._config['time'].count(self._config['time'][0]) == len(self._config['time']):
-                epochs.append(file[self._config['time'][0]])
-                cdf_time_format = CDF(str(cdf_paths[0])).varinq(self._config['time'][0])['Data_Type_Description']
-            else:
-                first = True
-                for t in self._config['time']:
-                    if first == True: 
-                        ep = file[t]
-                        print(ep)
-                        print("In progress")
-                        exit(1)
-        
-        if cdf_time_format == 'CDF_TIME_TT2000':
-            cdf_time_format = 'CDF_TT2000'
-        
-        self._time = Time(
+        if self._config['time'].count(self._config['time'][0]) != len(self._config['time']):
+            log.error(f"DataSetCDF: Configuration has more than one time variable: {', '.join(self._config['time'])}")
+            raise NotImplementedError(
+                f"Configurations whose receivers have different time variables "
+                f"({', '.join(self._config['time'])}) are not supported yet."
+            )
+
+        self._index = FileIndex(self._file_path, cdf_paths, self._config['time'][0], log_level=log_level)
+        if time_range:
+            self._positions = self._index.find(*time_range)
+            self._cdf_paths = [cdf_paths[position] for position in self._positions]
+            if not self._cdf_paths:
+                raise ValueError(
+                    f"Date range {time_range[0]} to {time_range[1]} has no data in it.\n"
+                    f"Please check your date range is YYYY-MM-DD format."
+                )
+
+        files: List[Tuple[Dict[str, ndarray], Dict[str, str]]] = self._read_files([self._config['time'][0]])
+        epochs: List[ndarray] = [values[self._config['time'][0]] for values, _ in files]
+        file: CDF = file_config if config_path == self._cdf_paths[-1] else CDF(str(self._cdf_paths[-1]))
+
+        # Keep track of how many records each file has, so we can read the measurements in blocks
+        self._records: List[int] = [len(epoch) for epoch in epochs]
+        time: Time = Time(
             numpy.concatenate(epochs), 
-            format = cdf_time_format.lower())
+            format=_time_format(files[0][1][self._config['time'][0]]))
 
         
-        self._time.format = 'jd'
+        time.format = 'jd'
+        file_starts: List[int] = numpy.concatenate(([0], numpy.cumsum(self._records))).tolist()
+        if time_range:
+            # Trim the files at either end down to the records within the time range
+            window: slice = slice(
+                int(numpy.searchsorted(time.jd, getattr(time_range[0], time.scale).jd, side='left')),
+                int(numpy.searchsorted(time.jd, getattr(time_range[1], time.scale).jd, side='left'))
+            )
+            self._record_ranges = [
+                (min(max(window.start - start, 0), stop - start), min(max(window.stop - start, 0), stop - start))
+                for start, stop in zip(file_starts[:-1], file_starts[1:])
+            ]
+            # A file may only touch the time range by a rounding error, so leave out any with no records in it
+            self._cdf_paths, self._record_ranges = (
+                [cdf_path for cdf_path, (record_start, record_stop) in zip(self._cdf_paths, self._record_ranges)
+                 if record_stop > record_start],
+                [(record_start, record_stop) for record_start, record_stop in self._record_ranges
+                 if record_stop > record_start]
+            )
+            if not self._cdf_paths:
+                raise ValueError(
+                    f"Date range {time_range[0]} to {time_range[1]} has no data in it.\n"
+                    f"Please check your date range is YYYY-MM-DD format."
+                )
+            self._records = [record_stop - record_start for record_start, record_stop in self._record_ranges]
+            file_starts = numpy.concatenate(([0], numpy.cumsum(self._records))).tolist()
+            time = time[window]
+            log.info(
+                f"DataSetCDF: Reading {len(time)} records from {len(self._cdf_paths)} of {len(cdf_paths)} files"
+            )
+        else:
+            # All the epochs have been read anyway, so keep the index up to date for reading time ranges later
+            for position, start, stop in zip(range(len(cdf_paths)), file_starts[:-1], file_starts[1:]):
+                if stop > start:
+                    self._index.record(position, stop - start, time.jd[start], time.jd[stop - 1], time.scale)
+                else:
+                    self._index.record(position, 0, None, None, None)
+            self._index.save()
+
+        self._set_time(time)
         self._units['Time'] = "JD"
 
+        # Note the time each file covers now, as preprocessing replaces the time axis
+        self._sources: Dict[str, Tuple[float, float]] = {
+            cdf_path.name: (float(self._time_index[start]), float(self._time_index[stop - 1]))
+            for cdf_path, start, stop in zip(self._cdf_paths, file_starts[:-1], file_starts[1:])
+            if stop > start
+        }
+
         first = True
         for f in self._config['frequency']:
             if first == True: 
@@ -179,196 +590,356 @@ class DataSetCDF(DataSet):
         #We'll probably want to make this more sophiosticated but it will do for a demo
         self._units['Frequency'] = file.varattsget(self._config['frequency'][0])['UNITS'] 
 
-        self._observer = file.globalattsget()['Mission_group']
+        self._observer = _global_attribute(file, 'Mission_group')
+
+    def validate_dates(self, dates: Tuple[Time, Time]):
+        """
+        Checks to see if the dates of interest are within the time range of the whole set, from the index.
+        If only the files covering the dates are read, only those are looked at: the dates can only run off the
+        start or end of the set if they're the first or last files in it.
+
+        :param dates: The start and end of the dates of interest
+        :raise ValueError: If the dates are out of the time range of the set
+        """
+        if self._positions is None:
+            time_start, time_end = self._index.get_time_range()
+            outside: bool = dates[0] < time_start or dates[1] > time_end
+        else:
+            time_start, time_end = self._index.get_time_range(self._positions)
+            outside: bool = (
+                (dates[0] < time_start and self._positions[0] == 0) or
+                (dates[1] > time_end and self._positions[-1] == len(self._index) - 1)
+            )
+
+        if outside:
+            raise ValueError(
+                f"Date range {dates[0]} to {dates[-1]} is outside of the data file range "
+                f"{time_start.to_datetime()} to {time_end.to_datetime()}.\n"
+                f"Please check your date range is YYYY-MM-DD format."
+            )
+
+    def _read_files(
+            self, variables: List[str], variables_ranged: Tuple[str, ...] = ()
+    ) -> List[Tuple[Dict[str, ndarray], Dict[str, str]]]:
+        """
+        Reads variables from every file in the set, over a pool of readers if there's more than one.
+        Each file is opened once, however many variables are read from it.
+
+        :param variables: The names of the variables to read
+        :param variables_ranged: The variables that run with the measurement epochs, so only the records within
+            the time range are read of them, if only part of the set is read
+        :return: Dictionaries of the variables and their CDF data types from each file,
+            in the same (sorted) order as the files
+        """
+        record_ranges: List[Optional[Tuple[int, int]]] = self._record_ranges or [None] * len(self._cdf_paths)
+        if not (self._readers and self._readers > 1 and len(self._cdf_paths) > 1):
+            return [
+                _read_variables(cdf_path, variables, records, variables_ranged)
+                for cdf_path, records in zip(tqdm(self._cdf_paths), record_ranges)
+            ]
+
+        log.info(f"DataSetCDF: Reading {len(self._cdf_paths)} files over {self._readers} {self._pool}s...")
+        if self._pool == 'process':
+            executor: Executor = ProcessPoolExecutor(max_workers=self._readers, mp_context=get_context('spawn'))
+        else:
+            executor: Executor = ThreadPoolExecutor(max_workers=self._readers)
+
+        with executor:
+            # Map returns the results in the order of the files, however the reads finish
+            return list(
+                tqdm(
+                    executor.map(
+                        _read_variables, self._cdf_paths, repeat(variables), record_ranges, repeat(variables_ranged)
+                    ),
+                    total=len(self._cdf_paths)
+                )
+            )
 
     def pad(self,
-            cdf_file,
+            values: Dict[str, ndarray],
+            types: Dict[str, str],
             series,
             time_minimum: Optional[float] = None,
             missing_data: Optional[str] = False
             ): 
-
+        """
+        Replaces missing data in a 1D time series from one file with NaNs at the minimum time resolution,
+        so the 1D plot is blank where there's no data.
+
+        :param values: The variables read from the file
+        :param types: The CDF data types of the variables read from the file
+        :param series: The configuration of the 1D time series
+        :param time_minimum: The minimum time bin width, in seconds (optional, positive)
+        :param missing_data: Whether the series is missing from the file entirely
+        :return: The padded times, as Julian dates, and the padded series
+        """
         if not time_minimum:
             time_minimum = self._config['preprocess'].get('time_minimum', None)
         if time_minimum:
             if time_minimum < 0:
                 raise ValueError(f"Requested a negative minimum time bin: {time_minimum}")
-            elif TimeDelta(time_minimum, format='sec') < (self._time[1] - self._time[0]):
+            elif TimeDelta(time_minimum, format='sec') < (self._get_time(1) - self._get_time(0)):
                 log.warning("preprocess: The target time bin is smaller than the time bins in the data; skipping.")
                 time_minimum = None
         time_minimum = numpy.timedelta64(time_minimum, 's')
         
-        cdf_time_format = cdf_file.varinq(self._config['time'][0])['Data_Type_Description'].lower()
-        if cdf_time_format == 'CDF_TIME_TT2000'.lower():
-            cdf_time_format = 'CDF_TT2000'.lower()
-
+        cdf_time_format = _time_format(types[self._config['time'][0]])
+        epoch = Time(values[self._config['time'][0]], format = cdf_time_format).datetime64
 
         if missing_data:
-            newtime = Time(pd.date_range(Time(cdf_file[self._config['time'][0]], format = cdf_time_format).datetime64[0], 
-                           Time(cdf_file[self._config['time'][0]], format = cdf_time_format).datetime64[-1], 
+            newtime = Time(pd.date_range(epoch[0], 
+                           epoch[-1], 
                            int(numpy.ceil(((
-                               Time(cdf_file[self._config['time'][0]], 
-                                              format = cdf_time_format).datetime64[-1] - 
-                               Time(cdf_file[self._config['time'][0]], 
-                                    format = cdf_time_format).datetime64[0])/time_minimum))))).jd
+                               epoch[-1] - 
+                               epoch[0])/time_minimum))))).jd
             newdata = numpy.repeat(numpy.nan, len(newtime))
             
             return newtime, newdata       
         else:
-            data = cdf_file[series["value"]]
-            timefc = Time(cdf_file[series["time"]], format = cdf_time_format).datetime64
-
-            new_time = numpy.array([], dtype = 'datetime64[ns]')
-            new_data = numpy.array([], dtype = 'float64')
-
-            if timefc[0] > Time(cdf_file[self._config['time'][0]], format = cdf_time_format).datetime64[0]:
-                timefc = numpy.concatenate((numpy.array([Time(cdf_file[self._config['time'][0]], format = cdf_time_format).datetime64[0]]),
-                                timefc))
-                data = numpy.concatenate((numpy.array([numpy.nan]), data))
-            if timefc[-1] < Time(cdf_file[self._config['time'][0]], format = cdf_time_format).datetime64[-1]:
-                timefc = numpy.concatenate((timefc,
-                                     numpy.array([Time(cdf_file[self._config['time'][0]], format = cdf_time_format).datetime64[-1]])))
-                data = numpy.concatenate((data,numpy.array([numpy.nan])))
-
-
-
-            for t in range(0, len(timefc)-1):
-                if timefc[t+1]-timefc[t] > time_minimum: 
-                    new_time = numpy.concatenate((new_time,  
-                                              numpy.array(pd.date_range(timefc[t],
-                                                                     timefc[t-1],
-                                                                     int(numpy.ceil(((timefc[t+1]-timefc[t])/time_minimum))))[:-1])
-                                         ))
-                    new_data = numpy.concatenate((new_data,  
-                                              numpy.array([data[t]]+[numpy.nan for l in range(0, 
-                                                                                        int(numpy.ceil((
-                                                                                            (timefc[t+1]-timefc[t])/time_minimum)-2
-                                                                                        )))])
-                                             ))
-                else: 
-                    new_time = numpy.concatenate((new_time, numpy.array([timefc[t]])))
-                    new_data = numpy.concatenate((new_data, numpy.array([data[t]])))
-
-            new_time  = Time(new_time).jd
-            return new_time, new_data
+            data = numpy.asarray(values[series["value"]], dtype=float)
+            timefc = Time(values[series["time"]], format = cdf_time_format).datetime64
+
+            # Pad the ends with NaNs, so the series covers the same time as the measurements
+            if timefc[0] > epoch[0]:
+                timefc = numpy.concatenate(([epoch[0]], timefc))
+                data = numpy.concatenate(([numpy.nan], data))
+            if timefc[-1] < epoch[-1]:
+                timefc = numpy.concatenate((timefc, [epoch[-1]]))
+                data = numpy.concatenate((data, [numpy.nan]))
+
+            new_time, new_data = _fill_gaps(timefc, data, time_minimum)
+            return Time(new_time).jd, new_data
 
     def load(self):
         """
         Reads a datafile in CDF format.
+
+        Every variable the configuration needs is read in a single pass over the files,
+        so each file is only opened once.
         """
 
         log.info(f"DataSetCDF: Loading '{self._file_path}[*].cdf...")
 
-        # We want to get a list of all the files, then sort it because you can't trust the OS to
-        cdf_paths: List[Path] = list(self._file_path.parent.glob(self._file_path.name+'*.cdf'))
-        cdf_paths.sort()
+        variables: List[str] = self._get_series_variables()
+        variables_ranged: Tuple[str, ...] = (self._config['time'][0],)
+        for measure in self._config['measurements']:
+            for measurement_config in measure.values():
+                variables.append(measurement_config['value'])
+                variables_ranged += (measurement_config['value'],)
+                if measurement_config.get('background', None):
+                    variables.append(measurement_config['background'])
+
+        files: List[Tuple[Dict[str, ndarray], Dict[str, str]]] = self._read_files(variables, variables_ranged)
 
-        file: CDF = None
-        
         for measurement_name in self._config['measurements'][0].keys(): #Maybe dubious if we want different antenna configs put together
-            first = True
+            receivers: List[ndarray] = []
             for measure in self._config['measurements']:
-                if first == True:
-                    measurement_config = measure[measurement_name]
-                    measurements: List[ndarray] = []
-
-                    for cdf_path in tqdm(cdf_paths):
-                        file = CDF(str(cdf_path))
-                        measurements.append(file[measurement_config['value']])
-                    first = False
-                    # The data is not background-subtracted. Background varies per frequency bin.
-                    measurement = numpy.concatenate(measurements)
+                measurement_config = measure[measurement_name]
+                blocks: List[ndarray] = []
+                for values, _ in files:
+                    block: ndarray = numpy.array(values[measurement_config['value']], dtype=float, ndmin=2)
+                    # The data is not background-subtracted. Background varies per frequency bin, and per file;
+                    # each file's own is used, as when reading chunks in _read_source_rows.
                     if measurement_config.get('background', None):
-                        measurement -= file[measurement_config['background']]
+                        block -= values[measurement_config['background']]
+                    blocks.append(block)
+                measurement: ndarray = numpy.concatenate(blocks)
 
-                    # The data may not be in the units we want, so apply the conversion factor
-                    if measurement_config.get('conversion', None):
-                        measurement *= measurement_config['conversion']
-
-                else:
-                    measurement_config = measure[measurement_name]
-                    measurements2: List[ndarray] = []
-                    for cdf_path in cdf_paths:
-                        file = CDF(str(cdf_path))
-                            
-                        measurements2.append(file[measurement_config['value']])
-                    first = False
-                    # The data is not background-subtracted. Background varies per frequency bin.
-                    measurement2 = numpy.concatenate(measurements2)
-                    if measurement_config.get('background', None):
-                        measurement2 -= file[measurement_config['background']]
+                # The data may not be in the units we want, so apply the conversion factor
+                if measurement_config.get('conversion', None):
+                    measurement *= measurement_config['conversion']
+                receivers.append(measurement)
 
-                    # The data may not be in the units we want, so apply the conversion factor
-                    if measurement_config.get('conversion', None):
-                        measurement2 *= measurement_config['conversion']
-                    measurement = numpy.concatenate((measurement,measurement2), axis = 1)
-            self._data[measurement_name] = measurement
+            self._data[measurement_name] = numpy.concatenate(receivers, axis=1)
             self._units[measurement_name] = measurement_config.get('units', None)
 
-        first = True
-        for series in self._config['other']:    
-            if first == True:  
-                measurements: List[ndarray] = []
-                times_1d: List[ndarray] = []
-                
-                total_time_series_measurements = []
-
-                for path in tqdm(cdf_paths):
-                    cdf_file = CDF(path)
-
-                    try:
-                        total_time_series_measurements.append(len(cdf_file[series["value"]]))
-                    except:
-                        pass
-    
-                threshold = numpy.array(total_time_series_measurements).max()-(numpy.array(total_time_series_measurements).max()/(24*30))
-
-
-                for path in tqdm(cdf_paths):
-                    cdf_file = CDF(path)
-                    try:
-                        if len(cdf_file[series["time"]]) > threshold:
-                            cdf_time_format = cdf_file.varinq(series['time'])['Data_Type_Description'].lower()
-                            if cdf_time_format == 'CDF_TIME_TT2000'.lower():
-                                cdf_time_format = 'CDF_TT2000'.lower()
-
-                            measurements.append(cdf_file[series["value"]])
-                            times_1d.append(Time(cdf_file[series["time"]], format = cdf_time_format).jd)
-                        else: 
-                            t, d = self.pad(cdf_file, series, missing_data = False)
-                            measurements.append(d)
-                            times_1d.append(t)
-
-                    except:
-                        t, d = self.pad(cdf_file, series, missing_data = True)
+        self._load_series(files)
+
+        log.info(f"DataSetCDF: Loaded '{self._file_path}[*].cdf...'")
+
+    def _get_series_variables(self) -> List[str]:
+        """
+        Lists the variables needed to read the 1D time series listed under 'other' in the config,
+        including the epochs of the measurements, which are used to pad them.
+
+        :return: The names of the variables
+        """
+        variables: List[str] = [self._config['time'][0]]
+        for series in self._config['other']:
+            variables += [series['value'], series['time']]
+            if series.get('background', None):
+                variables.append(series['background'])
+        return variables
+
+    def _load_series(self, files: Optional[List[Tuple[Dict[str, ndarray], Dict[str, str]]]] = None):
+        """
+        Reads the 1D time series listed under 'other' in the config, padding any missing data with NaNs.
+
+        :param files: The variables and their CDF data types already read from each file, if any.
+            Otherwise, the files are read.
+        """
+        if not self._config['other']:
+            return
+        if files is None:
+            files = self._read_files(self._get_series_variables(), (self._config['time'][0],))
+
+        for series in self._config['other']:
+            measurements: List[ndarray] = []
+            times_1d: List[ndarray] = []
+
+            # Files with noticeably fewer samples than the fullest one have gaps to pad
+            total_time_series_measurements: List[int] = [
+                len(values[series["value"]]) for values, _ in files if series["value"] in values
+            ]
+            threshold = numpy.array(total_time_series_measurements).max()-(numpy.array(total_time_series_measurements).max()/(24*30))
+
+            for values, types in files:
+                try:
+                    if len(values[series["time"]]) > threshold:
+                        measurements.append(values[series["value"]])
+                        times_1d.append(Time(values[series["time"]], format=_time_format(types[series['time']])).jd)
+                    else: 
+                        t, d = self.pad(values, types, series, missing_data = False)
                         measurements.append(d)
                         times_1d.append(t)
-                
-    
-                
-                        
-                        
-                first = False
-                # The data is not background-subtracted. Background varies per frequency bin.
-                measurement = numpy.concatenate(measurements)
-                time_1d = numpy.concatenate(times_1d)
-                if measurement_config.get('background', None):
-                    measurement -= file[measurement_config['background']]
 
-                # The data may not be in the units we want, so apply the conversion factor
-                if measurement_config.get('conversion', None):
-                    measurement *= measurement_config['conversion']
+                except Exception:
+                    t, d = self.pad(values, types, series, missing_data = True)
+                    measurements.append(d)
+                    times_1d.append(t)
 
+            # The data is not background-subtracted. Background varies per frequency bin.
+            measurement = numpy.concatenate(measurements)
+            if series.get('background', None):
+                measurement -= files[-1][0][series['background']]
 
-        
+            # The data may not be in the units we want, so apply the conversion factor
+            if series.get('conversion', None):
+                measurement *= series['conversion']
 
-            self._time_1d = time_1d        
+            self._time_1d = numpy.concatenate(times_1d)
             self._units_1d['Time'] = "JD"
-            
-            
+
             self._data_1d[series["value"]] = measurement
-            self._units_1d[series["value"]] = measurement_config.get('units', None)
+            self._units_1d[series["value"]] = series.get('units', '')
 
-        log.info(f"DataSetCDF: Loaded '{self._file_path}[*].cdf...'")
+    def _get_source_measurements(self) -> Dict[str, str]:
+        """
+        Lists the measurements in the config file.
+
+        :return: Dictionary of the measurement names, and their units
+        """
+        for measurement_name in self._config['measurements'][0].keys():
+            for measure in self._config['measurements']:
+                self._units[measurement_name] = measure[measurement_name].get('units', None)
+
+        return {
+            measurement_name: self._units[measurement_name]
+            for measurement_name in self._config['measurements'][0].keys()
+        }
+
+    def save_to_hdf(self, pyramid: bool = True) -> Optional[Path]:
+        """
+        Saves the data to disk as a pre-processed HDF5 file, unless only part of the set was read,
+        as the file is taken to hold the whole set.
+
+        :param pyramid: Whether to also write a pyramid of time-decimated levels for display
+        :return: The path to the file, if one was written
+        """
+        if self._time_range:
+            log.info("DataSetCDF: Only a time range of the set was read, so it isn't saved as a preprocessed file")
+            return None
+        return super().save_to_hdf(pyramid=pyramid)
+
+    def _preprocess_chunked(self, *args, **kwargs) -> Optional[Path]:
+        """
+        Streams the measurements from the files to a pre-processed HDF5 file, if the whole set is being read.
+
+        :raises ValueError: If only a time range of the set was read
+        :return: The path to the preprocessed file, if one was written
+        """
+        if self._time_range:
+            raise ValueError(
+                "preprocess: Only a time range of the set was read, so it can't be streamed to a preprocessed file"
+            )
+        return super()._preprocess_chunked(*args, **kwargs)
+
+    def _get_sources(self) -> Dict[str, Tuple[float, float]]:
+        """
+        Lists the files in the set, with the time each covers, for the pre-processed file to record.
+
+        :return: Dictionary of the name of each file, and the first and last times in it as Julian dates
+        """
+        return self._sources
+
+    def update_preprocessed(self, preprocessed_path: Path) -> Path:
+        """
+        Brings the pre-processed file up to date with the files in the set.
+        Only the time covered by new or re-versioned days, or days that have been removed, is processed again.
+
+        :param preprocessed_path: The path to the preprocessed file
+        :return: The path to the preprocessed file
+        """
+        with File(preprocessed_path, 'r') as preprocessed_file:
+            sources_previous: Dict[str, List[float]] = json.loads(preprocessed_file.attrs['sources'])
+
+        sources: Dict[str, Tuple[float, float]] = self._get_sources()
+        added: List[str] = [name for name in sources.keys() if name not in sources_previous]
+        removed: List[str] = [name for name in sources_previous.keys() if name not in sources]
+        log.info(
+            f"DataSetCDF: {len(added)} new or re-versioned files, and {len(removed)} files gone, "
+            f"since '{preprocessed_path}' was written"
+        )
+        return self._update_preprocessed(
+            preprocessed_path,
+            spans=[sources[name] for name in added] + [tuple(sources_previous[name]) for name in removed]
+        )
+
+    def _read_source_rows(self, measurement: str, start: int, stop: int) -> ndarray:
+        """
+        Reads a block of time rows of a measurement from the datafiles that contain them,
+        with the background subtracted and the conversion factor applied.
+
+        :param measurement: The name of the measurement
+        :param start: The first time row to read
+        :param stop: The time row to read up to (exclusive)
+        :return: The measurement for those rows, time-major, with the receivers side by side in frequency
+        """
+        file_starts: ndarray = numpy.concatenate(([0], numpy.cumsum(self._records)))
+        blocks: List[ndarray] = []
+
+        for index in range(numpy.searchsorted(file_starts, start, side='right') - 1, len(self._cdf_paths)):
+            if file_starts[index] >= stop:
+                break
+
+            file: CDF = CDF(str(self._cdf_paths[index]))
+            record_start: int = max(start - file_starts[index], 0)
+            record_stop: int = min(stop, file_starts[index + 1]) - file_starts[index]
+            if record_stop <= record_start:
+                continue
+            if self._record_ranges:
+                # Only part of the file was read, so count from the first record that was
+                record_start += self._record_ranges[index][0]
+                record_stop += self._record_ranges[index][0]
+
+            receivers: List[ndarray] = []
+            for measure in self._config['measurements']:
+                measurement_config: dict = measure[measurement]
+                values: ndarray = numpy.array(
+                    file.varget(measurement_config['value'], startrec=record_start, endrec=record_stop - 1),
+                    dtype=float, ndmin=2
+                )
+                # The data is not background-subtracted. Background varies per frequency bin.
+                if measurement_config.get('background', None):
+                    values -= file[measurement_config['background']]
+
+                # The data may not be in the units we want, so apply the conversion factor
+                if measurement_config.get('conversion', None):
+                    values *= measurement_config['conversion']
+                receivers.append(values)
+
+            blocks.append(numpy.concatenate(receivers, axis=1))
+
+        return numpy.concatenate(blocks)
 
 # Remember to register datatypes in the datatype reader!
@@ -0,0 +1,116 @@
+"""
+Registries of the configuration files that describe each spacecraft's datafiles.
+"""
+
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional
+
+log = logging.getLogger(__name__)
+
+CONFIG_DIRECTORY: Path = Path(__file__).parent.parent.parent.parent / 'config'
+
+
+class ConfigEntry(NamedTuple):
+    """
+    A configuration file, as parsed.
+    """
+    config: dict  # The contents of the file
+    columns: FrozenSet[str]  # The columns a datafile must have for the configuration to describe it
+    mtime: int  # The modification time of the file when it was parsed, in nanoseconds
+
+
+class ConfigRegistry:
+    """
+    The configurations for one type of datafile, parsed and validated once and then cached.
+
+    The columns each configuration requires are worked out when it is parsed,
+    so checking a datafile against them is just a set comparison.
+    A configuration file is only parsed again if it has been modified since,
+    and new or deleted files are picked up each time the registry is used.
+    """
+    _directory: Path = None
+    _get_columns: Callable[[dict], List[str]] = None  # Lists the columns a configuration requires
+    _entries: Dict[str, ConfigEntry] = None  # The configurations, by name
+
+    def __init__(self, directory: Path, get_columns: Callable[[dict], List[str]], log_level: Optional[int] = None):
+        """
+        Sets up the registry. Nothing is read until it is first used.
+
+        :param directory: The directory of configuration files
+        :param get_columns: Lists the columns a configuration requires, raising KeyError if it is missing entries
+        :param log_level: The level of logging to show from this object
+        """
+        self._directory = directory
+        self._get_columns = get_columns
+        self._entries = {}
+
+        if log_level:
+            log.setLevel(log_level)
+
+    def _refresh(self) -> Dict[str, ConfigEntry]:
+        """
+        Brings the registry up to date with the directory, parsing any configuration files that are new or modified.
+
+        :raises KeyError: If a configuration file is missing entries it needs
+        :return: The configurations, by name
+        """
+        config_paths: Dict[str, Path] = {
+            config_path.stem: config_path for config_path in sorted(self._directory.glob('*.json'))
+        }
+        for config_name in set(self._entries) - set(config_paths):
+            del self._entries[config_name]
+
+        for config_name, config_path in config_paths.items():
+            mtime: int = config_path.stat().st_mtime_ns
+            entry: Optional[ConfigEntry] = self._entries.get(config_name, None)
+            if entry and entry.mtime == mtime:
+                continue
+
+            config: dict = json.loads(config_path.read_text())
+            try:
+                columns: FrozenSet[str] = frozenset(self._get_columns(config))
+            except (KeyError, TypeError) as error:
+                raise KeyError(f"Configuration file '{config_path}' is missing the entry {error}")
+
+            log.debug(f"ConfigRegistry: Parsed '{config_path}'")
+            self._entries[config_name] = ConfigEntry(config=config, columns=columns, mtime=mtime)
+
+        return self._entries
+
+    def get(self, config_name: str) -> ConfigEntry:
+        """
+        Gets a configuration by name.
+
+        :param config_name: The name of the configuration, i.e. the name of its file without the suffix
+        :raises KeyError: If there is no such configuration
+        :return: The configuration
+        """
+        entries: Dict[str, ConfigEntry] = self._refresh()
+        if config_name not in entries:
+            raise KeyError(
+                f"Requested a non-existent configuration '{config_name}'.\n"
+                f"Configurations are: {', '.join(entries.keys())}"
+            )
+        return entries[config_name]
+
+    def match(self, columns: Iterable[str]) -> Dict[str, dict]:
+        """
+        Finds the configurations that fully describe a datafile, i.e. all the columns they require are in the file.
+
+        :param columns: The columns in the datafile
+        :return: Dictionary of the matching configurations, by name
+        """
+        time_start: float = time.perf_counter()
+        entries: Dict[str, ConfigEntry] = self._refresh()
+        columns = frozenset(columns)
+        matches: Dict[str, dict] = {
+            config_name: entry.config for config_name, entry in entries.items() if entry.columns <= columns
+        }
+        log.debug(
+            f"ConfigRegistry: {len(matches)} of {len(entries)} configurations in '{self._directory}' "
+            f"describe the file, found in {(time.perf_counter() - time_start) * 1000.:.2f} ms"
+        )
+        return matches
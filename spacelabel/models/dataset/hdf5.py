@@ -1,4 +1,3 @@
-import json
 import logging
 from pathlib import Path
 from typing import Dict, Optional, List
@@ -6,12 +5,31 @@ from typing import Dict, Optional, List
 import numpy
 from astropy.time import Time
 from h5py import File
+from numpy import ndarray  # Explicit import to make Typing easier
 
 from spacelabel.models.dataset import DataSet
+from spacelabel.models.dataset.config import CONFIG_DIRECTORY, ConfigEntry, ConfigRegistry
 
 log = logging.getLogger(__name__)
 
 
+def _config_columns(config: dict) -> List[str]:
+    """
+    Lists the columns an HDF5 configuration requires a file to have.
+
+    :param config: The configuration
+    :return: The names of the columns
+    """
+    config_columns: List[str] = [config['time']['value'], config['frequency']['value']]
+    for measurement in config['measurements'].values():
+        config_columns.append(measurement['value'])
+    return config_columns
+
+
+# The configurations for HDF5 files, parsed once and kept up to date with the directory
+CONFIGS: ConfigRegistry = ConfigRegistry(CONFIG_DIRECTORY / 'hdf', _config_columns)
+
+
 class DataSetHDF5(DataSet):
     """
     Contains the data from an HDF5-format observation datafile.
@@ -35,47 +53,24 @@ class DataSetHDF5(DataSet):
         :param columns: The list of columns in the file
         :param config_name: If a config name was passed, what is it?
         """
-        configs: Dict[str, dict] = {}
-        # Scan the configs directory for entries
-        for config_file in (Path(__file__).parent.parent.parent.parent / 'config' / 'hdf').glob('*.json'):
-            configs[config_file.stem] = json.load(config_file.open())
-
         if config_name:
             # If there was a config requested, vet it!
-            if config_name not in configs.keys():
-                raise KeyError(
-                    f"Requested a non-existent configuration '{config_name}'.\n"
-                    f"Configurations are: {', '.join(configs.keys())}"
-                )
+            entry: ConfigEntry = CONFIGS.get(config_name)
 
             # Let's check the required columns from the config - do they all exist in the file?
-            config = configs[config_name]
-            config_columns = [config['time'], config['frequency']]
-            for measurement in config['measurements'].values():
-                config_columns.append(measurement['value'])
-
-            if set(config_columns) - set(columns):
+            if entry.columns - set(columns):
                 raise KeyError(
                     f"Requested configuration '{config_name}' does not describe the input file. "
-                    f"Configuration file requires columns {', '.join(config_columns)}, "
+                    f"Configuration file requires columns {', '.join(entry.columns)}, "
                     f"but the file only contains the columns {', '.join(columns)}."
                 )
             else:
-                return config
+                return entry.config
 
         else:
-            # We iterate over each of the possible configurations.
-            # Once we find one (and only one) that fully describes the input file, we accept it as the configuration.
-            valid_configs: Dict[str, Dict] = {}
-
-            for config_name, config_entry in configs.items():
-                # Let's check the required columns from the config - do they all exist in the file?
-                config_columns = [config_entry['time']['value'], config_entry['frequency']['value']]
-                for measurement in config_entry['measurements'].values():
-                    config_columns.append(measurement['value'])
-
-                if not set(config_columns) - set(columns):
-                    valid_configs[config_name] = config_entry
+            # Once we find one (and only one) configuration that fully describes the input file,
+            # we accept it as the configuration.
+            valid_configs: Dict[str, dict] = CONFIGS.match(columns)
 
             if not valid_configs:
                 raise KeyError(
@@ -117,7 +112,7 @@ class DataSetHDF5(DataSet):
             log.setLevel(log_level)
 
         # Save time so we can validate the dates
-        self._time = Time(file[self._config['time']['value']], format='jd')
+        self._set_time(Time(file[self._config['time']['value']], format='jd'))
         self._units['Time'] = self._config['time']['units']
 
         self._freq = numpy.array(file[self._config['frequency']['value']])
@@ -143,4 +138,32 @@ class DataSetHDF5(DataSet):
 
         log.info(f"DataSetHDF5: Loaded '{self._file_path}'")
 
+    def _get_source_measurements(self) -> Dict[str, str]:
+        """
+        Lists the measurements in the config file that are present in the datafile.
+
+        :return: Dictionary of the measurement names, and their units
+        """
+        measurements: Dict[str, str] = {}
+        with File(self._file_path.with_suffix('.hdf5'), 'r') as file:
+            for measurement_name, measurement in self._config['measurements'].items():
+                if measurement['value'] in file.keys():
+                    self._units[measurement_name] = measurement.get('units', '')
+                    measurements[measurement_name] = self._units[measurement_name]
+
+        return measurements
+
+    def _read_source_rows(self, measurement: str, start: int, stop: int) -> ndarray:
+        """
+        Reads a block of time rows of a measurement from the datafile.
+
+        :param measurement: The name of the measurement
+        :param start: The first time row to read
+        :param stop: The time row to read up to (exclusive)
+        :return: The measurement for those rows, time-major
+        """
+        with File(self._file_path.with_suffix('.hdf5'), 'r') as file:
+            # Transpose as the data is stored frequency-major
+            return numpy.array(file[self._config['measurements'][measurement]['value']][:, start:stop]).T
+
 # Remember to register datatypes in the datatype reader!
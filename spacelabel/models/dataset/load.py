@@ -1,36 +1,78 @@
+import inspect
 import logging
+from importlib import import_module
 
 from pathlib import Path
-from typing import Dict, Type
+from typing import Any, Dict, Optional, Tuple, Type, Union
+
+from astropy.time import Time
 
 from spacelabel.models.dataset import DataSet
-from spacelabel.models.dataset.hdf5 import DataSetHDF5
 from spacelabel.models.dataset.preprocessed import DataSetPreprocessed
-from spacelabel.models.dataset.cdf import DataSetCDF
+from spacelabel.options import POOLS
 
-# Registry of dataset file types, as 'suffix' '
-DATASET_TYPES: Dict[str, Type['DataSet']] = {
+# Registry of dataset file types, as 'suffix': class.
+# A class can be given by its 'module:class' path, so its module (and the libraries it reads files with)
+# is only imported when a file of that type is opened.
+DATASET_TYPES: Dict[str, Union[Type['DataSet'], str]] = {
     # e.g. '.csv': DataSetCSV added via modules
-    '.hdf5': DataSetHDF5,
-    '.cdf': DataSetCDF
+    '.hdf5': 'spacelabel.models.dataset.hdf5:DataSetHDF5',
+    '.cdf': 'spacelabel.models.dataset.cdf:DataSetCDF'
 }
 
 
+def get_dataset_type(suffix: str) -> Type['DataSet']:
+    """
+    Gets the class of dataset for a file type, importing it if it hasn't been yet.
+
+    :param suffix: The suffix of the file type, e.g. '.cdf'
+    :raises KeyError: If there is no dataset for the file type
+    :return: The dataset class
+    """
+    dataset_class: Union[Type['DataSet'], str] = DATASET_TYPES[suffix]
+    if isinstance(dataset_class, str):
+        module_name, class_name = dataset_class.split(':')
+        dataset_class = getattr(import_module(module_name), class_name)
+        DATASET_TYPES[suffix] = dataset_class
+    return dataset_class
+
+
+def _get_options(dataset_class: Type['DataSet'], **options: Any) -> Dict[str, Any]:
+    """
+    Picks out the options a type of dataset takes, e.g. only sets of CDF files take readers.
+
+    :param dataset_class: The dataset class
+    :param options: The options that could be passed through to it
+    :return: Those of the options its initializer accepts
+    """
+    parameters = inspect.signature(dataset_class.__init__).parameters
+    return {name: value for name, value in options.items() if name in parameters}
+
+
 def load_dataset(
         file_path: Path,
         config_name: str,
-        log_level: int = logging.INFO
+        log_level: int = logging.INFO,
+        lazy: bool = True,
+        readers: Optional[int] = None,
+        pool: str = POOLS[0],
+        time_range: Optional[Tuple[Time, Time]] = None
 ) -> DataSet:
     """
     Select the correct type of dataset from file, and load it.
 
     Needs to check to see if you've tried to open a preprocessed file,
     if not finds the file type and asks it if a preprocessed file for that file type already exists.
+    If one does, but the source files have changed since, it is updated first.
     If not, creates a new one.
 
     :param file_path: Passed through to the dataset
     :param config_name: Passed through to the dataset
     :param log_level: Passed through to the dataset
+    :param lazy: Passed through to the dataset, if it is preprocessed
+    :param readers: Passed through to the dataset, if it is a set of CDF files
+    :param pool: Passed through to the dataset, if it is a set of CDF files
+    :param time_range: Passed through to the dataset, if it is a set of CDF files without a preprocessed file
     :return: The initialized dataset
     """
 
@@ -38,20 +80,32 @@ def load_dataset(
         return DataSetPreprocessed(
             file_path=file_path,
             config_name=None,
-            log_level=log_level
+            log_level=log_level,
+            lazy=lazy
         )
     else:
-        dataset_class = DATASET_TYPES[file_path.suffix]
+        dataset_class: Type['DataSet'] = get_dataset_type(file_path.suffix)
         preprocessed_file = dataset_class.exists_preprocessed(file_path)
+        if preprocessed_file and dataset_class.is_preprocessed_outdated(file_path, preprocessed_file):
+            # New data has arrived since it was written, so process just that into it
+            dataset_class(
+                file_path=file_path,
+                config_name=config_name,
+                log_level=log_level,
+                **_get_options(dataset_class, readers=readers, pool=pool)
+            ).update_preprocessed(preprocessed_file)
+
         if preprocessed_file:
             return DataSetPreprocessed(
                 file_path=preprocessed_file,
                 config_name=None,
-                log_level=log_level
+                log_level=log_level,
+                lazy=lazy
             )
         else:
             return dataset_class(
                 file_path=file_path,
                 config_name=config_name,
-                log_level=log_level
+                log_level=log_level,
+                **_get_options(dataset_class, readers=readers, pool=pool, time_range=time_range)
             )
@@ -1,11 +1,11 @@
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Union
 
 import numpy
-from astropy.time import Time
-from h5py import File
+from h5py import File, Dataset, Group
+from numpy import ndarray
 
-from spacelabel.models.dataset import DataSet
+from spacelabel.models.dataset import DataSet, HistogramStatistics, PyramidLevel
 from spacelabel.models.dataset.hdf5 import log
 
 
@@ -14,7 +14,13 @@ class DataSetPreprocessed(DataSet):
     Dataset intended for reading in pre-processed HDF5 datafiles saved out by the code.
 
     Preprocessing the frequencies by rescaling the range can take several minutes on slow computers.
+
+    By default the file is read lazily: it is kept open, and only the rows in each requested time window are read.
+    The time axis is kept as Julian dates, and only made into astropy Times for each window.
     """
+    _file: Optional[File] = None  # The open file, if reading lazily
+    _lazy: bool = True
+
     @staticmethod
     def exists_preprocessed(file_path: Path) -> Path:
         """
@@ -28,7 +34,8 @@ class DataSetPreprocessed(DataSet):
             self,
             file_path: Path,
             config_name: Optional[str] = None,
-            log_level: Optional[int] = None
+            log_level: Optional[int] = None,
+            lazy: bool = True
     ):
         """
         Sets up a datafile for reading.
@@ -36,26 +43,50 @@ class DataSetPreprocessed(DataSet):
         :param file_path: The path to the file
         :param config: The configuration file to use, if any
         :param log_level: The level of logging to show from this object
+        :param lazy: Whether to read the data from file as it is requested, rather than all into memory on load
         """
         super().__init__(
             file_path=file_path.with_suffix('').with_suffix(''), config_name=config_name, log_level=log_level
         )
+        self._lazy = lazy
 
-        file: File = File(file_path)
-        self._time = Time(file['Time'], format='jd')
-        self._observer = file.attrs['observer']
+        with File(file_path, 'r') as file:
+            # The times are stored as Julian dates, so they can be used as the time index directly,
+            # and only the parts of the time axis in each window need making into astropy Times
+            self._set_time(None, numpy.array(file['Time'], dtype=float))
+            self._observer = file.attrs['observer']
 
         if log_level:
             log.setLevel(log_level)
 
+    @staticmethod
+    def _open_dataset(dataset: Dataset) -> Union[Dataset, ndarray]:
+        """
+        Gives access to a dataset in the file without reading it into memory.
+
+        Contiguous, uncompressed datasets, which are the time series, are memory-mapped directly.
+        The measurements are written in compressed chunks, so they are left as HDF5 datasets,
+        which read and decompress just the chunks holding the rows that are sliced from them.
+
+        :param dataset: The dataset in the open file
+        :return: The memory-mapped array, or the dataset itself
+        """
+        offset: Optional[int] = dataset.id.get_offset()
+        if dataset.chunks is None and dataset.compression is None and offset is not None:
+            return numpy.memmap(
+                dataset.file.filename, dtype=dataset.dtype, mode='r', offset=offset, shape=dataset.shape
+            )
+        else:
+            return dataset
+
     def load(self):
         """
         Similar to the deferred load from HDF5, but uses configuration as loaded from file.
         """
         super().load()
 
-        log.info(f"DataSetPreprocessed: Loading '{self._file_path}.preprocessed.hdf5'...")
-        file: File = File(self._file_path.with_suffix('.preprocessed.hdf5'))
+        log.info(f"DataSetPreprocessed: {'Opening' if self._lazy else 'Loading'} '{self._file_path}.preprocessed.hdf5'...")
+        file: File = File(self._file_path.with_suffix('.preprocessed.hdf5'), 'r')
 
         names: List[str] = list(file.keys())
 
@@ -64,39 +95,87 @@ class DataSetPreprocessed(DataSet):
         self._units['Frequency'] = file['Frequency'].attrs['units']
 
         names.remove('Time')
-        self._time = Time(file['Time'], format='jd')
         self._units['Time'] = file['Time'].attrs['units']
         self._units_1d['Time'] = file['Time'].attrs['units']
-        
-        
-        
-        
-        
+
+        self._pyramid = []
+        if 'Pyramid' in names:
+            names.remove('Pyramid')
+            # The levels are named by their decimation factor, so sort them numerically from finest to coarsest
+            for factor, level in sorted(file['Pyramid'].items(), key=lambda item: int(item[0])):
+                self._pyramid.append(self._load_pyramid_level(int(factor), level))
+
+        self._statistics = {}
+        if 'Statistics' in names:
+            names.remove('Statistics')
+            # The histograms are small, so are always read into memory
+            for name, dataset in file['Statistics'].items():
+                self._statistics[name] = HistogramStatistics(
+                    edges=numpy.array(dataset.attrs['edges']), block_size=int(dataset.attrs['block_size']),
+                    blocks=numpy.array(dataset), total=numpy.array(dataset.attrs['total'])
+                )
+
         for name in names:
             # KEY DIFFERENCE TO NORMAL HDF5 READIN: We don't transpose here, as the preprocessed datasets are time major
-            if len(numpy.array(file[name]).shape) == 2:
-                self._data[name] = numpy.array(file[name])
-                self._units[name] = file[name].attrs['units']
-            elif len(numpy.array(file[name]).shape) == 1:
-                self._data_1d[name] = numpy.array(file[name])
-                self._units_1d[name] = file[name].attrs['units']
+            dataset: Dataset = file[name]
+            values: Union[Dataset, ndarray] = self._open_dataset(dataset) if self._lazy else numpy.array(dataset)
+
+            if dataset.ndim == 2:
+                self._data[name] = values
+                self._units[name] = dataset.attrs['units']
+            elif dataset.ndim == 1:
+                self._data_1d[name] = values
+                self._units_1d[name] = dataset.attrs['units']
             else:
-                raise ValueError(f"Data of dimension {numpy.array(file[name]).shape} is not supported.")
-                
-                
-                
-                
-                
+                raise ValueError(f"Data of dimension {dataset.shape} is not supported.")
+
+        if self._lazy:
+            self._file = file
+        else:
+            file.close()
+
+    def _load_pyramid_level(self, factor: int, level: Group) -> PyramidLevel:
+        """
+        Reads one level of the display pyramid from the file, lazily or not as the rest of the file is.
+
+        :param factor: The decimation factor of the level
+        :param level: The group in the file holding the level
+        :return: The level
+        """
+        data: Dict[str, Dict[str, Union[Dataset, ndarray]]] = {}
+        data_1d: Dict[str, Dict[str, Union[Dataset, ndarray]]] = {}
+        for reduction, group in level.items():
+            if reduction == 'Time':
+                continue
+            data[reduction] = {}
+            data_1d[reduction] = {}
+            for name, dataset in group.items():
+                values: Union[Dataset, ndarray] = self._open_dataset(dataset) if self._lazy else numpy.array(dataset)
+                if dataset.ndim == 2:
+                    data[reduction][name] = values
+                else:
+                    data_1d[reduction][name] = values
+
+        return PyramidLevel(
+            factor=factor, time_index=numpy.array(level['Time'], dtype=float), data=data, data_1d=data_1d
+        )
+
     def preprocess(
             self,
             frequency_resolution: Optional[int] = None,
-            time_minimum: Optional[float] = None
+            time_minimum: Optional[float] = None,
+            frequency_method: Optional[str] = None,
+            time_method: Optional[str] = None,
+            chunk_size: Optional[int] = None,
+            workers: Optional[int] = None,
+            pyramid: bool = True
     ):
         """
         As this file is already preprocessed, do nothing unless the user
         This does nothing, unless the user has tried to specify pre-processing settings.
+        A chunk size, number of workers or pyramid setting is ignored, as they do not change the preprocessed data.
         """
-        if frequency_resolution or time_minimum:
+        if frequency_resolution or time_minimum or frequency_method or time_method:
             raise ValueError(
                 f"preprocess: This file has already been pre-processed!\n"
                 f"Please delete the pre-processed save file '{self._file_path}.preprocessed.hdf5' "
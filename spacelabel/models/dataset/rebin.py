@@ -0,0 +1,377 @@
+"""
+Vectorised rebinning of measurements onto new frequency and time grids.
+
+Rather than interpolating each time row individually, the mapping from the original frequency channels onto the
+target channels is built once as a (source x target) weight matrix, and applied to blocks of time rows at a time
+as a single matrix product.
+
+Time is downsampled by reducing all the samples falling in each time bin, for all frequency channels at once.
+As the time axis is sorted, each bin is a contiguous run of rows, so this is linear in the number of samples.
+
+For display, the preprocessed data can also be decimated into a pyramid of progressively coarser levels,
+so that a wide time window can be drawn from a level with about as many samples as there are pixels to show them.
+Histograms of each block of time are kept too, so the dynamic range of any window can be estimated without
+sorting the data in it.
+"""
+
+import logging
+import warnings
+from typing import List, Optional, Tuple
+
+import numpy
+from numpy import ndarray  # Explicit import to make Typing easier
+
+from spacelabel.options import FREQUENCY_METHODS, TIME_METHODS
+
+log = logging.getLogger(__name__)
+
+REBIN_BLOCK_SIZE: int = 4096  # Number of time rows to rebin in each matrix product
+
+# The reductions stored at each level of the display pyramid.
+# The 'mean' keeps the sign of signed measurements, and the 'max' the peaks of log-scaled ones.
+PYRAMID_REDUCTIONS: Tuple[str, ...] = ('mean', 'max')
+PYRAMID_FACTOR: int = 4  # Decimation factor between successive levels of the pyramid
+PYRAMID_MINIMUM: int = 1024  # No level is made shorter than this many samples
+
+HISTOGRAM_BINS: int = 256  # Number of bins in log10 of the values in each histogram
+STATISTICS_BLOCK_SIZE: int = 1024  # Number of time samples in each block of time that has its own histogram
+
+
+def _bin_edges(centres: ndarray) -> ndarray:
+    """
+    Estimates the edges of a set of logarithmically-spaced bins from their centres.
+
+    :param centres: The bin centres, increasing
+    :return: The bin edges, one longer than the centres
+    """
+    log_centres: ndarray = numpy.log10(centres)
+    if len(log_centres) == 1:
+        return 10 ** numpy.array([log_centres[0] - 0.5, log_centres[0] + 0.5])
+
+    midpoints: ndarray = (log_centres[1:] + log_centres[:-1]) / 2.
+    return 10 ** numpy.concatenate(
+        (
+            [log_centres[0] - (midpoints[0] - log_centres[0])],
+            midpoints,
+            [log_centres[-1] + (log_centres[-1] - midpoints[-1])]
+        )
+    )
+
+
+def frequency_weights(
+        freq_original: ndarray,
+        freq_rescaled: ndarray,
+        method: str = 'interpolate'
+) -> ndarray:
+    """
+    Builds the matrix that maps measurements on the original frequency channels onto the rescaled channels.
+
+    :param freq_original: The original frequency channels, increasing
+    :param freq_rescaled: The target frequency channels, increasing
+    :param method: One of FREQUENCY_METHODS
+    :raises ValueError: If the method is not known
+    :return: Weight matrix of shape (original, rescaled). Columns of a target bin with no source data are all zero.
+    """
+    freq_original = numpy.asarray(freq_original, dtype=float)
+    freq_rescaled = numpy.asarray(freq_rescaled, dtype=float)
+    weights: ndarray = numpy.zeros((len(freq_original), len(freq_rescaled)), dtype=float)
+    columns: ndarray = numpy.arange(len(freq_rescaled))
+
+    if method == 'interpolate':
+        if len(freq_original) == 1:
+            weights[0, :] = 1.
+            return weights
+
+        # Find the channel below each target, and how far it is towards the next channel up.
+        # Outside of the original range, `numpy.interp` holds the end values, so we do the same.
+        lower: ndarray = numpy.clip(
+            numpy.searchsorted(freq_original, freq_rescaled, side='right') - 1, 0, len(freq_original) - 2
+        )
+        fraction: ndarray = numpy.clip(
+            (freq_rescaled - freq_original[lower]) / (freq_original[lower + 1] - freq_original[lower]), 0., 1.
+        )
+        weights[lower, columns] = 1. - fraction
+        weights[lower + 1, columns] += fraction
+
+    elif method == 'average':
+        # Each source channel contributes in proportion to how much of its bandwidth overlaps the target bin
+        edges_original: ndarray = _bin_edges(freq_original)
+        edges_rescaled: ndarray = _bin_edges(freq_rescaled)
+        overlap: ndarray = (
+            numpy.minimum(edges_original[1:, None], edges_rescaled[None, 1:]) -
+            numpy.maximum(edges_original[:-1, None], edges_rescaled[None, :-1])
+        ).clip(min=0.)
+        total: ndarray = overlap.sum(axis=0)
+        weights[:, total > 0] = overlap[:, total > 0] / total[total > 0]
+
+    else:
+        raise ValueError(
+            f"Unknown frequency rebinning method '{method}'. Methods are: {', '.join(FREQUENCY_METHODS)}"
+        )
+
+    return weights
+
+
+def rebin_frequency(
+        values: ndarray,
+        weights: ndarray,
+        block_size: int = REBIN_BLOCK_SIZE,
+        out: Optional[ndarray] = None
+) -> ndarray:
+    """
+    Applies a frequency weight matrix to a time-major measurement, a block of time rows at a time.
+
+    NaN values only affect the target bins they contribute to, as with `numpy.interp`.
+    Target bins with no contributing channels are NaN.
+
+    :param values: The measurement, of shape (time, original frequency)
+    :param weights: The weight matrix from `frequency_weights`
+    :param block_size: The number of time rows to process in each block
+    :param out: An array of shape (time, rescaled frequency) to write the output to, if any
+    :return: The rebinned measurement, of shape (time, rescaled frequency)
+    """
+    if out is None:
+        out = numpy.empty((values.shape[0], weights.shape[1]), dtype=float)
+
+    # A NaN would spoil the whole row of the product, so keep track of which target bins each channel feeds
+    contributes: ndarray = (weights > 0.).astype(float)
+    empty: ndarray = ~contributes.any(axis=0)
+
+    for start in range(0, values.shape[0], block_size):
+        block: ndarray = numpy.asarray(values[start:start + block_size], dtype=float)
+        block_out: ndarray = out[start:start + block_size]
+        numpy.matmul(block, weights, out=block_out)
+
+        rows_invalid: ndarray = numpy.isnan(block).any(axis=1)
+        if rows_invalid.any():
+            invalid: ndarray = numpy.isnan(block[rows_invalid])
+            rows_out: ndarray = numpy.where(invalid, 0., block[rows_invalid]) @ weights
+            rows_out[(invalid @ contributes) > 0.] = numpy.nan
+            block_out[rows_invalid] = rows_out
+
+    out[:, empty] = numpy.nan
+    return out
+
+
+def _is_data(values: ndarray, positive_only: bool) -> ndarray:
+    """
+    Works out which values of a measurement count as data, rather than fill.
+
+    :param values: The measurement
+    :param positive_only: Whether only positive values count, as for measurements drawn on a log scale
+    :return: Whether each value counts
+    """
+    if positive_only:
+        with numpy.errstate(invalid='ignore'):
+            return numpy.isfinite(values) & (values > 0.)
+    return numpy.isfinite(values)
+
+
+def time_bins(time_start: float, time_end: float, width: float) -> Tuple[ndarray, ndarray]:
+    """
+    Builds a regular grid of time bins covering a time range.
+
+    :param time_start: The first time in the range. This is the centre of the first bin.
+    :param time_end: The last time in the range, which will fall in the last bin
+    :param width: The width of each bin, in the same units as the times
+    :return: The centres of the time bins, and their edges (one longer than the centres)
+    """
+    n_bins: int = int(numpy.floor((time_end - time_start) / width + 0.5)) + 1
+    centres: ndarray = time_start + numpy.arange(n_bins) * width
+    edges: ndarray = time_start + (numpy.arange(n_bins + 1) - 0.5) * width
+    return centres, edges
+
+
+def downsample_time(
+        time: ndarray,
+        values: ndarray,
+        edges: ndarray,
+        method: str = 'mean',
+        positive_only: bool = True
+) -> ndarray:
+    """
+    Reduces the samples of a measurement falling into each time bin, for all frequency channels at once.
+
+    Only finite values are counted as data. For log-scaled measurements, only positive values are,
+    as zero is used as fill; signed measurements count negative values too, so they keep their sign.
+    Bins with no data (e.g. in gaps) are left as NaN, rather than being interpolated across.
+
+    :param time: The time of each sample, sorted
+    :param values: The measurement, of shape (time) or (time, frequency)
+    :param edges: The edges of the time bins, from `time_bins`
+    :param method: One of TIME_METHODS
+    :param positive_only: Whether only positive values count as data, as for measurements drawn on a log scale
+    :raises ValueError: If the method is not known
+    :return: The downsampled measurement, of shape (bins) or (bins, frequency)
+    """
+    if method not in TIME_METHODS:
+        raise ValueError(f"Unknown time downsampling method '{method}'. Methods are: {', '.join(TIME_METHODS)}")
+
+    # Each bin is a contiguous run of samples, so we just need to know where each run starts and stops
+    bounds: ndarray = numpy.searchsorted(time, edges, side='left')
+    first, last = bounds[0], bounds[-1]
+    values = numpy.asarray(values[first:last], dtype=float)
+    starts: ndarray = bounds[:-1] - first
+    counts_rows: ndarray = numpy.diff(bounds)
+
+    out: ndarray = numpy.full((len(counts_rows),) + values.shape[1:], numpy.nan)
+    if not len(values):
+        return out
+
+    valid: ndarray = _is_data(values, positive_only)
+
+    if method == 'median':
+        # Bins with the same number of samples are stacked and reduced together. Each sample is in one stack,
+        # so memory stays in proportion to the measurement however unevenly the samples are spread between bins
+        values = numpy.where(valid, values, numpy.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)  # All-NaN bins are expected in gaps
+            for count in numpy.unique(counts_rows[counts_rows > 0]).tolist():
+                bins: ndarray = numpy.flatnonzero(counts_rows == count)
+                out[bins] = numpy.nanmedian(values[starts[bins, None] + numpy.arange(count)], axis=1)
+        return out
+
+    # `reduceat` needs every index to be in range, and treats empty bins oddly, so reduce only the occupied bins
+    occupied: ndarray = counts_rows > 0
+    counts: ndarray = numpy.add.reduceat(valid, starts[occupied], axis=0)
+
+    if method == 'mean':
+        reduced: ndarray = numpy.add.reduceat(numpy.where(valid, values, 0.), starts[occupied], axis=0)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            reduced = reduced / counts
+    else:
+        reduced: ndarray = numpy.maximum.reduceat(numpy.where(valid, values, -numpy.inf), starts[occupied], axis=0)
+
+    reduced[counts == 0] = numpy.nan
+    out[occupied] = reduced
+    return out
+
+
+def rebin_block(
+        values: ndarray,
+        time: Optional[ndarray] = None,
+        edges: Optional[ndarray] = None,
+        weights: Optional[ndarray] = None,
+        time_method: str = 'mean',
+        positive_only: bool = True
+) -> ndarray:
+    """
+    Downsamples the time and then rebins the frequency of a block of a measurement, as preprocessing does.
+
+    :param values: The measurement, of shape (time, original frequency)
+    :param time: The time of each row, if downsampling time
+    :param edges: The edges of the time bins this block covers, if downsampling time
+    :param weights: The weight matrix from `frequency_weights`, if rebinning frequency
+    :param time_method: One of TIME_METHODS
+    :param positive_only: Whether only positive values count as data when downsampling time
+    :return: The processed block
+    """
+    if edges is not None:
+        values = downsample_time(time, values, edges, method=time_method, positive_only=positive_only)
+    if weights is not None:
+        values = rebin_frequency(values, weights)
+    return numpy.asarray(values, dtype=float)
+
+
+def pyramid_factors(n_samples: int, factor: int = PYRAMID_FACTOR, minimum: int = PYRAMID_MINIMUM) -> List[int]:
+    """
+    Works out the levels of the display pyramid for a measurement.
+
+    :param n_samples: The number of time samples in the measurement
+    :param factor: The decimation factor between successive levels
+    :param minimum: The smallest number of samples to make a level with
+    :return: The number of the original samples combined into each sample of each level, from finest to coarsest
+    """
+    factors: List[int] = []
+    while -(-n_samples // (factor ** (len(factors) + 1))) >= minimum:
+        factors.append(factor ** (len(factors) + 1))
+    return factors
+
+
+def decimate(values: ndarray, factors: List[int], positive_only: bool = True) -> List[Tuple[ndarray, ndarray]]:
+    """
+    Decimates a block of a measurement onto each level of the display pyramid, by blocks of consecutive samples.
+
+    Values are counted as data as in `downsample_time`. Each level is built from the sums, counts and maxima
+    of the level below, so the block is only passed over once.
+    If the block is not the last in the measurement, its length should be a multiple of the coarsest factor.
+
+    :param values: The measurement, of shape (time) or (time, frequency)
+    :param factors: The factors of each level, from `pyramid_factors`
+    :param positive_only: Whether only positive values count as data, as for measurements drawn on a log scale
+    :return: The mean and the max of the measurement at each level
+    """
+    values = numpy.asarray(values, dtype=float)
+    valid: ndarray = _is_data(values, positive_only)
+    total: ndarray = numpy.where(valid, values, 0.)
+    count: ndarray = valid.astype(numpy.int64)
+    peak: ndarray = numpy.where(valid, values, -numpy.inf)
+
+    levels: List[Tuple[ndarray, ndarray]] = []
+    previous: int = 1
+    for factor in factors:
+        # Each level combines runs of samples from the level below, the last run of which may be short
+        starts: ndarray = numpy.arange(0, len(total), factor // previous)
+        total = numpy.add.reduceat(total, starts, axis=0)
+        count = numpy.add.reduceat(count, starts, axis=0)
+        peak = numpy.maximum.reduceat(peak, starts, axis=0)
+        previous = factor
+
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            mean: ndarray = total / count
+        levels.append((mean, numpy.where(count > 0, peak, numpy.nan)))
+
+    return levels
+
+
+def histogram_edges(value_min: float, value_max: float, bins: int = HISTOGRAM_BINS) -> ndarray:
+    """
+    Works out the edges of histogram bins covering a range of positive values, evenly spaced in log.
+
+    :param value_min: The smallest value to cover, positive
+    :param value_max: The largest value to cover, positive
+    :param bins: The number of bins
+    :return: The edges of the bins, in log10 of the values
+    """
+    log_min: float = numpy.floor(numpy.log10(value_min))
+    log_max: float = numpy.ceil(numpy.log10(value_max))
+    return numpy.linspace(log_min, max(log_max, log_min + 1.), bins + 1)
+
+
+def block_histograms(values: ndarray, edges: ndarray, block_size: int = STATISTICS_BLOCK_SIZE) -> ndarray:
+    """
+    Counts the positive, finite values of each block of time samples of a measurement into histogram bins.
+
+    :param values: The measurement, of shape (time) or (time, frequency)
+    :param edges: The edges of the bins, in log10 of the values, from `histogram_edges`
+    :param block_size: The number of time samples in each block
+    :return: The counts, of shape (blocks, bins). The last block may be short.
+    """
+    values = numpy.asarray(values, dtype=float)
+    bins: int = len(edges) - 1
+    blocks: int = -(-len(values) // block_size)
+
+    valid: ndarray = _is_data(values, positive_only=True)
+    block_of_value: ndarray = numpy.broadcast_to(
+        (numpy.arange(len(values)) // block_size).reshape((-1,) + (1,) * (values.ndim - 1)), values.shape
+    )[valid]
+    bin_of_value: ndarray = numpy.clip(
+        numpy.searchsorted(edges, numpy.log10(values[valid]), side='right') - 1, 0, bins - 1
+    )
+    return numpy.bincount(block_of_value * bins + bin_of_value, minlength=blocks * bins).reshape(blocks, bins)
+
+
+def histogram_quantiles(counts: ndarray, edges: ndarray, fractions: List[float]) -> ndarray:
+    """
+    Estimates quantiles of the values counted in a histogram, assuming they are spread evenly in log across each bin.
+    The error is at most one bin width.
+
+    :param counts: The number of values in each bin
+    :param edges: The edges of the bins, in log10 of the values
+    :param fractions: The quantiles to estimate, between 0 and 1
+    :return: The estimated values at the quantiles, or NaN if the histogram is empty
+    """
+    cumulative: ndarray = numpy.concatenate(([0], numpy.cumsum(counts)))
+    if not cumulative[-1]:
+        return numpy.full(len(fractions), numpy.nan)
+    return 10 ** numpy.interp(numpy.asarray(fractions) * cumulative[-1], cumulative, edges)
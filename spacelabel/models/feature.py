@@ -1,13 +1,12 @@
 import logging
 
-import numpy
-
 from astropy.time import Time
 from numpy import ndarray
-from shapely.geometry import LinearRing
-from shapely.geometry import Polygon,box
 
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from spacelabel.models.catalogue import FeatureCatalogue
 
 log = logging.getLogger(__name__)
 
@@ -15,34 +14,28 @@ log = logging.getLogger(__name__)
 class Feature:
     """
     A named 'feature' from the observational data, which is described by a polygon on the time-frequency plane.
+
+    This is a lightweight handle onto the feature's entry in the catalogue it belongs to,
+    which holds the vertexes of all the features together.
     """
-    _name: str = None
-    _time: Time = None
-    _freq: ndarray = None
-    _id: int = None
-#    _ax_data: Dict[str, Axes] = None
-
-    def __init__(
-            self, name: str,
-            vertexes: List[Tuple[Time, float]],
-            feature_id: int,
-            log_level: Optional[int] = None
-    ):
+    __slots__ = ('_catalogue', '_id')
+
+    def __init__(self, catalogue: 'FeatureCatalogue', feature_id: int):
         """
         Initialize the feature.
 
-        :param name: The name of the feature
-        :param vertexes: The time-frequency pairs of the vertexes defining it
+        :param catalogue: The catalogue holding the feature
         :param feature_id: The internal ID number for the feature
-        :param log_level: The level of logging to show. Inherited from DataSet
         """
-        self._name = name
+        self._catalogue = catalogue
         self._id = feature_id
-        self._time = Time([vertex[0] for vertex in vertexes])
-        self._freq = numpy.array([vertex[1] for vertex in vertexes])
 
-        if log_level:
-            log.setLevel(log_level)
+    @property
+    def name(self) -> str:
+        """
+        :return: The name of the feature
+        """
+        return self._catalogue.get_name(self._id)
 
     def cropping(
                     vertexes: List[Tuple[Time, float]],
@@ -54,6 +47,9 @@ class Feature:
         :param bbox: The bounds of the plotting window, as [T_min, freq_min, T_max, freq_max]
         """
 
+        # Imported here as Shapely is only needed when drawing features in the GUI
+        from shapely.geometry import Polygon, box
+
         coordinates = [
             (time.unix,freq) for time,freq in zip(list(zip(*vertexes))[0], list(zip(*vertexes))[1])
         ]
@@ -74,40 +70,8 @@ class Feature:
 
         :return: A string containing the feature name, and its maximum and minimum bounds in the time-frequency plane
         """
-        return f"{self._name}, {min(self._time)}, {max(self._time)}, {min(self._freq)}, {max(self._freq)}"
-
-    def to_tfcat_dict(
-            self
-    ) -> dict:
-        """
-        Expresses the polygon in the form of a dictionary containing a TFCat feature.
-
-        :return: A dictionary. Times are returned as Unix time, not calendar time
-        """
-
-
-        coordinates = [
-            (time.unix, freq) for time, freq in zip(self._time, self._freq)
-        ]
-
-
-        # TFcat format is counter-clockwise, so invert if our co-ordinates are not
-        if not LinearRing(coordinates).is_ccw:
-            coordinates = coordinates[::-1]
-
-        return {
-            "type": "Feature",
-            "id": self._id,
-            "geometry": {
-                "type": "Polygon",
-                "coordinates": [
-                    coordinates
-                ]
-            },
-            "properties": {
-                "feature_type": self._name
-            }
-        }
+        time, freq = self.arrays()
+        return f"{self.name}, {min(time)}, {max(time)}, {min(freq)}, {max(freq)}"
 
     def is_in_time_range(self, time_start: Time, time_end: Time) -> bool:
         """
@@ -115,9 +79,10 @@ class Feature:
 
         :param time_start: The start of the time range (inclusive)
         :param time_end: The end of the time range (inclusive)
-        :return: Whether the time range contains any part of this feature
+        :return: Whether the time range contains any part of this feature, including if it spans the whole range
         """
-        return (time_start <= self._time.min() <= time_end) or (time_start <= self._time.max() <= time_end)
+        time, _ = self.arrays_unix()
+        return time.min() <= time_end.unix and time.max() >= time_start.unix
 
     def vertexes(self) -> List[Tuple[Time, float]]:
         """
@@ -125,16 +90,23 @@ class Feature:
 
         :return: List of vertexes as (time, frequency)
         """
-        return [
-            (time, freq) for time, freq in zip(self._time, self._freq)
-        ]
+        return list(zip(*self.arrays()))
 
     def arrays(self) -> Tuple[Time, ndarray]:
         """
         Returns the arrays of the poly co-ordinates
 
-        :return: The co-ordinates in seperated arrays
+        :return: The co-ordinates in seperated arrays, with the times as Julian dates
         """
-        return (
-            self._time, self._freq
-        )
+        time, freq = self.arrays_unix()
+        time = Time(time, format='unix')
+        time.format = 'jd'
+        return time, freq
+
+    def arrays_unix(self) -> Tuple[ndarray, ndarray]:
+        """
+        Returns the arrays of the poly co-ordinates, without converting the times to astropy Time.
+
+        :return: The co-ordinates in seperated arrays, with the times as Unix time
+        """
+        return self._catalogue.get_arrays(self._id)
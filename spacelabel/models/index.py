@@ -0,0 +1,214 @@
+import logging
+
+import numpy
+from numpy import ndarray
+from typing import Any, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+
+class _Block:
+    """
+    A fixed set of bounding boxes, sorted by start time, with a segment tree over them.
+
+    Each node of the tree holds the latest end, highest top and lowest bottom of the run of boxes below it,
+    so a query only descends into runs that could overlap its window, and whole runs that end before it
+    or lie outside its frequency range are skipped without looking at their boxes.
+    """
+    starts: ndarray = None  # The start time of each box, sorted
+    ends: ndarray = None
+    bottoms: ndarray = None
+    tops: ndarray = None
+    items: List[Any] = None
+    _leaves: int = 1  # The number of leaves of the tree, the size of the block rounded up to a power of two
+    _end_max: ndarray = None  # The latest end under each node of the tree, with the root at 1
+    _top_max: ndarray = None  # The highest top under each node of the tree
+    _bottom_min: ndarray = None  # The lowest bottom under each node of the tree
+
+    def __init__(self, starts: ndarray, ends: ndarray, bottoms: ndarray, tops: ndarray, items: List[Any]):
+        """
+        Sorts the boxes by start time, keeping boxes that start together in the order given, and builds the tree.
+
+        :param starts: The start of each box
+        :param ends: The end of each box
+        :param bottoms: The bottom of each box
+        :param tops: The top of each box
+        :param items: The item of each box
+        """
+        order: ndarray = numpy.argsort(starts, kind='stable')
+        self.starts = numpy.asarray(starts, dtype=float)[order]
+        self.ends = numpy.asarray(ends, dtype=float)[order]
+        self.bottoms = numpy.asarray(bottoms, dtype=float)[order]
+        self.tops = numpy.asarray(tops, dtype=float)[order]
+        self.items = [items[position] for position in order.tolist()]
+
+        self._leaves = 1 << (len(order) - 1).bit_length()
+        self._end_max = self._build(self.ends, -numpy.inf, numpy.maximum)
+        self._top_max = self._build(self.tops, -numpy.inf, numpy.maximum)
+        self._bottom_min = self._build(self.bottoms, numpy.inf, numpy.minimum)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _build(self, values: ndarray, padding: float, combine: numpy.ufunc) -> ndarray:
+        """
+        Builds one tree level at a time from the leaves up.
+
+        :param values: The value of each box
+        :param padding: The value of the leaves past the last box, which no query should descend into
+        :param combine: How to combine the values of two children
+        :return: The tree, with the children of node i at 2i and 2i + 1
+        """
+        tree: ndarray = numpy.full(2 * self._leaves, padding)
+        tree[self._leaves:self._leaves + len(values)] = values
+        width: int = self._leaves
+        while width > 1:
+            tree[width // 2:width] = combine(tree[width:2 * width:2], tree[width + 1:2 * width:2])
+            width //= 2
+        return tree
+
+    def query(self, time_start: float, time_end: float, freq_min: float, freq_max: float) -> List[int]:
+        """
+        Finds the boxes that overlap a window.
+
+        :param time_start: The start of the window (inclusive)
+        :param time_end: The end of the window (inclusive)
+        :param freq_min: The bottom of the window (inclusive)
+        :param freq_max: The top of the window (inclusive)
+        :return: The positions of the boxes in the block, in order of start time
+        """
+        last: int = int(numpy.searchsorted(self.starts, time_end, side='right'))
+        found: List[int] = []
+        pending: List[Tuple[int, int, int]] = [(1, 0, self._leaves)]  # Each node to visit, and the boxes under it
+        while pending:
+            node, first, stop = pending.pop()
+            if first >= last \
+                    or self._end_max[node] < time_start \
+                    or self._top_max[node] < freq_min \
+                    or self._bottom_min[node] > freq_max:
+                continue
+            if stop - first == 1:
+                found.append(first)
+            else:
+                middle: int = (first + stop) // 2
+                pending.append((2 * node + 1, middle, stop))
+                pending.append((2 * node, first, middle))
+        return found
+
+
+class FeatureIndex:
+    """
+    An index of the bounding boxes of features in time and frequency, for finding those in a window quickly.
+
+    The boxes are held in a few blocks, each sorted by start time with a segment tree over it (see `_Block`),
+    so a query takes O(log n) steps per box found, however long the features are.
+    A new box starts a block of its own, and blocks are merged whenever the newest is as big as the one before,
+    so there are never more than log n blocks and adding a box costs O(log² n) over time.
+    """
+    _blocks: List[_Block] = None  # From the biggest, holding the earliest boxes added, to the smallest
+
+    def __init__(self, log_level: Optional[int] = None):
+        """
+        Initializes an empty index.
+
+        :param log_level: The level of logging to show from this object
+        """
+        self._blocks = []
+
+        if log_level:
+            log.setLevel(log_level)
+
+    def __len__(self) -> int:
+        return sum(len(block) for block in self._blocks)
+
+    def add(self, item: Any, time_start: float, time_end: float, freq_min: float, freq_max: float):
+        """
+        Adds an item's bounding box to the index.
+
+        :param item: The item, e.g. the ID of a feature
+        :param time_start: The start of the box, as Unix time
+        :param time_end: The end of the box, as Unix time
+        :param freq_min: The bottom of the box
+        :param freq_max: The top of the box
+        """
+        self._merge(
+            numpy.array([time_start]), numpy.array([time_end]), numpy.array([freq_min]), numpy.array([freq_max]),
+            [item]
+        )
+
+    def extend(
+            self, items: List[Any], time_start: ndarray, time_end: ndarray, freq_min: ndarray, freq_max: ndarray
+    ):
+        """
+        Adds many items' bounding boxes to the index at once, sorting them all together rather than one at a time.
+
+        :param items: The items, e.g. the IDs of features
+        :param time_start: The start of each box, as Unix time
+        :param time_end: The end of each box, as Unix time
+        :param freq_min: The bottom of each box
+        :param freq_max: The top of each box
+        """
+        if not len(items):
+            return
+        self._merge(time_start, time_end, freq_min, freq_max, list(items), merge_all=True)
+
+    def _merge(
+            self, time_start: ndarray, time_end: ndarray, freq_min: ndarray, freq_max: ndarray, items: List[Any],
+            merge_all: bool = False
+    ):
+        """
+        Adds boxes to the index as a new block, merged with the newest blocks until the one before is bigger.
+
+        :param time_start: The start of each box
+        :param time_end: The end of each box
+        :param freq_min: The bottom of each box
+        :param freq_max: The top of each box
+        :param items: The item of each box
+        :param merge_all: Whether to merge every block into the new one
+        """
+        merged: List[_Block] = []
+        count: int = len(items)
+        while self._blocks and (merge_all or len(self._blocks[-1]) <= count):
+            merged.insert(0, self._blocks.pop())
+            count += len(merged[0])
+        if merged:
+            # Older boxes first, so boxes starting together stay in the order they were added
+            time_start = numpy.concatenate([block.starts for block in merged] + [time_start])
+            time_end = numpy.concatenate([block.ends for block in merged] + [time_end])
+            freq_min = numpy.concatenate([block.bottoms for block in merged] + [freq_min])
+            freq_max = numpy.concatenate([block.tops for block in merged] + [freq_max])
+            items = [item for block in merged for item in block.items] + items
+        self._blocks.append(_Block(time_start, time_end, freq_min, freq_max, items))
+
+    def query(
+            self, time_start: float, time_end: float,
+            freq_min: Optional[float] = None, freq_max: Optional[float] = None
+    ) -> List[Any]:
+        """
+        Finds the items whose bounding boxes overlap a window, including any that span the whole window.
+
+        :param time_start: The start of the window, as Unix time (inclusive)
+        :param time_end: The end of the window, as Unix time (inclusive)
+        :param freq_min: The bottom of the window, if limited in frequency (inclusive)
+        :param freq_max: The top of the window, if limited in frequency (inclusive)
+        :return: The items, in order of start time
+        """
+        freq_min = -numpy.inf if freq_min is None else freq_min
+        freq_max = numpy.inf if freq_max is None else freq_max
+
+        found: List[Tuple[float, Any]] = []
+        for block in self._blocks:
+            found.extend(
+                (block.starts[position], block.items[position])
+                for position in block.query(time_start, time_end, freq_min, freq_max)
+            )
+        if len(self._blocks) > 1:
+            # Sorting is stable, and the blocks are in the order their boxes were added
+            found.sort(key=lambda start_item: start_item[0])
+        return [item for _, item in found]
+
+    def clear(self):
+        """
+        Removes all the items from the index.
+        """
+        self._blocks.clear()
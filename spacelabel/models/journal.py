@@ -0,0 +1,110 @@
+import json
+import logging
+import os
+
+import numpy
+from numpy import ndarray
+from pathlib import Path
+from typing import IO, List, Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+
+class CatalogueJournal:
+    """
+    An append-only log of the features added to a catalogue since it was last saved.
+
+    Each feature is written as one line of JSON, and flushed to disk before `append` returns,
+    so no labelled feature is lost if the program is killed before saving.
+    Once the catalogue has been saved in full, the journal is cleared.
+    Every entry carries its feature ID, so entries already in the saved catalogue can be skipped when replaying
+    if the program stopped between saving the catalogue and clearing the journal.
+    """
+    _path: Path = None
+    _file: Optional[IO] = None  # Opened on the first append
+    _entries: int = 0  # The number of entries in the journal
+
+    def __init__(self, path: Path, log_level: Optional[int] = None):
+        """
+        Sets up the journal. Nothing is opened or created until an entry is appended.
+
+        :param path: The path to the journal file
+        :param log_level: The level of logging to show from this object
+        """
+        self._path = path
+
+        if log_level:
+            log.setLevel(log_level)
+
+    def __len__(self) -> int:
+        return self._entries
+
+    def replay(self) -> List[Tuple[int, str, List[List[float]]]]:
+        """
+        Reads back the entries in the journal. A last line cut off part-way through writing is removed.
+
+        :return: The feature ID, name and vertexes as [Unix time, frequency] of each entry
+        """
+        if not self._path.exists():
+            return []
+
+        entries: List[Tuple[int, str, List[List[float]]]] = []
+        length_complete: int = 0  # The length of the file up to the end of the last complete entry
+        with open(self._path, 'rb') as file_journal:
+            for line in file_journal:
+                try:
+                    entry: dict = json.loads(line)
+                except json.decoder.JSONDecodeError:
+                    log.warning(f"replay: Skipping an incomplete entry in '{self._path}'")
+                    break
+                entries.append((entry['id'], entry['feature_type'], entry['coordinates']))
+                length_complete += len(line)
+
+        # Cut off anything incomplete, so new entries don't get appended onto the end of it
+        if length_complete < self._path.stat().st_size:
+            os.truncate(self._path, length_complete)
+
+        self._entries = len(entries)
+        log.info(f"replay: Read {len(entries)} features from '{self._path}'")
+        return entries
+
+    def append(self, feature_id: int, name: str, time: ndarray, freq: ndarray):
+        """
+        Writes a new feature to the end of the journal, and waits for it to reach the disk.
+
+        :param feature_id: The ID of the feature in the catalogue
+        :param name: The name of the feature
+        :param time: The times of its vertexes, as Unix time
+        :param freq: The frequencies of its vertexes
+        """
+        if not self._file:
+            self._file = open(self._path, 'a')
+
+        self._file.write(
+            json.dumps(
+                {
+                    'id': feature_id, 'feature_type': name,
+                    'coordinates': numpy.column_stack((time, freq)).tolist()
+                }
+            ) + '\n'
+        )
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._entries += 1
+
+    def clear(self):
+        """
+        Empties the journal, once the features in it have been saved to the catalogue.
+        """
+        self.close()
+        if self._path.exists():
+            self._path.unlink()
+        self._entries = 0
+
+    def close(self):
+        """
+        Closes the journal file, if it's open.
+        """
+        if self._file:
+            self._file.close()
+            self._file = None
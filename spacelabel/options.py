@@ -0,0 +1,34 @@
+"""
+The choices and defaults of the command-line options, and the settings shared by the models and views.
+
+These are kept apart from the models, views and presenters that use them, and free of any heavy imports,
+so the command line can be parsed (and `-h` shown) without loading the scientific and GUI libraries.
+"""
+from typing import Dict, Tuple
+
+# The methods available for rebinning frequency:
+#   'interpolate': Linear interpolation between the neighbouring channels, as `numpy.interp`.
+#   'average': The bandwidth-weighted mean of the channels overlapping each target bin (flux-conserving).
+FREQUENCY_METHODS: Tuple[str, ...] = ('interpolate', 'average')
+
+# The methods available for reducing the samples in each time bin
+TIME_METHODS: Tuple[str, ...] = ('mean', 'median', 'max')
+
+# How the colour scale of a log measurement is set:
+#   'window': From the dynamic range of the time window shown.
+#   'global': From the dynamic range of the whole dataset, so it's the same on every page.
+NORMALISATIONS: Tuple[str, ...] = ('window', 'global')
+
+# The kinds of pool the files can be read over:
+#   'thread': Threads in this process. Cheap to start, but share the interpreter while parsing.
+#   'process': Separate processes. Slower to start, but scale with the number of cores.
+POOLS: Tuple[str, ...] = ('thread', 'process')
+
+PREFETCH_DEPTH: int = 1  # Default number of windows either side of the current one to fetch in the background
+
+# We default to assuming measurements should be logarithmically scaled. This can be overridden here for names.
+# Log-scaled measurements only count positive values as data, as zero is used as fill;
+# the rest can be negative, so count every finite value.
+SHOULD_MEASUREMENT_BE_LOG: Dict[str, bool] = {
+    "Degree of polarization": False
+}
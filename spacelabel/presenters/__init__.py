@@ -1,19 +1,28 @@
 import logging
 
 from astropy.time import Time, TimeDelta
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from numpy import datetime64
+from numpy import datetime64, ndarray
+from threading import Event
 from typing import List, Optional, Tuple, Dict
 import numpy
-from shapely.geometry import Polygon,box
+from spacelabel.models.cache import WindowCache, CACHE_SIZE_DEFAULT, BYTES_PER_MEGABYTE
 from spacelabel.models.dataset import DataSet
 from spacelabel.models.feature import Feature
+from spacelabel.views import SHOULD_MEASUREMENT_BE_LOG
 from spacelabel.views.matplotlib import ViewMatPlotLib
+from spacelabel.options import NORMALISATIONS, PREFETCH_DEPTH
 
 OVERLAP_FRACTION = 0.25  # Default fraction of window to use as overlap when panning through data
+PREFETCH_WORKERS = 2  # Number of threads to fetch windows in the background with
 
 log = logging.getLogger(__name__)
 
+# Everything needed to draw a window: time, frequency, data, 1D data, features and colour limits
+Window = Tuple[Time, ndarray, Dict[str, ndarray], Dict[str, ndarray], List[Feature], Dict[str, Tuple[float, float]]]
+WindowKey = Tuple[float, float, Tuple[str, ...], int]  # Start and end Julian dates, measurements and resolution
+
 
 class Presenter:
     """
@@ -32,20 +41,40 @@ class Presenter:
     _frequency_guide: Optional[List[float]] = None
     _measurements: Optional[List[str]] = None
     _measurements_1d: Optional[List[str]] = None
+    _prefetch_depth: int = PREFETCH_DEPTH
+    _normalisation: str = NORMALISATIONS[0]
+    _executor: Optional[ThreadPoolExecutor] = None
+    _prefetched: Dict[WindowKey, Tuple[Future, Event]] = None  # Windows fetching in the background
+    _cache: Optional[WindowCache] = None  # Windows already fetched
+
     def __init__(
             self,
             dataset: DataSet, view: ViewMatPlotLib, measurements: Optional[List[str]] = None,
-            log_level: Optional[int] = None
+            log_level: Optional[int] = None,
+            prefetch_depth: int = PREFETCH_DEPTH,
+            cache_size: float = CACHE_SIZE_DEFAULT,
+            normalisation: str = NORMALISATIONS[0]
     ):
         """
         Initializes the presenter with the dataset and view it links
         :param dataset: The dataset
         :param view: The view handler
         :param measurements: The measurements to plot from the dataset
+        :param prefetch_depth: How many windows either side of the one shown to fetch in the background, 0 for none
+        :param cache_size: The memory budget for keeping windows already fetched, in megabytes, 0 for none
+        :param normalisation: Whether the colour scale covers the dynamic range of the window shown,
+            or of the whole dataset, one of NORMALISATIONS
         """
         self._dataset = dataset
         self._view = view
         self._measurements = measurements
+        self._prefetch_depth = prefetch_depth
+        self._normalisation = normalisation
+        self._prefetched = {}
+        if prefetch_depth > 0:
+            self._executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix='prefetch')
+        if cache_size > 0:
+            self._cache = WindowCache(size_max=int(cache_size * BYTES_PER_MEGABYTE), log_level=log_level)
         dataset.register_presenter(self)
         view.register_presenter(self)
         if log_level:
@@ -58,6 +87,13 @@ class Presenter:
         Runs the software
         """
         self._view.run()
+        self.cancel_prefetch()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+
+        # Features added since the last save are safe in the journal, but fold them into the catalogue files on exit
+        if self._dataset.has_unsaved_features():
+            self.request_save()
 
 
     def register_feature(self, vertexes: List[Tuple[Time, float]], name: str, crop_to_bounds: bool = False) -> Feature:
@@ -69,7 +105,17 @@ class Presenter:
         """
         
         vertexes = Feature.cropping(vertexes, self._dataset.get_bbox(self._time_start, self._time_end))
-        return self._dataset.add_feature(name=name, vertexes=vertexes)
+        feature: Feature = self._dataset.add_feature(name=name, vertexes=vertexes)
+
+        # The windows already fetched may overlap the new feature, so fetch them again. Any being fetched are
+        # cancelled first, so one that read the features before this was added doesn't stay in the cache
+        self.cancel_prefetch()
+        if self._cache:
+            time_feature: Time = feature.arrays()[0]
+            jd_start, jd_end = time_feature.jd.min(), time_feature.jd.max()
+            self._cache.discard(lambda key: key[0] <= jd_end and jd_start <= key[1])
+        self._prefetch(self._time_start, self._time_end)
+        return feature
 
     def request_measurements(self):
         """
@@ -123,16 +169,17 @@ class Presenter:
         self._thickness_features = thickness_features
         self._size_features_name = size_features_name
 
-        time, freq, data = self._dataset.get_data_for_time_range(
-            time_start, time_end, measurements=self._measurements
-        )
-        time, data_1d = self._dataset.get_1d_data_for_time_range(
-            time_start, time_end, measurements=self._measurements_1d
-        )
-        
-        features: List[Feature] = self._dataset.get_features_for_time_range(
-            time_start, time_end
+        # There's no point fetching more time samples than the figure is wide in pixels.
+        # The full resolution data is only fetched if the user zooms in far enough.
+        resolution: int = self._view.get_resolution(fig_size)
+        prefetched: Optional[Tuple[Future, Event]] = self._prefetched.pop(
+            self._window_key(time_start, time_end, resolution), None
         )
+        if prefetched and not prefetched[0].cancelled():
+            log.debug("request_data_time_range: Using window fetched in the background")
+            time, freq, data, data_1d, features, color_limits = prefetched[0].result()
+        else:
+            time, freq, data, data_1d, features, color_limits = self._fetch_window(time_start, time_end, resolution)
 
         self._view.draw_data(
             time, freq, data, self._dataset.get_units(), # data from the preprocessed file
@@ -143,10 +190,179 @@ class Presenter:
             color_features = self._color_features,
             thickness_features = self._thickness_features,
             size_features_name = self._size_features_name,
-            features=features
+            features=features,
+            color_limits=color_limits
         )
+        self._prefetch(time_start, time_end)
         
-        log.debug(f"request_data_time_range: Complete")
+        if self._cache:
+            log.debug(f"request_data_time_range: Complete, window cache {self.get_cache_stats()}")
+        else:
+            log.debug(f"request_data_time_range: Complete")
+
+    def _fetch_window(
+            self, time_start: Time, time_end: Time, resolution: int, cancelled: Optional[Event] = None
+    ) -> Optional[Window]:
+        """
+        Fetches everything needed to draw a time window, from the cache if it's been fetched before
+        or from the dataset if not. Runs on the prefetch threads as well as the GUI thread, so only reads
+        from the dataset through its getters, which guard the features and statistics the GUI thread changes.
+
+        :param time_start: The start of the time window
+        :param time_end: The end of the time window
+        :param resolution: The number of pixels the window will be drawn across
+        :param cancelled: If fetching in the background, set when the window is no longer wanted
+        :return: The time, frequency, data, 1D data, features and colour limits, or None if cancelled part-way
+        """
+        key: WindowKey = self._window_key(time_start, time_end, resolution)
+        if self._cache:
+            window: Optional[Window] = self._cache.get(key)
+            if window:
+                return window
+
+        time, freq, data = self._dataset.get_data_for_time_range(
+            time_start, time_end, measurements=self._measurements, resolution=resolution, reduction=self._get_reductions()
+        )
+        if cancelled and cancelled.is_set():
+            return None
+
+        time, data_1d = self._dataset.get_1d_data_for_time_range(
+            time_start, time_end, measurements=self._measurements_1d, resolution=resolution
+        )
+        if cancelled and cancelled.is_set():
+            return None
+
+        features: List[Feature] = self._dataset.get_features_for_time_range(
+            time_start, time_end
+        )
+
+        # The colour scale of log measurements covers the chosen fraction of the dynamic range
+        color_limits: Dict[str, Tuple[float, float]] = self._dataset.get_dynamic_range(
+            time_start, time_end, self._frac_dyn_range,
+            measurements=[
+                measurement for measurement in data.keys() if SHOULD_MEASUREMENT_BE_LOG.get(measurement, True)
+            ],
+            normalisation=self._normalisation
+        )
+
+        window: Window = (time, freq, data, data_1d, features, color_limits)
+        if self._cache:
+            self._cache.put(
+                key, window,
+                size=time.jd1.nbytes + time.jd2.nbytes + freq.nbytes + sum(
+                    values.nbytes for values in list(data.values()) + list(data_1d.values())
+                )
+            )
+            if cancelled and cancelled.is_set():
+                # Cancelled while it was being fetched, perhaps as a feature was added to it, so may be out of date
+                self._cache.discard(lambda cached: cached == key)
+        return window
+
+    def _get_reductions(self) -> Dict[str, str]:
+        """
+        Picks how to combine the samples of each measurement when there are more of them than pixels.
+        Log-scaled measurements take the max, so short, bright features aren't averaged away;
+        linear ones, which may be signed, take the mean, so their negative values aren't lost.
+
+        :return: Dictionary of the measurement names, and their reduction, one of PYRAMID_REDUCTIONS
+        """
+        return {
+            measurement: 'max' if SHOULD_MEASUREMENT_BE_LOG.get(measurement, True) else 'mean'
+            for measurement in (self._measurements or self._dataset.get_measurement_names())
+        }
+
+    def _window_key(self, time_start: Time, time_end: Time, resolution: int) -> WindowKey:
+        """
+        Identifies a window, to the nearest millisecond or so.
+        """
+        return round(time_start.jd, 8), round(time_end.jd, 8), tuple(self._measurements or ()), resolution
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        """
+        Reports how well the window cache is working, for tuning its size.
+
+        :return: The number of cache hits, misses and entries, and the memory used and budget in bytes
+        """
+        return self._cache.get_stats() if self._cache else {}
+
+    def _prefetch(self, time_start: Time, time_end: Time, overlap_fraction: float = OVERLAP_FRACTION):
+        """
+        Starts fetching the windows either side of the one shown in the background,
+        so moving to them only costs drawing them. Any windows being fetched that aren't next to this one are
+        cancelled, e.g. if the user has jumped elsewhere.
+
+        :param time_start: The start of the time window shown
+        :param time_end: The end of the time window shown
+        :param overlap_fraction: Fraction of the window to overlap with the next and previous windows
+        """
+        if not self._executor:
+            return
+
+        resolution: int = self._view.get_resolution(self._fig_size)
+        step: timedelta = (time_end - time_start) * (1.0 - overlap_fraction)
+        windows: Dict[WindowKey, Tuple[Time, Time]] = {}
+        for depth in range(1, self._prefetch_depth + 1):
+            # Step one window at a time, exactly as `request_data_next` and `request_data_prev` will
+            time_next, time_prev = (time_start, time_end), (time_start, time_end)
+            for _ in range(depth):
+                time_next = (time_next[0] + step, time_next[1] + step)
+                time_prev = (time_prev[0] - step, time_prev[1] - step)
+            for window in (time_next, time_prev):
+                windows[self._window_key(*window, resolution)] = window
+
+        for key in list(self._prefetched.keys()):
+            if key not in windows:
+                self._cancel(self._prefetched.pop(key))
+
+        for key, (window_start, window_end) in windows.items():
+            if key not in self._prefetched and not (self._cache and key in self._cache):
+                cancelled: Event = Event()
+                self._prefetched[key] = (
+                    self._executor.submit(self._fetch_window, window_start, window_end, resolution, cancelled),
+                    cancelled
+                )
+        log.debug(f"_prefetch: Fetching {len(self._prefetched)} windows in the background")
+
+    @staticmethod
+    def _cancel(prefetched: Tuple[Future, Event]):
+        """
+        Cancels fetching a window in the background. If it's already started, it stops at the next step.
+        """
+        future, cancelled = prefetched
+        cancelled.set()
+        future.cancel()
+
+    def cancel_prefetch(self):
+        """
+        Cancels fetching any windows in the background.
+        """
+        for prefetched in self._prefetched.values():
+            self._cancel(prefetched)
+        self._prefetched = {}
+        log.debug("cancel_prefetch: Complete")
+
+    def request_data_zoom(self, time_start: Time, time_end: Time):
+        """
+        Handles requests from the view to redraw the data for the time range it's zoomed or panned to.
+        As with the whole window, the data is fetched at the resolution it's drawn at,
+        so zooming in reveals the detail lost when the window was drawn.
+
+        :param time_start: The start of the time range shown
+        :param time_end: The end of the time range shown
+        """
+        resolution: int = self._view.get_resolution(self._fig_size)
+        time, freq, data = self._dataset.get_data_for_time_range(
+            time_start, time_end, measurements=self._measurements, resolution=resolution, reduction=self._get_reductions()
+        )
+        time, data_1d = self._dataset.get_1d_data_for_time_range(
+            time_start, time_end, measurements=self._measurements_1d, resolution=resolution
+        )
+        if len(time) < 2:
+            log.debug("request_data_zoom: Not enough data in the time range to draw")
+            return
+
+        self._view.update_data(time, freq, data, data_1d)
+        log.debug("request_data_zoom: Complete")
 
     def request_data_next(self, overlap_fraction: float = OVERLAP_FRACTION):
         """
@@ -187,7 +403,3 @@ class Presenter:
             frequency_guide=self._frequency_guide
         )
         log.debug("request_data_prev: Complete")
-
-
-    
-        
\ No newline at end of file
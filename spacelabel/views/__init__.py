@@ -7,17 +7,13 @@ from astropy.time import Time
 from numpy import ndarray  # Imported separately for ease of Typing
 
 from spacelabel.models.feature import Feature
+from spacelabel.options import SHOULD_MEASUREMENT_BE_LOG
 
 if TYPE_CHECKING:
     from spacelabel.presenters import Presenter
 
 log = logging.getLogger(__name__)
 
-# We default to assuming measurements should be logarithmically scaled. This can be overridden here for names.
-SHOULD_MEASUREMENT_BE_LOG = {
-    "Degree of polarization": False
-}
-
 
 class View(ABC):
     """
@@ -64,13 +60,30 @@ class View(ABC):
             color_features: str,
             thickness_features: float,
             size_features_name: float,
-            features: Optional[List[Feature]]
+            features: Optional[List[Feature]],
+            color_limits: Optional[Dict[str, Tuple[float, float]]] = None
     ):
         """
         Abstract method to draw the data and features provided
         """
         pass
         
+    @abstractmethod
+    def get_resolution(self, fig_size: Tuple[float, float]) -> int:
+        """
+        Abstract method to get how many pixels wide the data is drawn, so no more data than can be shown is requested
+        """
+        pass
+
+    @abstractmethod
+    def update_data(
+            self, time: Time, freq: ndarray, data: Dict[str, ndarray], data_1d: Dict[str, ndarray]
+    ):
+        """
+        Abstract method to redraw the data in the visible time range (e.g. after zooming), leaving the rest as it is
+        """
+        pass
+
     @abstractmethod
     def draw_1d_data(
             self, time: Time, data: Dict[str, ndarray],
@@ -1,19 +1,24 @@
 import logging
 import platform
 import textwrap
-from typing import Tuple, Dict, Optional, List
+from abc import ABC, abstractmethod
+from time import perf_counter
+from typing import Any, Tuple, Dict, Optional, List
 
 import matplotlib
 import numpy
 
 from astropy.time import Time
-from astropy.time import Time as astropyTime
-from easygui import multchoicebox, enterbox
+from matplotlib.artist import Artist
 from matplotlib.axes import Axes
-from matplotlib.backend_bases import MouseEvent
+from matplotlib.backend_bases import DrawEvent, MouseEvent, TimerBase
+from matplotlib.cm import ScalarMappable
+from matplotlib.colorbar import Colorbar
 from matplotlib.colors import LogNorm
-from matplotlib.dates import DateFormatter, num2julian
+from matplotlib.dates import DateFormatter, date2num, get_epoch
 from matplotlib.figure import Figure
+from matplotlib.image import AxesImage
+from matplotlib.lines import Line2D
 from matplotlib.pyplot import ion, figure, close, pause, show, plot, axes
 from matplotlib.widgets import PolygonSelector, Button, CheckButtons
 from numpy import ndarray
@@ -26,7 +31,225 @@ log = logging.getLogger(__name__)
 #FIGURE_SIZE: Tuple[float, float] = (15, 9)
 FONT_SIZE: float = 12.0
 FONT_SIZE_LARGE: float = 14.0
-USE_BLIT: bool = False  # When true, we get 1-5 second delays between *any* action
+USE_BLIT: bool = True  # Draw polygons over cached backgrounds, rather than redrawing the data for every vertex
+AXES_DATA_WIDTH: float = 0.80  # Width of the data axes, as a fraction of the figure width
+ZOOM_DELAY: int = 300  # Milliseconds to wait after the user stops zooming or panning before fetching the data
+REGULAR_TOLERANCE: float = 1e-3  # Fraction of a bin the spacing of a grid can vary by, and still count as regular
+
+
+class Renderer(ABC):
+    """
+    Draws a measurement on a time-frequency grid onto a set of axes.
+    """
+    @staticmethod
+    @abstractmethod
+    def draw(
+            axis: Axes, time: ndarray, freq: ndarray, values: ndarray, cmap: str, norm: Optional[LogNorm]
+    ) -> ScalarMappable:
+        """
+        Draws the measurement.
+
+        :param axis: The axes to draw on, with a log frequency axis
+        :param time: The time of each sample, as numpy datetimes
+        :param freq: The frequency bins
+        :param values: The measurement, frequency-major
+        :param cmap: The colour map to use
+        :param norm: The colour scale to use, or None to scale automatically
+        :return: The artist drawn
+        """
+        pass
+
+
+class MeshRenderer(Renderer):
+    """
+    Draws each cell of the grid as its own quadrilateral. Works for any grid, but is slow for large ones.
+    """
+    @staticmethod
+    def draw(
+            axis: Axes, time: ndarray, freq: ndarray, values: ndarray, cmap: str, norm: Optional[LogNorm]
+    ) -> ScalarMappable:
+        return axis.pcolormesh(time, freq, values, cmap=cmap, norm=norm, shading='auto', zorder=0)
+
+
+class ImageRenderer(Renderer):
+    """
+    Draws the grid as a single image, stretched over the axes. Much faster than a mesh,
+    but only possible when the time bins are evenly spaced and the frequency bins evenly spaced in log,
+    as they are after preprocessing, as then each cell of the grid is the same size on the figure.
+
+    The image is laid out in log frequency, and placed on the figure by the axes' transform *after* its log scale,
+    as the log scale has already been applied. This keeps the transform affine, so the image is quick to resample.
+    """
+    @staticmethod
+    def is_regular(values: ndarray) -> bool:
+        """
+        Whether a set of bin centres are evenly spaced.
+
+        :param values: The bin centres, in order
+        :return: True if there are at least two, and their spacing varies by less than REGULAR_TOLERANCE of a bin
+        """
+        if len(values) < 2:
+            return False
+        steps: ndarray = numpy.diff(values)
+        return steps[0] != 0. and numpy.all(numpy.abs(steps - steps[0]) <= REGULAR_TOLERANCE * numpy.abs(steps[0]))
+
+    @staticmethod
+    def can_draw(time: ndarray, freq: ndarray) -> bool:
+        """
+        Whether the grid is regular enough to draw as an image.
+
+        :param time: The time of each sample, as numpy datetimes
+        :param freq: The frequency bins
+        :return: True if the grid can be drawn as an image
+        """
+        return (
+            numpy.all(freq > 0.) and
+            ImageRenderer.is_regular(date2num(time)) and ImageRenderer.is_regular(numpy.log10(freq))
+        )
+
+    @staticmethod
+    def draw(
+            axis: Axes, time: ndarray, freq: ndarray, values: ndarray, cmap: str, norm: Optional[LogNorm]
+    ) -> ScalarMappable:
+        # The image covers the outer edges of the first and last bins, half a bin beyond their centres
+        time_num: ndarray = date2num(time)
+        time_step: float = (time_num[-1] - time_num[0]) / (len(time_num) - 1)
+        freq_log: ndarray = numpy.log10(freq)
+        freq_step: float = (freq_log[-1] - freq_log[0]) / (len(freq_log) - 1)
+
+        # Created directly rather than with `imshow`, so the axes limits aren't set from the log frequency extent
+        image: AxesImage = AxesImage(
+            axis, cmap=cmap, norm=norm, origin='lower', interpolation='nearest', zorder=0,
+            extent=(
+                time_num[0] - time_step / 2., time_num[-1] + time_step / 2.,
+                freq_log[0] - freq_step / 2., freq_log[-1] + freq_step / 2.
+            )
+        )
+        image.set_data(values)
+        image.set_transform(axis.transLimits + axis.transAxes)
+
+        axis.xaxis.update_units(time)  # So the time axis is still labelled with dates
+        axis.add_image(image)
+        return image
+
+
+class BlitLayer:
+    """
+    Caches the rendered background of each data axis whenever the figure is fully drawn,
+    i.e. when the data or the axis limits change. Interactive artists like the polygon being drawn can then be
+    drawn over the cached background, without redrawing the data underneath them.
+    """
+    _axes: List[Axes] = None
+    _backgrounds: Dict[Axes, Any] = None
+
+    def __init__(self, fig: Figure, axes: List[Axes]):
+        """
+        Starts caching the backgrounds of the axes each time the figure is drawn.
+        Should be set up before anything that uses the backgrounds, so it updates them first.
+
+        :param fig: The figure
+        :param axes: The axes to cache the backgrounds of
+        """
+        self._axes = axes
+        self._backgrounds = {}
+        fig.canvas.mpl_connect('draw_event', self._event_draw)
+
+    def _event_draw(self, event: DrawEvent):
+        """
+        Triggered when the figure has been fully drawn. Copies the background of each axis.
+        """
+        if event.canvas.is_saving():
+            return  # Saving to file draws at a different resolution
+
+        self._backgrounds = {axis: event.canvas.copy_from_bbox(axis.bbox) for axis in self._axes}
+
+    def get_background(self, axis: Axes) -> Optional[Any]:
+        """
+        Gets the cached background of an axis.
+
+        :param axis: The axis
+        :return: The background, or None if the figure has not been drawn yet
+        """
+        return self._backgrounds.get(axis)
+
+
+class BlitPolygonSelector(PolygonSelector):
+    """
+    Polygon selector that draws over the backgrounds cached by a BlitLayer.
+
+    The standard selector copies its own background on every draw, which for some matplotlib versions means
+    drawing the whole figure again for every panel. This one only redraws the polygon and the line to the cursor.
+    """
+    _blit_layer: BlitLayer = None
+
+    def __init__(self, ax: Axes, onselect, blit_layer: BlitLayer, **kwargs):
+        """
+        Creates the selector.
+
+        :param ax: The axis to select on
+        :param onselect: Function called with the vertexes once the polygon is complete
+        :param blit_layer: The layer caching the background of the axis
+        """
+        self._blit_layer = blit_layer
+        super().__init__(ax, onselect, **kwargs)
+
+    def update_background(self, event: DrawEvent):
+        """
+        Triggered when the figure has been fully drawn. The background is cached by the blit layer,
+        so this just draws the polygon in progress back over the top, as it's not part of a full draw.
+        """
+        if not self.useblit or self.canvas.is_saving() or self._blit_layer.get_background(self.ax) is None:
+            return
+
+        if any(artist.get_visible() for artist in self.artists):
+            for artist in self.artists:
+                self.ax.draw_artist(artist)
+
+    def update(self):
+        """
+        Redraws the polygon in progress, over the cached background if there is one.
+        """
+        if not self.ax.get_visible():
+            return False
+
+        background: Optional[Any] = self._blit_layer.get_background(self.ax)
+        if not self.useblit or background is None:
+            self.canvas.draw_idle()
+        else:
+            self.canvas.restore_region(background)
+            for artist in self.artists:
+                self.ax.draw_artist(artist)
+            self.canvas.blit(self.ax.bbox)
+        return False
+
+    def remove(self):
+        """
+        Stops the selector responding to events, and removes its artists from the axis.
+        """
+        self.disconnect_events()
+        for artist in self.artists:
+            artist.remove()
+
+
+def _date_to_time(date: float) -> Time:
+    """
+    Converts a matplotlib date, as used for the time axis, to a Time.
+
+    :param date: The date, in days since matplotlib's epoch
+    :return: The time
+    """
+    return Time(Time(get_epoch(), format='isot').jd + date, format='jd')
+
+
+def get_renderer(time: ndarray, freq: ndarray) -> Renderer:
+    """
+    Picks the fastest way of drawing data on a grid.
+
+    :param time: The time of each sample, as numpy datetimes
+    :param freq: The frequency bins
+    :return: The image renderer for regular grids, or the mesh renderer if not
+    """
+    return ImageRenderer if ImageRenderer.can_draw(time, freq) else MeshRenderer
 
 
 class ViewMatPlotLib(View):
@@ -47,22 +270,35 @@ class ViewMatPlotLib(View):
     _color_features: str = None
     _thickness_features: float = None
     _size_features_name: float = None
-    _selector: Dict[str, PolygonSelector] = None
+    _selector: Dict[str, BlitPolygonSelector] = None
+    _blit_layer: BlitLayer = None
     _button_next: Button = None
     _button_prev: Button = None
     _button_save: Button = None
     _button_1d: Button = None
     _lines: List[plot] = None
     _labels: List[str] = None       
+    _images: Dict[str, ScalarMappable] = None
+    _colorbars: Dict[str, Colorbar] = None
+    _lines_1d: Dict[Tuple[str, str], Line2D] = None  # The 1D time series lines, by panel and series name
+    _lines_guide: List[Line2D] = None  # The frequency guide lines
+    _feature_artists: List[Artist] = None  # The outlines and names of the features drawn
+    _zoom_timer: TimerBase = None
+    _persistent: bool = True  # Whether to keep the figure when moving between windows, and just replace the data
 
 
-    def __init__(self, log_level: Optional[int] = None):
+    def __init__(self, log_level: Optional[int] = None, persistent: bool = True):
         """
         Defines the figure and canvas
+
+        :param log_level: The level of logging to show from this object
+        :param persistent: Whether to build the figure once and replace the data drawn on it when moving between
+            windows, rather than building a new figure for each window
         """
         super().__init__(log_level)
         if log_level:
             log.setLevel(log_level)
+        self._persistent = persistent
 
         ion()  # We want interactive MatPlotLib mode
 
@@ -105,7 +341,7 @@ class ViewMatPlotLib(View):
             self._ax_data[measurement] = self._fig.add_axes(
                 [
                     0.05, 0.10 + idx * height_per_measurement,  # Start location
-                    0.80, height_per_measurement,  # Size
+                    AXES_DATA_WIDTH, height_per_measurement,  # Size
                 ],
                 sharex=(None if idx == 0 else self._ax_data_bottom)
             )
@@ -127,6 +363,8 @@ class ViewMatPlotLib(View):
 
         self._button_next = Button(self._ax_next, 'Next')
         self._button_next.on_clicked(self._event_button_next)
+
+        self._blit_layer = BlitLayer(self._fig, list(self._ax_data.values()))
         log.debug("_create_canvas: Complete")
 
     def _clear_canvas(self):
@@ -135,6 +373,7 @@ class ViewMatPlotLib(View):
         Manually removes all patches, as for some reason `close(fig)` will not.
         """
         del self._selector
+        self._zoom_timer.stop()
         close(self._fig)
         del self._fig
         log.debug("_event_button_prev: Closed & deleted figure")
@@ -145,10 +384,24 @@ class ViewMatPlotLib(View):
         """
         pause(-1)
 
+    def get_resolution(self, fig_size: Tuple[float, float]) -> int:
+        """
+        Gets how many pixels wide the data axes are, or will be if they've not been drawn yet.
+
+        :param fig_size: The size of the figure, in inches
+        :return: The width of the data axes, in pixels
+        """
+        if self._ax_data:
+            return int(max(axis.bbox.width for axis in self._ax_data.values()))
+        else:
+            return int(fig_size[0] * AXES_DATA_WIDTH * matplotlib.rcParams['figure.dpi'])
+
     def select_measurements(self, measurements: List[str]) -> List[str]:
         """
         Asks the user to select the measurements they'd like shown
         """
+        from easygui import multchoicebox  # Imported here, as Tk is only started when a dialog is needed
+
         return multchoicebox(
             "Please select the measurements to display",
             choices=measurements
@@ -164,6 +417,8 @@ class ViewMatPlotLib(View):
         lines = []
         labels = []
         set_visible = []
+        self._lines_1d = {}
+        self._lines_guide = []
 
 
         for i_panel in panels:
@@ -174,6 +429,7 @@ class ViewMatPlotLib(View):
 
                 p = self._ax_data[i_panel].plot(time, measurement, color = "white", linestyle = "dashed")
                 lines.append(p)
+                self._lines_1d[(i_panel, name)] = p[0]
         
         if frequency_guide:
             for i_panel in panels:
@@ -187,6 +443,7 @@ class ViewMatPlotLib(View):
                 
                     p = self._ax_data[i_panel].plot(time, numpy.repeat(float(value), len(time)), color = "white", linestyle = "dashed", visible=True)
                     lines.append(p)
+                    self._lines_guide.append(p[0])
 
         self._labels = labels
         set_visible = set_visible
@@ -220,7 +477,8 @@ class ViewMatPlotLib(View):
             color_features: str,
             thickness_features: float,
             size_features_name: float,
-            features: Optional[List[Feature]]
+            features: Optional[List[Feature]],
+            color_limits: Optional[Dict[str, Tuple[float, float]]] = None
     ):
         """
         Renders a batch of data on the plot.
@@ -229,8 +487,17 @@ class ViewMatPlotLib(View):
         :param data:
         :param units:
         :param features: Features in the data time range, if any
+        :param color_limits: The colour scale limits of the log measurements, if already known
         """
+        draw_start: float = perf_counter()
         self._fig_size = fig_size
+        if self._persistent and self._fig is not None and set(data.keys()) == set(self._ax_data.keys()):
+            self._redraw_data(time, freq, data, data_1d, frac_dyn_range, features, color_limits)
+            log.debug(
+                f"draw_data: Complete [{len(freq)}x{len(time)}], redrawn in {perf_counter() - draw_start:.3f}s"
+            )
+            return
+
         self._create_canvas(list(data.keys()), )
 
 
@@ -240,24 +507,18 @@ class ViewMatPlotLib(View):
 
         # Convert the time from Astropy Time to numpy datetimes, which matplotlib can take in
         time = time.datetime64
+        self._images = {}
+        self._colorbars = {}
+        self._feature_artists = []
+        renderer: Renderer = get_renderer(time, freq)
         
         for measurement, values in data.items():
-            if not SHOULD_MEASUREMENT_BE_LOG.get(measurement, True):
-                norm: Optional[LogNorm] = None
-            else:
-                vmin: float = numpy.quantile(values[values > 0.], frac_dyn_range[0])
-                vmax: float = numpy.quantile(values[values > 0.], frac_dyn_range[-1])
-                norm: Optional[LogNorm] = LogNorm(vmin=vmin, vmax=vmax)
-            
-
-            image = self._ax_data[measurement].pcolormesh(
-                # Clip to avoid white spots, transpose as data is time-major not frequency-major
-                time, freq, values.clip(min=1e-31).T if SHOULD_MEASUREMENT_BE_LOG.get(measurement, True) else values.T,
+            image = renderer.draw(
+                self._ax_data[measurement], time, freq, self._image_values(measurement, values),
                 cmap=color_map if SHOULD_MEASUREMENT_BE_LOG.get(measurement, True) else 'coolwarm',
-                norm=norm,
-                shading='auto'
+                norm=self._get_norm(measurement, values, frac_dyn_range, color_limits)
             )
-            
+            self._images[measurement] = image
 
             self._ax_data[measurement].set_xlim(time[0], time[-1])
             self._ax_data[measurement].set_ylim(freq[0]-0.1*freq[0], freq[-1]+0.1*freq[-1]) # Frequency limits enlarge, to be able to draw polygon on the edge of the plotting window
@@ -285,6 +546,7 @@ class ViewMatPlotLib(View):
                 cax=self._ax_cbar[measurement],
                 ax=self._ax_data[measurement]
             )
+            self._colorbars[measurement] = cb
 
             # Add on the units if there are any, then text wrap to 18-character lines
             cb.set_label(
@@ -309,10 +571,143 @@ class ViewMatPlotLib(View):
             self._draw_features(features, color_features, thickness_features, size_features_name)
 
         self._create_polyselector(color_features)
+
+        # Zooming or panning changes the x-axis limits of every axis, as they share it, so we only need to watch one
+        self._zoom_timer = self._fig.canvas.new_timer(interval=ZOOM_DELAY)
+        self._zoom_timer.single_shot = True
+        self._zoom_timer.add_callback(self._event_zoomed)
+        self._ax_data[self._measurement_bottom].callbacks.connect('xlim_changed', self._event_xlim_changed)
+
         # self._fig.show()
         show()  # `fig.show()` doesn't work
 
-        log.debug(f"draw_data: Complete [{len(freq)}x{len(time)}]")
+        log.debug(f"draw_data: Complete [{len(freq)}x{len(time)}], drawn in {perf_counter() - draw_start:.3f}s")
+
+    def _redraw_data(
+            self, time: Time, freq: ndarray, data: Dict[str, ndarray], data_1d: Dict[str, ndarray],
+            frac_dyn_range: Dict[float, float], features: Optional[List[Feature]],
+            color_limits: Optional[Dict[str, Tuple[float, float]]]
+    ):
+        """
+        Replaces the data on the existing figure with a new window of data, along with the colour scales,
+        axis limits and features. The axes, buttons, colour bars and polygon selectors are kept as they are.
+
+        :param time: The time of each sample
+        :param freq: The frequency bins
+        :param data: The measurements
+        :param data_1d: The 1D time series
+        :param frac_dyn_range: The fraction of the dynamic range to show, if the colour limits aren't known
+        :param features: Features in the data time range, if any
+        :param color_limits: The colour scale limits of the log measurements, if already known
+        """
+        time = time.datetime64
+        renderer: Renderer = get_renderer(time, freq)
+
+        for measurement, values in data.items():
+            self._replace_image(
+                renderer, measurement, time, freq, values,
+                self._get_norm(measurement, values, frac_dyn_range, color_limits)
+            )
+            self._colorbars[measurement].update_normal(self._images[measurement])
+            self._ax_data[measurement].set_xlim(time[0], time[-1])
+            self._ax_data[measurement].set_ylim(freq[0]-0.1*freq[0], freq[-1]+0.1*freq[-1])
+
+        # Moving to a new window isn't a zoom, so don't fetch it again. The toolbar's 'home' should be this window.
+        self._zoom_timer.stop()
+        if self._fig.canvas.toolbar:
+            self._fig.canvas.toolbar.update()
+
+        for (_, name), line in self._lines_1d.items():
+            line.set_data(time, data_1d[name])
+        for line in self._lines_guide:
+            line.set_data([time[0], time[-1]], [line.get_ydata()[0]] * 2)
+
+        for artist in self._feature_artists:
+            artist.remove()
+        self._feature_artists = []
+        if features:
+            self._draw_features(features, self._color_features, self._thickness_features, self._size_features_name)
+
+        self._fig.canvas.draw_idle()
+
+    @staticmethod
+    def _get_norm(
+            measurement: str, values: ndarray, frac_dyn_range: Dict[float, float],
+            color_limits: Optional[Dict[str, Tuple[float, float]]]
+    ) -> Optional[LogNorm]:
+        """
+        Works out the colour scale of a measurement.
+        Log measurements cover the chosen fraction of their dynamic range, others are scaled automatically.
+
+        :param measurement: The name of the measurement
+        :param values: The measurement
+        :param frac_dyn_range: The fraction of the dynamic range to show, if the colour limits aren't known
+        :param color_limits: The colour scale limits of the log measurements, if already known
+        :return: The colour scale, or None to scale automatically
+        """
+        if not SHOULD_MEASUREMENT_BE_LOG.get(measurement, True):
+            return None
+        elif color_limits and measurement in color_limits:
+            return LogNorm(*color_limits[measurement])
+        else:
+            vmin, vmax = numpy.quantile(values[values > 0.], [frac_dyn_range[0], frac_dyn_range[-1]])
+            return LogNorm(vmin=vmin, vmax=vmax)
+
+    def _replace_image(
+            self, renderer: Renderer, measurement: str, time: ndarray, freq: ndarray, values: ndarray,
+            norm: Optional[LogNorm]
+    ):
+        """
+        Replaces the image drawn for a measurement, keeping its colour map.
+
+        :param renderer: The renderer to draw the new image with
+        :param measurement: The name of the measurement
+        :param time: The time of each sample, as numpy datetimes
+        :param freq: The frequency bins
+        :param values: The measurement
+        :param norm: The colour scale to use
+        """
+        image: ScalarMappable = self._images[measurement]
+        self._images[measurement] = renderer.draw(
+            self._ax_data[measurement], time, freq, self._image_values(measurement, values),
+            cmap=image.get_cmap(), norm=norm
+        )
+        image.remove()
+
+    @staticmethod
+    def _image_values(measurement: str, values: ndarray) -> ndarray:
+        """
+        Prepares a measurement for drawing.
+        Clips log-scaled data to avoid white spots, and transposes as data is time-major not frequency-major.
+
+        :param measurement: The name of the measurement
+        :param values: The measurement
+        :return: The values to draw
+        """
+        return values.clip(min=1e-31).T if SHOULD_MEASUREMENT_BE_LOG.get(measurement, True) else values.T
+
+    def update_data(
+            self, time: Time, freq: ndarray, data: Dict[str, ndarray], data_1d: Dict[str, ndarray]
+    ):
+        """
+        Redraws the data for the visible time range, keeping the axes limits, colour scales and features as they are.
+
+        :param time: The time of each sample
+        :param freq: The frequency bins
+        :param data: The measurements
+        :param data_1d: The 1D time series
+        """
+        time = time.datetime64
+        renderer: Renderer = get_renderer(time, freq)
+
+        for measurement, values in data.items():
+            self._replace_image(renderer, measurement, time, freq, values, self._images[measurement].norm)
+
+        for (_, name), line in self._lines_1d.items():
+            line.set_data(time, data_1d[name])
+
+        self._fig.canvas.draw_idle()
+        log.debug(f"update_data: Complete [{len(freq)}x{len(time)}]")
 
     def _draw_features(self, features: List[Feature],color_features: str, thickness_features:float, size_features_name: float):
         """
@@ -322,23 +717,24 @@ class ViewMatPlotLib(View):
         """
 
         for feature in features:
-            self._draw_fill(*feature.arrays(), feature._name, color_features, thickness_features, size_features_name)
+            self._draw_fill(*feature.arrays_unix(), feature.name, color_features, thickness_features, size_features_name)
 
         log.debug(f"_draw_features: Drawn {len(features)}")
 
-    def _draw_fill(self, time: Time, frequency: ndarray, name: str, color_features: str, thickness_features:float, size_features_name: float):
+    def _draw_fill(self, time: ndarray, frequency: ndarray, name: str, color_features: str, thickness_features:float, size_features_name: float):
         """
         Plot a single feature on the map.
 
-        :param time:
+        :param time: The times of the vertexes, as Unix time
         :param frequency:
         """
-        time_mean = astropyTime(numpy.mean(time.value),format='jd').datetime64
+        # Unix time ignores leap seconds, as datetime64 does, so it converts directly without going through astropy
+        time_datetime = (time * 1e6).astype('datetime64[us]')
+        time_mean = (numpy.mean(time) * 1e6).astype('datetime64[us]')
         frequency_mean = numpy.mean(frequency)
-        time_datetime = time.datetime64
 
         for axis in self._ax_data.values():
-            axis.fill(
+            self._feature_artists += axis.fill(
                 time_datetime, frequency,
 
                 edgecolor=color_features,
@@ -346,6 +742,7 @@ class ViewMatPlotLib(View):
                 alpha=0.75, fill=False
             )
             txt = axis.text(time_mean, frequency_mean, name, color = color_features, fontfamily = 'sans-serif', size=size_features_name)
+            self._feature_artists.append(txt)
             #txt.set_path_effects([PathEffects.withStroke(linewidth=1.25, foreground='k'),
             #           PathEffects.Normal()])
 
@@ -354,15 +751,15 @@ class ViewMatPlotLib(View):
         Generates a new polygon selector
         """
         if self._selector:
-            for selector in self._selector:
-                del selector
+            for selector in self._selector.values():
+                selector.remove()
 
         self._selector = {}
 
         for measurement, axis in self._ax_data.items():
-            self._selector[measurement] = PolygonSelector(
-                axis, onselect=self._event_selected, useblit=USE_BLIT,
-                lineprops={
+            self._selector[measurement] = BlitPolygonSelector(
+                axis, onselect=self._event_selected, blit_layer=self._blit_layer, useblit=USE_BLIT,
+                props={
                     'color': color_features, 'linestyle': '--', 'linewidth': 1.5, 'alpha': 0.75
                 }
             )
@@ -372,16 +769,37 @@ class ViewMatPlotLib(View):
         """
         Triggered when the user clicks the 'Next' button.
         """
-        self._clear_canvas()
+        if not self._persistent:
+            self._clear_canvas()
         self._presenter.request_data_next()
 
     def _event_button_prev(self, event: MouseEvent):
         """
         Triggered when the user clicks the 'Previous' button.
         """
-        self._clear_canvas()
+        if not self._persistent:
+            self._clear_canvas()
         self._presenter.request_data_prev()
 
+    def _event_xlim_changed(self, axis: Axes):
+        """
+        Triggered when the time range shown changes, e.g. as the user zooms or pans.
+        Waits until they've stopped for a moment before fetching the data, rather than for every step.
+        """
+        self._zoom_timer.stop()
+        self._zoom_timer.start()
+
+    def _event_zoomed(self):
+        """
+        Triggered once the user has stopped zooming or panning.
+        Requests the data for the time range now shown, at the resolution it's drawn at.
+        """
+        time_start, time_end = self._ax_data[self._measurement_bottom].get_xlim()
+        self._presenter.request_data_zoom(
+            time_start=_date_to_time(time_start),
+            time_end=_date_to_time(time_end)
+        )
+
     def _event_button_save(self, event: MouseEvent):
         """
         Triggered when the user clicks the 'Save' button.
@@ -395,6 +813,8 @@ class ViewMatPlotLib(View):
         and requests a name for the finished polygon (defaulting to the last one used)
         :param vertexes: The vertexes selected on the figure. Annoyingly, uses internal MatLab time.
         """
+        from easygui import enterbox  # Imported here, as Tk is only started when a dialog is needed
+
         self._feature_name = enterbox(
             "Feature Selected", "Please name your feature", self._feature_name
         )
@@ -402,13 +822,13 @@ class ViewMatPlotLib(View):
         if self._feature_name:
             vertexes_jd_format: List[Tuple[Time, float]] = [
                 (
-                    Time(num2julian(vertex[0]), format='jd'),
+                    _date_to_time(vertex[0]),
                     vertex[1] 
                 ) for vertex in vertexes
             ]
 
             feature: Feature = self._presenter.register_feature(vertexes_jd_format, self._feature_name, crop_to_bounds = True)
-            self._draw_fill(*feature.arrays(), feature._name, self._color_features, self._thickness_features, self._size_features_name) # Make sure the feature is drawn on all other panels of the plot
+            self._draw_fill(*feature.arrays_unix(), feature.name, self._color_features, self._thickness_features, self._size_features_name) # Make sure the feature is drawn on all other panels of the plot
 
             log.info(f"_event_selected: New feature '{self._feature_name}'")
 
@@ -0,0 +1,40 @@
+"""
+Shared fixtures: small synthetic datafiles in the formats the tool reads.
+"""
+from pathlib import Path
+
+import numpy
+import pytest
+from h5py import File
+from numpy import ndarray
+
+SAMPLES: int = 3000  # Time samples in the HDF5 file, 3 seconds apart
+CHANNELS: int = 40
+JD_START: float = 2453371.5  # 2005-01-01
+
+
+def write_cassini(path: Path, samples: int = SAMPLES, channels: int = CHANNELS, seed: int = 0) -> Path:
+    """
+    Writes an HDF5 file in the layout the Cassini configuration describes, with measurements frequency-major.
+
+    :param path: Where to write the file
+    :param samples: The number of time samples
+    :param channels: The number of frequency channels
+    :param seed: Seed for the random measurements
+    :return: The path to the file
+    """
+    rng = numpy.random.default_rng(seed)
+    time: ndarray = JD_START + numpy.arange(samples) * 3. / 86400.
+    with File(path, 'w') as file:
+        file['t'] = time
+        file['f'] = numpy.geomspace(3.5, 16000., channels)
+        file['s'] = 10 ** rng.normal(-20., 1., size=(channels, samples))
+        file['p'] = 10 ** rng.normal(-5., 1., size=(channels, samples))
+        # Degree of polarization is signed
+        file['v'] = rng.uniform(-1., 1., size=(channels, samples))
+    return path
+
+
+@pytest.fixture
+def cassini_file(tmp_path: Path) -> Path:
+    return write_cassini(tmp_path / 'cassini.hdf5')
@@ -0,0 +1,83 @@
+"""
+Checks the window cache keeps the most recently used windows within its memory budget.
+"""
+from spacelabel.models.cache import WindowCache
+
+
+def _key(jd_start: float, jd_end: float) -> tuple:
+    # The same layout as the presenter's window keys: start and end Julian dates, measurements and resolution
+    return jd_start, jd_end, ('Flux density',), 500
+
+
+def test_evicts_least_recently_used_by_size():
+    cache: WindowCache = WindowCache(size_max=100)
+    cache.put('a', 'A', size=40)
+    cache.put('b', 'B', size=40)
+    assert cache.get('a') == 'A'
+
+    # Over budget, so the least recently used goes first, even though it was added last
+    cache.put('c', 'C', size=40)
+    assert 'b' not in cache
+    assert cache.get('a') == 'A' and cache.get('c') == 'C'
+    assert cache.get_stats()['size'] == 80
+
+    # A big entry evicts as many as it needs to
+    cache.put('d', 'D', size=90)
+    assert 'a' not in cache and 'c' not in cache
+    assert cache.get_stats()['size'] == 90
+
+
+def test_replacing_an_entry_counts_its_new_size():
+    cache: WindowCache = WindowCache(size_max=100)
+    cache.put('a', 'A', size=40)
+    cache.put('a', 'A2', size=70)
+
+    assert cache.get('a') == 'A2'
+    assert cache.get_stats()['size'] == 70
+
+
+def test_entry_bigger_than_budget_not_cached():
+    cache: WindowCache = WindowCache(size_max=100)
+    cache.put('a', 'A', size=40)
+    cache.put('b', 'B', size=101)
+
+    assert 'b' not in cache
+    assert cache.get('a') == 'A'
+
+
+def test_hits_and_misses_counted():
+    cache: WindowCache = WindowCache(size_max=100)
+    cache.put('a', 'A', size=10)
+    cache.get('a')
+    cache.get('a')
+    cache.get('b')
+
+    assert cache.get_stats() == {'hits': 2, 'misses': 1, 'entries': 1, 'size': 10, 'size_max': 100}
+    # Checking whether something's cached doesn't count as using it
+    assert 'b' not in cache
+    assert cache.get_stats()['misses'] == 1
+
+
+def test_discard_windows_overlapping_feature():
+    cache: WindowCache = WindowCache(size_max=100)
+    for jd_start in range(5):
+        cache.put(_key(jd_start, jd_start + 1.), jd_start, size=10)
+
+    # As the presenter does when a feature is added from 2.2 to 2.5: only the window it's in, and those touching it
+    jd_feature_start, jd_feature_end = 2.2, 2.5
+    cache.discard(lambda key: key[0] <= jd_feature_end and jd_feature_start <= key[1])
+    assert [jd_start for jd_start in range(5) if _key(jd_start, jd_start + 1.) in cache] == [0, 1, 3, 4]
+    assert cache.get_stats()['size'] == 40
+
+    # Inclusive at the ends, so a feature on the boundary of two windows clears both
+    cache.discard(lambda key: key[0] <= 1. and 1. <= key[1])
+    assert [jd_start for jd_start in range(5) if _key(jd_start, jd_start + 1.) in cache] == [3, 4]
+
+
+def test_clear():
+    cache: WindowCache = WindowCache(size_max=100)
+    cache.put('a', 'A', size=10)
+    cache.clear()
+
+    assert 'a' not in cache
+    assert cache.get_stats()['size'] == 0
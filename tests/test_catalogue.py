@@ -0,0 +1,87 @@
+"""
+Checks the column-based feature catalogue against the per-feature output it replaced.
+"""
+from itertools import chain
+from typing import Dict, List
+
+import numpy
+import pytest
+from numpy import ndarray
+from shapely.geometry import LinearRing
+
+from spacelabel.models.catalogue import CAPACITY_INITIAL, FeatureCatalogue
+
+UNIX_START: float = 1.1e9  # November 2004, clear of any leap seconds for the next month
+
+
+@pytest.fixture
+def catalogue() -> FeatureCatalogue:
+    # Enough polygons to outgrow the buffers, of different sizes, drawn both ways round
+    rng = numpy.random.default_rng(10)
+    catalogue: FeatureCatalogue = FeatureCatalogue()
+    for feature_id in range(CAPACITY_INITIAL // 4):
+        vertexes: int = rng.integers(3, 12)
+        angles: ndarray = numpy.sort(rng.uniform(0., 2. * numpy.pi, vertexes))
+        if feature_id % 3:
+            angles = angles[::-1]
+        centre_time: float = UNIX_START + rng.uniform(0., 30. * 86400.)
+        centre_freq: float = 10 ** rng.uniform(1., 3.)
+        catalogue.add(
+            f'feature {feature_id % 5}',
+            time=centre_time + rng.uniform(600., 3600.) * numpy.cos(angles),
+            freq=centre_freq * (1. + 0.5 * numpy.sin(angles))
+        )
+    return catalogue
+
+
+def test_orientations_match_per_polygon(catalogue: FeatureCatalogue):
+    expected: List[bool] = [LinearRing(numpy.column_stack(feature.arrays_unix())).is_ccw for feature in catalogue]
+
+    assert not all(expected) and any(expected)
+    assert catalogue._get_orientations().tolist() == expected
+
+
+def test_tfcat_features(catalogue: FeatureCatalogue):
+    features: List[Dict] = catalogue.to_tfcat_features()
+
+    assert len(features) == len(catalogue)
+    for feature_id, (feature, original) in enumerate(zip(features, catalogue)):
+        ring: ndarray = numpy.array(feature['geometry']['coordinates'][0])
+        vertexes: ndarray = numpy.column_stack(original.arrays_unix())
+
+        assert feature['id'] == feature_id
+        assert feature['properties']['feature_type'] == original.name
+        assert LinearRing(ring).is_ccw
+        # The same vertexes, reversed if they ran clockwise
+        numpy.testing.assert_array_equal(ring, vertexes if LinearRing(vertexes).is_ccw else vertexes[::-1])
+
+
+def test_tfcat_round_trip(catalogue: FeatureCatalogue):
+    # Read back in the same way as `DataSet.load_features_from_json`
+    features: List[Dict] = catalogue.to_tfcat_features()
+    rings: List[List[List[float]]] = [feature['geometry']['coordinates'][0] for feature in features]
+    coordinates: ndarray = numpy.array(list(chain.from_iterable(rings)))
+    loaded: FeatureCatalogue = FeatureCatalogue()
+    loaded.extend(
+        names=[feature['properties']['feature_type'] for feature in features],
+        time=coordinates[:, 0], freq=coordinates[:, 1],
+        offsets=numpy.concatenate(([0], numpy.cumsum([len(ring) for ring in rings])))
+    )
+
+    assert loaded.to_tfcat_features() == features
+    assert loaded.to_text_summaries() == catalogue.to_text_summaries()
+    assert [feature.name for feature in loaded.query(UNIX_START, UNIX_START + 86400.)] == \
+        [feature.name for feature in catalogue.query(UNIX_START, UNIX_START + 86400.)]
+
+
+def test_text_summaries_match_per_feature(catalogue: FeatureCatalogue):
+    assert catalogue.to_text_summaries() == [feature.to_text_summary() for feature in catalogue]
+
+
+def test_empty_catalogue():
+    catalogue: FeatureCatalogue = FeatureCatalogue()
+
+    assert catalogue.to_tfcat_features() == []
+    assert catalogue.to_text_summaries() == []
+    with pytest.raises(IndexError):
+        catalogue[0]
@@ -0,0 +1,230 @@
+"""
+Checks reading sets of daily CDF files.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy
+import pytest
+from astropy.time import Time
+from h5py import File
+from numpy import ndarray
+
+cdflib = pytest.importorskip('cdflib')
+from cdflib import CDF  # noqa: E402
+from cdflib.cdfwrite import CDF as CDFWriter  # noqa: E402
+from cdflib.epochs import CDFepoch  # noqa: E402
+
+from spacelabel.models.dataset.cdf import CONFIGS, DataSetCDF, FileIndex  # noqa: E402
+
+DAYS: int = 3
+RECORDS: int = 360  # Records in each file, 10 seconds apart from the start of the day
+CHANNELS: int = 50
+
+
+def _write_day(path: Path, day: int, rng: numpy.random.Generator):
+    """
+    Writes a day of Juno-like data, with a background that differs from day to day.
+    """
+    start: int = CDFepoch.compute_tt2000([2017, 1, day, 0, 0, 0, 0, 0, 0])
+    writer: CDFWriter = CDFWriter(str(path), cdf_spec={'Compressed': 0}, delete=True)
+    writer.write_globalattrs({'Mission_group': {0: 'Juno'}})
+
+    def write(name: str, data: ndarray, data_type: int, varying: bool = True, dims: List[int] = []):
+        writer.write_var(
+            {'Variable': name, 'Data_Type': data_type, 'Num_Elements': 1, 'Rec_Vary': varying, 'Dim_Sizes': dims},
+            {'UNITS': 'Hz'} if name == 'Frequency' else {},
+            data
+        )
+
+    write('Epoch', start + numpy.arange(RECORDS, dtype=numpy.int64) * 10_000_000_000, CDFWriter.CDF_TIME_TT2000)
+    write('Frequency', numpy.geomspace(1e3, 1e7, CHANNELS), CDFWriter.CDF_DOUBLE, varying=False, dims=[CHANNELS])
+    write('Data', rng.random((RECORDS, CHANNELS)) * 1e-12 + 1e-13, CDFWriter.CDF_DOUBLE, dims=[CHANNELS])
+    write('Background', numpy.full(CHANNELS, day * 1e-14), CDFWriter.CDF_DOUBLE, varying=False, dims=[CHANNELS])
+    writer.close()
+
+
+@pytest.fixture
+def cdf_set(tmp_path: Path) -> Path:
+    """
+    A set of daily files, returning the path of the first.
+    """
+    rng = numpy.random.default_rng(0)
+    for day in range(1, DAYS + 1):
+        _write_day(tmp_path / f'juno_waves_201701{day:02d}_v01.cdf', day, rng)
+    return tmp_path / 'juno_waves_20170101_v01.cdf'
+
+
+@pytest.fixture
+def opened(monkeypatch) -> List[str]:
+    """
+    The names of the files opened, in order.
+    """
+    opened: List[str] = []
+    monkeypatch.setattr(
+        'spacelabel.models.dataset.cdf.CDF', lambda path: opened.append(Path(path).name) or CDF(path)
+    )
+    return opened
+
+
+def _window(start: str, end: str) -> Tuple[Time, Time]:
+    return Time(start, format='isot', scale='utc'), Time(end, format='isot', scale='utc')
+
+
+def _read_preprocessed(path: Path) -> Dict[str, ndarray]:
+    with File(path, 'r') as file:
+        return {name: numpy.array(file[name]) for name in ('Time', 'Frequency', 'Flux')}
+
+
+def test_chunked_matches_in_memory(cdf_set: Path):
+    dataset: DataSetCDF = DataSetCDF(cdf_set, config_name=['juno'])
+    dataset.load()
+    in_memory: Dict[str, ndarray] = _read_preprocessed(dataset.preprocess(pyramid=False))
+
+    # Chunks smaller than a file, so some of them straddle two files with different backgrounds
+    dataset = DataSetCDF(cdf_set, config_name=['juno'])
+    chunked: Dict[str, ndarray] = _read_preprocessed(dataset.preprocess(chunk_size=250, pyramid=False))
+
+    for name, values in in_memory.items():
+        numpy.testing.assert_allclose(chunked[name], values, rtol=1e-12, equal_nan=True, err_msg=name)
+
+
+def test_each_file_has_its_own_background(cdf_set: Path):
+    dataset: DataSetCDF = DataSetCDF(cdf_set, config_name=['juno'])
+    dataset.load()
+    flux: ndarray = dataset._data['Flux']
+    conversion: float = CONFIGS.get('juno').config['measurements'][0]['Flux']['conversion']
+
+    for day in range(1, DAYS + 1):
+        file: CDF = CDF(str(cdf_set.with_name(f'juno_waves_201701{day:02d}_v01.cdf')))
+        expected: ndarray = (file.varget('Data') - file.varget('Background')) * conversion
+        numpy.testing.assert_allclose(flux[(day - 1) * RECORDS:day * RECORDS], expected, rtol=1e-12)
+
+
+def test_named_config_needs_every_column():
+    columns: List[str] = sorted(CONFIGS.get('juno').columns)
+    assert DataSetCDF._find_config(columns, ['juno']) is CONFIGS.get('juno').config
+
+    # A file with only some of the columns the configuration reads isn't described by it
+    with pytest.raises(KeyError):
+        DataSetCDF._find_config([column for column in columns if column != 'Background'], ['juno'])
+
+
+def _added(cdf_set: Path):
+    _write_day(cdf_set.with_name(f'juno_waves_201701{DAYS + 1:02d}_v01.cdf'), DAYS + 1, numpy.random.default_rng(1))
+
+
+def _removed(cdf_set: Path):
+    cdf_set.with_name('juno_waves_20170102_v01.cdf').unlink()
+
+
+def _reversioned(cdf_set: Path):
+    _write_day(cdf_set.with_name('juno_waves_20170102_v02.cdf'), 2, numpy.random.default_rng(1))
+
+
+@pytest.mark.parametrize('time_minimum', [None, 60.])
+@pytest.mark.parametrize('change, rows_changed', [(_added, RECORDS), (_removed, 0), (_reversioned, RECORDS)])
+def test_update_matches_remade(cdf_set: Path, monkeypatch, time_minimum: Optional[float], change, rows_changed: int):
+    preprocessed_path: Path = DataSetCDF(cdf_set, config_name=['juno']).preprocess(
+        time_minimum=time_minimum, chunk_size=250, pyramid=False
+    )
+    assert not DataSetCDF.is_preprocessed_outdated(cdf_set, preprocessed_path)
+    change(cdf_set)
+    assert DataSetCDF.is_preprocessed_outdated(cdf_set, preprocessed_path)
+
+    # Only the rows of the changed day are read from the files again
+    rows_read: List[int] = []
+    read_source_rows = DataSetCDF._read_source_rows
+    monkeypatch.setattr(
+        DataSetCDF, '_read_source_rows',
+        lambda self, measurement, start, stop: rows_read.append(stop - start) or read_source_rows(
+            self, measurement, start, stop
+        )
+    )
+    DataSetCDF(cdf_set, config_name=['juno']).update_preprocessed(preprocessed_path)
+    assert not DataSetCDF.is_preprocessed_outdated(cdf_set, preprocessed_path)
+    updated: Dict[str, ndarray] = _read_preprocessed(preprocessed_path)
+    if time_minimum:
+        # Give or take the bins either side of the day that share records with the days around it
+        assert rows_changed <= sum(rows_read) <= rows_changed + 2 * time_minimum / 10
+    else:
+        assert sum(rows_read) == rows_changed
+
+    remade: Dict[str, ndarray] = _read_preprocessed(
+        DataSetCDF(cdf_set, config_name=['juno']).preprocess(
+            time_minimum=time_minimum, chunk_size=250, pyramid=False
+        )
+    )
+    for name, values in remade.items():
+        numpy.testing.assert_allclose(updated[name], values, rtol=1e-12, equal_nan=True, err_msg=name)
+
+
+@pytest.mark.parametrize('window, names', [
+    (('2017-01-02T00:10:00', '2017-01-02T00:20:00'), ['juno_waves_20170102_v01.cdf']),
+    # Starting before the first record of the day, so the day before might have run on into it
+    (('2017-01-01T23:00:00', '2017-01-02T00:10:00'), ['juno_waves_20170101_v01.cdf', 'juno_waves_20170102_v01.cdf']),
+])
+def test_window_opens_only_its_files(cdf_set: Path, opened: List[str], window: Tuple[str, str], names: List[str]):
+    dates: Tuple[Time, Time] = _window(*window)
+    dataset: DataSetCDF = DataSetCDF(cdf_set, config_name=['juno'], time_range=dates)
+    dataset.validate_dates(dates)
+    dataset.load()
+
+    assert sorted(set(opened)) == names
+    assert len(dataset._time_index) == 60
+
+
+def test_window_validated_against_its_files(cdf_set: Path, opened: List[str]):
+    # Running past the day read, into a gap in the data before the next day, is fine
+    dates: Tuple[Time, Time] = _window('2017-01-02T00:30:00', '2017-01-02T02:00:00')
+    DataSetCDF(cdf_set, config_name=['juno'], time_range=dates).validate_dates(dates)
+    assert set(opened) == {'juno_waves_20170102_v01.cdf'}
+
+    # Running off either end of the set isn't
+    for dates in (
+        _window('2016-12-31T23:00:00', '2017-01-01T00:30:00'),
+        _window(f'2017-01-{DAYS:02d}T00:30:00', f'2017-01-{DAYS:02d}T02:00:00')
+    ):
+        with pytest.raises(ValueError):
+            DataSetCDF(cdf_set, config_name=['juno'], time_range=dates).validate_dates(dates)
+
+
+def test_file_index_cached(cdf_set: Path, opened: List[str]):
+    base_path: Path = cdf_set.with_name('juno_waves')
+    cdf_paths: List[Path] = DataSetCDF._find_files(base_path)
+    dates: Tuple[Time, Time] = _window('2017-01-01T00:30:00', f'2017-01-{DAYS:02d}T00:30:00')
+    index: FileIndex = FileIndex(base_path, cdf_paths, 'Epoch')
+    time_start, time_end = index.get_time_range()
+    assert opened == [cdf_paths[0].name, cdf_paths[-1].name]
+    assert (time_end - time_start).sec == pytest.approx((DAYS - 1) * 86400. + (RECORDS - 1) * 10.)
+    assert index.find(*dates) == list(range(DAYS))
+    assert sorted(opened) == sorted(cdf_path.name for cdf_path in cdf_paths)
+
+    # Read back from the cache, until a file changes
+    opened.clear()
+    index = FileIndex(base_path, cdf_paths, 'Epoch')
+    assert index.get_time_range() == (time_start, time_end)
+    assert index.find(*dates) == list(range(DAYS))
+    assert not opened
+
+    _write_day(cdf_paths[-1], DAYS, numpy.random.default_rng(1))
+    assert FileIndex(base_path, cdf_paths, 'Epoch').get_time_range() == (time_start, time_end)
+    assert opened == [cdf_paths[-1].name]
+
+
+def test_window_reads_its_records(cdf_set: Path):
+    dataset: DataSetCDF = DataSetCDF(cdf_set, config_name=['juno'])
+    dataset.load()
+    # Half of the first day, and just the first record of the second, which comes back without its record dimension
+    rows: slice = slice(RECORDS // 2, RECORDS + 1)
+
+    window: DataSetCDF = DataSetCDF(
+        cdf_set, config_name=['juno'], time_range=_window('2017-01-01T00:30:00', '2017-01-02T00:00:05')
+    )
+    assert window._record_ranges == [(RECORDS // 2, RECORDS), (0, 1)]
+    numpy.testing.assert_array_equal(window._time_index, dataset._time_index[rows])
+    numpy.testing.assert_array_equal(
+        window._read_source_rows('Flux', 0, rows.stop - rows.start), dataset._data['Flux'][rows]
+    )
+    window.load()
+    numpy.testing.assert_array_equal(window._data['Flux'], dataset._data['Flux'][rows])
@@ -0,0 +1,71 @@
+"""
+Checks the vectorised gap filling of 1D series against the per-sample loop it replaced.
+"""
+from typing import Tuple
+
+import numpy
+import pandas as pd
+import pytest
+from numpy import ndarray
+
+pytest.importorskip('cdflib')
+from spacelabel.models.dataset.cdf import _fill_gaps  # noqa: E402
+
+STEP = numpy.timedelta64(60, 's')
+
+
+def _fill_gaps_loop(time: ndarray, data: ndarray, time_step: numpy.timedelta64) -> Tuple[ndarray, ndarray]:
+    """
+    The original padding, one interval at a time. The original ran each gap's range up to the sample before,
+    rather than the one after; that is corrected here, as it is in `_fill_gaps`.
+    """
+    new_time: ndarray = numpy.array([], dtype='datetime64[ns]')
+    new_data: ndarray = numpy.array([], dtype='float64')
+    for t in range(0, len(time) - 1):
+        if time[t + 1] - time[t] > time_step:
+            periods: int = int(numpy.ceil((time[t + 1] - time[t]) / time_step))
+            new_time = numpy.concatenate((
+                new_time, numpy.array(pd.date_range(time[t], time[t + 1], periods)[:-1])
+            ))
+            new_data = numpy.concatenate((new_data, numpy.array([data[t]] + [numpy.nan] * (periods - 2))))
+        else:
+            new_time = numpy.concatenate((new_time, numpy.array([time[t]])))
+            new_data = numpy.concatenate((new_data, numpy.array([data[t]])))
+    return numpy.concatenate((new_time, time[-1:])), numpy.concatenate((new_data, data[-1:]))
+
+
+@pytest.fixture
+def series() -> Tuple[ndarray, ndarray]:
+    # A minute apart with a little jitter, and with gaps at the start, in the middle and at the end
+    rng = numpy.random.default_rng(6)
+    offsets: ndarray = numpy.arange(2000) * 60. + rng.uniform(-5., 5., 2000)
+    keep: ndarray = numpy.ones(2000, dtype=bool)
+    for start, stop in ((1, 40), (700, 705), (1200, 1500), (1958, 1999)):
+        keep[start:stop] = False
+    time: ndarray = numpy.datetime64('2017-01-01', 'ns') + (offsets[keep] * 1e9).astype('timedelta64[ns]')
+    return time, rng.normal(size=len(time))
+
+
+def test_fill_gaps_matches_loop(series: Tuple[ndarray, ndarray]):
+    time, data = series
+    time_filled, data_filled = _fill_gaps(time, data, STEP)
+    time_expected, data_expected = _fill_gaps_loop(time, data, STEP)
+
+    assert len(time_filled) > len(time)
+    numpy.testing.assert_array_equal(time_filled, time_expected.astype('datetime64[ns]'))
+    numpy.testing.assert_array_equal(data_filled, data_expected)
+    # Every sample is kept, in order
+    numpy.testing.assert_array_equal(data_filled[numpy.isfinite(data_filled)], data)
+
+
+def test_fill_gaps_without_gaps():
+    time: ndarray = numpy.datetime64('2017-01-01', 'ns') + numpy.arange(10) * STEP
+    data: ndarray = numpy.arange(10.)
+
+    time_filled, data_filled = _fill_gaps(time, data, STEP)
+    numpy.testing.assert_array_equal(time_filled, time)
+    numpy.testing.assert_array_equal(data_filled, data)
+
+    # With no time step given, nothing counts as a gap
+    time_filled, data_filled = _fill_gaps(time[::3], data[::3], numpy.timedelta64('NaT'))
+    numpy.testing.assert_array_equal(data_filled, data[::3])
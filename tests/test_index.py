@@ -0,0 +1,115 @@
+"""
+Checks the feature index against checking every bounding box in turn.
+"""
+from typing import List, Optional
+
+import numpy
+import pytest
+from numpy import ndarray
+
+from spacelabel.models.index import FeatureIndex
+
+DAY: float = 86400.
+
+
+def _scan(
+        boxes: ndarray, time_start: float, time_end: float,
+        freq_min: Optional[float] = None, freq_max: Optional[float] = None
+) -> List[int]:
+    """
+    Every box overlapping the window, in order of start time and then of being added.
+    """
+    overlaps: ndarray = (boxes[:, 0] <= time_end) & (boxes[:, 1] >= time_start)
+    if freq_min is not None:
+        overlaps &= boxes[:, 3] >= freq_min
+    if freq_max is not None:
+        overlaps &= boxes[:, 2] <= freq_max
+    found: ndarray = numpy.flatnonzero(overlaps)
+    return found[numpy.argsort(boxes[found, 0], kind='stable')].tolist()
+
+
+@pytest.fixture
+def boxes() -> ndarray:
+    # A year of features of up to a day, one spanning the whole year, and several starting at the same time
+    rng = numpy.random.default_rng(7)
+    starts: ndarray = rng.uniform(0., 365. * DAY, 2000)
+    starts[100:110] = starts[50]
+    ends: ndarray = starts + rng.uniform(0., DAY, len(starts))
+    bottoms: ndarray = 10 ** rng.uniform(0., 3., len(starts))
+    tops: ndarray = bottoms * 10 ** rng.uniform(0., 1., len(starts))
+    boxes: ndarray = numpy.column_stack((starts, ends, bottoms, tops))
+    return numpy.vstack((boxes, [[-DAY, 366. * DAY, 1., 10.]]))
+
+
+@pytest.fixture
+def windows() -> ndarray:
+    rng = numpy.random.default_rng(8)
+    starts: ndarray = rng.uniform(-2. * DAY, 367. * DAY, 100)
+    return numpy.column_stack((starts, starts + rng.uniform(0., 3. * DAY, len(starts))))
+
+
+def test_added_one_at_a_time(boxes: ndarray, windows: ndarray):
+    index: FeatureIndex = FeatureIndex()
+    for item, (time_start, time_end, freq_min, freq_max) in enumerate(boxes.tolist()):
+        index.add(item, time_start, time_end, freq_min, freq_max)
+
+    assert len(index) == len(boxes)
+    # Blocks merged as they're added, rather than one per box
+    assert len(index._blocks) <= numpy.log2(len(boxes)) + 1
+    for time_start, time_end in windows.tolist():
+        assert index.query(time_start, time_end) == _scan(boxes, time_start, time_end)
+
+
+def test_added_together_and_then_one_at_a_time(boxes: ndarray, windows: ndarray):
+    index: FeatureIndex = FeatureIndex()
+    index.extend(list(range(1500)), *boxes[:1500].T)
+    for item in range(1500, len(boxes)):
+        index.add(item, *boxes[item])
+
+    for time_start, time_end in windows.tolist():
+        assert index.query(time_start, time_end) == _scan(boxes, time_start, time_end)
+
+
+def test_spanning_feature(boxes: ndarray):
+    index: FeatureIndex = FeatureIndex()
+    index.extend(list(range(len(boxes))), *boxes.T)
+    spanning: int = len(boxes) - 1
+
+    # Found in windows anywhere inside it, including ones with no other features
+    for time_start in (0., 100. * DAY, 365.5 * DAY):
+        assert spanning in index.query(time_start, time_start + 1.)
+    assert index.query(366.5 * DAY, 367. * DAY) == []
+
+
+def test_overlap_is_inclusive():
+    index: FeatureIndex = FeatureIndex()
+    index.add('a', 10., 20., 1., 2.)
+
+    assert index.query(20., 30.) == ['a']
+    assert index.query(0., 10.) == ['a']
+    assert index.query(12., 18.) == ['a']
+    assert index.query(20.5, 30.) == []
+    assert index.query(0., 9.5) == []
+    assert index.query(0., 30., freq_min=2.) == ['a']
+    assert index.query(0., 30., freq_max=1.) == ['a']
+    assert index.query(0., 30., freq_min=2.5) == []
+
+
+def test_frequency_filtering(boxes: ndarray, windows: ndarray):
+    index: FeatureIndex = FeatureIndex()
+    for item, box in enumerate(boxes.tolist()):
+        index.add(item, *box)
+
+    for freq_min, freq_max in ((None, 5.), (50., None), (20., 30.), (2000., 5000.)):
+        for time_start, time_end in windows.tolist():
+            assert index.query(time_start, time_end, freq_min, freq_max) == \
+                _scan(boxes, time_start, time_end, freq_min, freq_max)
+
+
+def test_clear(boxes: ndarray):
+    index: FeatureIndex = FeatureIndex()
+    index.extend(list(range(len(boxes))), *boxes.T)
+    index.clear()
+
+    assert len(index) == 0
+    assert index.query(-numpy.inf, numpy.inf) == []
@@ -0,0 +1,127 @@
+"""
+Checks features added are kept in the journal until the catalogue is saved, and read back from it.
+"""
+import json
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy
+import pytest
+from astropy.time import Time, TimeDelta
+
+from spacelabel.models.dataset.hdf5 import DataSetHDF5
+from spacelabel.models.journal import CatalogueJournal
+
+TIME_START: Time = Time('2005-01-01T00:30:00', format='isot', scale='utc')
+
+
+def _vertexes(feature_id: int) -> List[Tuple[Time, float]]:
+    time: Time = TIME_START + TimeDelta(600. * feature_id, format='sec')
+    return [(time, 100.), (time + TimeDelta(300., format='sec'), 100.), (time, 1000.)]
+
+
+def _dataset(cassini_file: Path) -> DataSetHDF5:
+    # The features are all that's needed, so the data isn't loaded
+    dataset: DataSetHDF5 = DataSetHDF5(cassini_file, config_name='cassini')
+    dataset.load_features_from_json()
+    return dataset
+
+
+def _catalogue_path(dataset: DataSetHDF5, suffix: str) -> Path:
+    return dataset._file_path.parent / f'catalogue_{dataset._observer}{suffix}'
+
+
+def _features(dataset: DataSetHDF5) -> List[Tuple[str, List[List[float]]]]:
+    return [
+        (feature.name, numpy.column_stack(feature.arrays_unix()).tolist()) for feature in dataset._catalogue
+    ]
+
+
+@pytest.fixture
+def validations(monkeypatch) -> List[Path]:
+    """
+    The catalogue files validated against TFCat, in order.
+    """
+    validations: List[Path] = []
+    monkeypatch.setattr('tfcat.validate.validate_file', lambda path: validations.append(Path(path)))
+    return validations
+
+
+def test_replay_torn_last_line(tmp_path: Path):
+    path: Path = tmp_path / 'catalogue.jsonl'
+    journal: CatalogueJournal = CatalogueJournal(path)
+    for feature_id in range(2):
+        journal.append(feature_id, f'feature {feature_id}', numpy.array([1., 2., 3.]), numpy.array([4., 5., 6.]))
+    journal.close()
+    length: int = path.stat().st_size
+    # Killed part-way through writing a third entry
+    with open(path, 'a') as file_journal:
+        file_journal.write('{"id": 2, "feature_type": "feat')
+
+    journal = CatalogueJournal(path)
+    assert [entry[:2] for entry in journal.replay()] == [(0, 'feature 0'), (1, 'feature 1')]
+    assert len(journal) == 2
+    assert path.stat().st_size == length
+
+    # New entries go on after the last complete one
+    journal.append(2, 'feature 2', numpy.array([1., 2., 3.]), numpy.array([4., 5., 6.]))
+    journal.close()
+    assert [entry[:2] for entry in CatalogueJournal(path).replay()] == [
+        (0, 'feature 0'), (1, 'feature 1'), (2, 'feature 2')
+    ]
+
+
+def test_features_replayed_until_saved(cassini_file: Path):
+    dataset: DataSetHDF5 = _dataset(cassini_file)
+    for feature_id in range(3):
+        dataset.add_feature(f'feature {feature_id}', _vertexes(feature_id))
+    assert dataset.has_unsaved_features()
+
+    # Not saved, so read back from the journal alone
+    replayed: DataSetHDF5 = _dataset(cassini_file)
+    assert _features(replayed) == _features(dataset)
+    assert replayed.has_unsaved_features()
+
+    # Saving compacts the journal into the catalogue
+    replayed.write_features_to_json()
+    assert not replayed.has_unsaved_features()
+    assert not _catalogue_path(replayed, '.jsonl').exists()
+    assert _features(_dataset(cassini_file)) == _features(dataset)
+
+
+def test_replay_skips_features_already_saved(cassini_file: Path):
+    dataset: DataSetHDF5 = _dataset(cassini_file)
+    for feature_id in range(3):
+        dataset.add_feature(f'feature {feature_id}', _vertexes(feature_id))
+    path_journal: Path = _catalogue_path(dataset, '.jsonl')
+    journal: bytes = path_journal.read_bytes()
+    dataset.write_features_to_json()
+
+    # Stopped after the catalogue was saved, but before the journal was cleared, then one more feature added
+    path_journal.write_bytes(journal)
+    dataset = _dataset(cassini_file)
+    dataset.add_feature('feature 3', _vertexes(3))
+
+    replayed: DataSetHDF5 = _dataset(cassini_file)
+    assert [name for name, _ in _features(replayed)] == [f'feature {feature_id}' for feature_id in range(4)]
+    assert _features(replayed) == _features(dataset)
+
+
+def test_edited_catalogue_validated_again(cassini_file: Path, validations: List[Path]):
+    dataset: DataSetHDF5 = _dataset(cassini_file)
+    dataset.add_feature('feature 0', _vertexes(0))
+    dataset.write_features_to_json()
+    path_tfcat: Path = _catalogue_path(dataset, '.json')
+
+    # Written by us, so trusted
+    _dataset(cassini_file)
+    assert validations == []
+
+    # Edited outside the program, so it's checked once, then trusted again until it next changes
+    tfcat: dict = json.loads(path_tfcat.read_text())
+    tfcat['features'][0]['properties']['feature_type'] = 'edited'
+    path_tfcat.write_text(json.dumps(tfcat, indent=2))
+    assert [name for name, _ in _features(_dataset(cassini_file))] == ['edited']
+    assert validations == [path_tfcat]
+    _dataset(cassini_file)
+    assert validations == [path_tfcat]
@@ -0,0 +1,104 @@
+"""
+Checks that preprocessing gives the same file whether it is done in memory, in chunks, or over worker processes.
+"""
+from pathlib import Path
+from typing import Dict
+
+import numpy
+import pytest
+from astropy.time import Time
+from h5py import Dataset, File
+from numpy import ndarray
+
+from spacelabel.models.dataset.hdf5 import DataSetHDF5
+from spacelabel.models.dataset.preprocessed import DataSetPreprocessed
+
+from conftest import write_cassini
+
+MEASUREMENTS = ('Flux density', 'Power', 'Degree of polarization')
+SETTINGS = dict(frequency_resolution=25, time_minimum=60, pyramid=False)
+
+
+def _read_preprocessed(path: Path) -> Dict[str, ndarray]:
+    with File(path, 'r') as file:
+        return {name: numpy.array(file[name]) for name in ('Time', 'Frequency') + MEASUREMENTS}
+
+
+@pytest.fixture
+def in_memory(cassini_file: Path) -> Dict[str, ndarray]:
+    dataset: DataSetHDF5 = DataSetHDF5(cassini_file, config_name='cassini')
+    dataset.load()
+    result: Dict[str, ndarray] = _read_preprocessed(dataset.preprocess(**SETTINGS))
+    cassini_file.with_suffix('.preprocessed.hdf5').unlink()
+    return result
+
+
+@pytest.mark.parametrize('chunk_size, workers', [(700, None), (None, 1), (700, 1), (700, 2)])
+def test_streamed_matches_in_memory(cassini_file: Path, in_memory: Dict[str, ndarray], chunk_size, workers):
+    # Not loaded first: streaming reads straight from the source file, as `__main__` does with -chunk_size or -w
+    dataset: DataSetHDF5 = DataSetHDF5(cassini_file, config_name='cassini')
+    streamed: Dict[str, ndarray] = _read_preprocessed(
+        dataset.preprocess(**SETTINGS, chunk_size=chunk_size, workers=workers)
+    )
+
+    assert set(streamed) == set(in_memory)
+    for name, values in in_memory.items():
+        numpy.testing.assert_allclose(streamed[name], values, rtol=1e-12, equal_nan=True, err_msg=name)
+
+
+def test_pyramid_reduction_per_measurement(tmp_path: Path):
+    # Long enough for a pyramid, which is then drawn across far fewer pixels than it has samples
+    source: Path = write_cassini(tmp_path / 'cassini.hdf5', samples=20000)
+    dataset: DataSetHDF5 = DataSetHDF5(source, config_name='cassini')
+    dataset.load()
+    signed_original: ndarray = dataset._data['Degree of polarization']
+    dataset = DataSetPreprocessed(dataset.preprocess(frequency_resolution=25, pyramid=True))
+    dataset.load()
+    assert dataset._pyramid
+
+    time, _, data = dataset.get_data_for_time_range(
+        dataset._get_time(0), dataset._get_time(-1), measurements=['Flux density', 'Degree of polarization'],
+        resolution=300, reduction={'Flux density': 'max', 'Degree of polarization': 'mean'}
+    )
+    _, _, peaks = dataset.get_data_for_time_range(
+        dataset._get_time(0), dataset._get_time(-1), measurements=['Flux density'], resolution=300, reduction='max'
+    )
+
+    assert len(time) == 300
+    numpy.testing.assert_array_equal(data['Flux density'], peaks['Flux density'])
+    # Signed values are averaged rather than maxed, so they stay negative about as often as they were
+    assert abs((data['Degree of polarization'] < 0.).mean() - (signed_original < 0.).mean()) < 0.05
+
+
+def test_lazy_matches_eager(tmp_path: Path):
+    source: Path = write_cassini(tmp_path / 'cassini.hdf5', samples=20000)
+    dataset: DataSetHDF5 = DataSetHDF5(source, config_name='cassini')
+    dataset.load()
+    preprocessed_path: Path = dataset.preprocess(frequency_resolution=25, pyramid=True)
+    lazy: DataSetPreprocessed = DataSetPreprocessed(preprocessed_path)
+    lazy.load()
+    eager: DataSetPreprocessed = DataSetPreprocessed(preprocessed_path, lazy=False)
+    eager.load()
+
+    # The compressed measurements are read from the file a window at a time, and the time axis made for each window
+    assert all(isinstance(values, Dataset) for values in lazy._data.values())
+    assert lazy._time is None
+
+    rng = numpy.random.default_rng(3)
+    for row_start in rng.integers(0, len(lazy._time_index) - 1, 5).tolist():
+        row_end: int = int(rng.integers(row_start + 1, len(lazy._time_index)))
+        time_start, time_end = lazy._get_time(row_start), lazy._get_time(row_end)
+        for resolution in (None, 300):
+            time_lazy, freq_lazy, data_lazy = lazy.get_data_for_time_range(time_start, time_end, resolution=resolution)
+            time_eager, freq_eager, data_eager = eager.get_data_for_time_range(
+                time_start, time_end, resolution=resolution
+            )
+
+            assert isinstance(time_lazy, Time)
+            numpy.testing.assert_array_equal(time_lazy.jd, time_eager.jd)
+            numpy.testing.assert_array_equal(freq_lazy, freq_eager)
+            assert set(data_lazy) == set(MEASUREMENTS)
+            for name, values in data_eager.items():
+                numpy.testing.assert_array_equal(data_lazy[name], values, err_msg=name)
+        assert lazy.get_time_range(time_start, time_end) == (time_start, time_end)
+    lazy._file.close()
@@ -0,0 +1,171 @@
+"""
+Checks fetching windows in the background, with a stand-in for the matplotlib view.
+"""
+from concurrent.futures import Future, wait
+from pathlib import Path
+from threading import Event, current_thread, main_thread
+from typing import Dict, List, Tuple
+
+import numpy
+import pytest
+from astropy.time import Time, TimeDelta
+
+from spacelabel.models.dataset.hdf5 import DataSetHDF5
+from spacelabel.presenters import Presenter
+
+RESOLUTION: int = 500  # Pixels the stand-in view draws across
+MEASUREMENTS: List[str] = ['Flux density']
+# Half an hour into the file, and half an hour long, so there is data either side
+TIME_START: Time = Time('2005-01-01T00:30:00', format='isot', scale='utc')
+TIME_END: Time = TIME_START + TimeDelta(1800., format='sec')
+
+
+class _View:
+    """
+    Stands in for the matplotlib view, keeping what it is asked to draw.
+    """
+    def __init__(self):
+        self.drawn: List[Dict] = []
+
+    def register_presenter(self, presenter: Presenter):
+        pass
+
+    def get_resolution(self, fig_size: Tuple[float, float]) -> int:
+        return RESOLUTION
+
+    def draw_data(self, time: Time, freq, data, units, data_1d, frequency_guide, **kwargs):
+        self.drawn.append(dict(time=time, data=data, **kwargs))
+
+
+@pytest.fixture
+def dataset(cassini_file: Path) -> DataSetHDF5:
+    dataset: DataSetHDF5 = DataSetHDF5(cassini_file, config_name='cassini')
+    dataset.load()
+    return dataset
+
+
+def _presenter(dataset: DataSetHDF5, view: _View, prefetch_depth: int = 1, cache_size: float = 0) -> Presenter:
+    presenter: Presenter = Presenter(
+        dataset, view, measurements=MEASUREMENTS, prefetch_depth=prefetch_depth, cache_size=cache_size
+    )
+    presenter.request_data_time_range(TIME_START, TIME_END, fig_size=(15, 9), frac_dyn_range=(0.05, 0.95))
+    return presenter
+
+
+def _prefetching(presenter: Presenter) -> List[Future]:
+    return [future for future, _ in presenter._prefetched.values()]
+
+
+def _record_fetches(dataset: DataSetHDF5, monkeypatch, release: Event = None) -> List[float]:
+    """
+    Notes the start of each window fetched from the dataset, holding back any fetched in the background
+    until released, if asked to.
+    """
+    fetches: List[float] = []
+    get_data_for_time_range = dataset.get_data_for_time_range
+
+    def record(time_start: Time, time_end: Time, **kwargs):
+        fetches.append(round(time_start.jd, 8))
+        if release and current_thread() is not main_thread():
+            release.wait(timeout=10.)
+        return get_data_for_time_range(time_start, time_end, **kwargs)
+
+    monkeypatch.setattr(dataset, 'get_data_for_time_range', record)
+    return fetches
+
+
+def test_prefetched_window_used(dataset: DataSetHDF5, monkeypatch):
+    fetches: List[float] = _record_fetches(dataset, monkeypatch)
+    view: _View = _View()
+    presenter: Presenter = _presenter(dataset, view)
+    wait(_prefetching(presenter))
+    # The window shown, then the one either side of it
+    assert len(fetches) == 3
+
+    presenter.request_data_next()
+    wait(_prefetching(presenter))
+    shown: Dict = view.drawn[-1]
+    # The next window was drawn from the one fetched in the background, not fetched again
+    time_next: float = (TIME_START + TimeDelta(0.75 * 1800., format='sec')).jd
+    assert sum(abs(fetch - time_next) < 1e-6 for fetch in fetches) == 1
+
+    # Drawn just as it would have been without fetching it in the background
+    direct: _View = _View()
+    _presenter(dataset, direct, prefetch_depth=0).request_data_next()
+    numpy.testing.assert_array_equal(shown['time'].jd, direct.drawn[-1]['time'].jd)
+    numpy.testing.assert_array_equal(shown['data']['Flux density'], direct.drawn[-1]['data']['Flux density'])
+    assert shown['color_limits'] == direct.drawn[-1]['color_limits']
+
+
+def test_prefetch_cancelled(dataset: DataSetHDF5, monkeypatch):
+    release: Event = Event()
+    _record_fetches(dataset, monkeypatch, release)
+    # More windows either side than threads to fetch them, so some are still waiting to start
+    presenter: Presenter = _presenter(dataset, _View(), prefetch_depth=2, cache_size=64)
+    prefetched: Dict = dict(presenter._prefetched)
+    assert len(prefetched) == 4
+
+    presenter.cancel_prefetch()
+    release.set()
+    wait([future for future, _ in prefetched.values()])
+    assert not presenter._prefetched
+    assert any(future.cancelled() for future, _ in prefetched.values())
+    for key, (future, cancelled) in prefetched.items():
+        # Those already started stop at the next step, and nothing they fetched is kept
+        assert cancelled.is_set()
+        assert future.cancelled() or future.result() is None
+        assert key not in presenter._cache
+
+
+def test_window_fetched_while_feature_added(dataset: DataSetHDF5, monkeypatch):
+    # Fetching the next window in the background is held up after reading the features, before it's cached
+    release: Event = Event()
+    read: Event = Event()
+    get_dynamic_range = dataset.get_dynamic_range
+
+    def held(*args, **kwargs):
+        if current_thread() is not main_thread():
+            read.set()
+            release.wait(timeout=10.)
+        return get_dynamic_range(*args, **kwargs)
+
+    monkeypatch.setattr(dataset, 'get_dynamic_range', held)
+    view: _View = _View()
+    presenter: Presenter = _presenter(dataset, view, cache_size=64)
+    prefetched: List[Future] = _prefetching(presenter)
+    assert read.wait(timeout=10.)
+
+    # A feature at the end of the window shown, where the next window overlaps it
+    time_feature: Time = TIME_END - TimeDelta(300., format='sec')
+    presenter.register_feature(
+        [(time_feature, 100.), (time_feature + TimeDelta(120., format='sec'), 100.), (time_feature, 1000.)],
+        name='feature'
+    )
+    release.set()
+    wait(prefetched + _prefetching(presenter))
+
+    presenter.request_data_next()
+    assert [feature.name for feature in view.drawn[-1]['features']] == ['feature']
+
+
+def test_feature_discards_overlapping_windows(dataset: DataSetHDF5):
+    presenter: Presenter = _presenter(dataset, _View(), cache_size=64)
+    key_next, key_prev = presenter._prefetched.keys()
+    key_shown = presenter._window_key(TIME_START, TIME_END, RESOLUTION)
+    wait(_prefetching(presenter))
+    assert all(key in presenter._cache for key in (key_shown, key_next, key_prev))
+
+    # A feature at the end of the window shown, where the next window overlaps it, but not the previous one
+    time_feature: Time = TIME_END - TimeDelta(300., format='sec')
+    presenter.register_feature(
+        [(time_feature, 100.), (time_feature + TimeDelta(120., format='sec'), 100.), (time_feature, 1000.)],
+        name='feature'
+    )
+    assert key_shown not in presenter._cache
+    assert key_prev in presenter._cache
+    assert set(presenter._prefetched) == {key_next}
+
+    # The next window is fetched again, with the feature in it
+    wait(_prefetching(presenter))
+    assert [feature.name for feature in presenter._cache.get(key_next)[4]] == ['feature']
+    assert presenter._cache.get(key_prev)[4] == []
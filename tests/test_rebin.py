@@ -0,0 +1,211 @@
+"""
+Checks the vectorised rebinning against the per-row and per-bin loops it replaced.
+"""
+import tracemalloc
+import warnings
+
+import numpy
+import pytest
+from numpy import ndarray
+
+from spacelabel.models.dataset.rebin import (
+    _bin_edges, decimate, downsample_time, frequency_weights, rebin_frequency, time_bins
+)
+
+
+def _interpolate_loop(values: ndarray, freq_original: ndarray, freq_rescaled: ndarray) -> ndarray:
+    """
+    The original rebinning: `numpy.interp` on each time row in turn.
+    """
+    result: ndarray = numpy.zeros((values.shape[0], len(freq_rescaled)))
+    for row in range(values.shape[0]):
+        result[row, :] = numpy.interp(x=freq_rescaled, xp=freq_original, fp=values[row, :])
+    return result
+
+
+def _average_loop(values: ndarray, freq_original: ndarray, freq_rescaled: ndarray) -> ndarray:
+    """
+    Flux-conserving rebinning one target bin at a time: the bandwidth-weighted mean of the overlapping channels.
+    """
+    edges_original: ndarray = _bin_edges(freq_original)
+    edges_rescaled: ndarray = _bin_edges(freq_rescaled)
+    result: ndarray = numpy.full((values.shape[0], len(freq_rescaled)), numpy.nan)
+    for column in range(len(freq_rescaled)):
+        overlap: ndarray = numpy.array([
+            max(0., min(edges_original[channel + 1], edges_rescaled[column + 1]) -
+                max(edges_original[channel], edges_rescaled[column]))
+            for channel in range(len(freq_original))
+        ])
+        if overlap.sum() > 0:
+            used: ndarray = overlap > 0
+            result[:, column] = values[:, used] @ overlap[used] / overlap.sum()
+    return result
+
+
+@pytest.fixture
+def freq_original() -> ndarray:
+    # Irregular, logarithmic-ish channels, like a real receiver
+    rng = numpy.random.default_rng(1)
+    return numpy.sort(10 ** rng.uniform(0., 3., size=40))
+
+
+@pytest.fixture
+def values(freq_original: ndarray) -> ndarray:
+    rng = numpy.random.default_rng(2)
+    return 10 ** rng.normal(-15., 1., size=(257, len(freq_original)))
+
+
+def test_interpolate_matches_loop(freq_original: ndarray, values: ndarray):
+    # Targets beyond both ends, exactly on the end channels, on interior channels, and in between
+    freq_rescaled: ndarray = numpy.sort(numpy.concatenate((
+        [freq_original[0] / 2., freq_original[0], freq_original[-1], freq_original[-1] * 2.],
+        freq_original[5:8],
+        numpy.geomspace(freq_original[0], freq_original[-1], 23)[1:-1]
+    )))
+    weights: ndarray = frequency_weights(freq_original, freq_rescaled, method='interpolate')
+
+    numpy.testing.assert_allclose(
+        rebin_frequency(values, weights, block_size=64),
+        _interpolate_loop(values, freq_original, freq_rescaled),
+        rtol=1e-12
+    )
+
+
+def test_interpolate_nan_only_spreads_to_neighbours(freq_original: ndarray, values: ndarray):
+    values = values.copy()
+    values[10, 20] = numpy.nan
+    values[100, :] = numpy.nan
+    freq_rescaled: ndarray = numpy.geomspace(freq_original[0], freq_original[-1], 50)
+    weights: ndarray = frequency_weights(freq_original, freq_rescaled, method='interpolate')
+
+    numpy.testing.assert_allclose(
+        rebin_frequency(values, weights),
+        _interpolate_loop(values, freq_original, freq_rescaled),
+        rtol=1e-12
+    )
+
+
+def test_interpolate_single_channel():
+    freq_rescaled: ndarray = numpy.array([1., 2., 3.])
+    values: ndarray = numpy.array([[4.], [5.]])
+    weights: ndarray = frequency_weights(numpy.array([2.]), freq_rescaled, method='interpolate')
+
+    numpy.testing.assert_array_equal(rebin_frequency(values, weights), [[4., 4., 4.], [5., 5., 5.]])
+
+
+def test_average_matches_loop(freq_original: ndarray, values: ndarray):
+    # Finer than the source in places and coarser in others, with bins past both ends that nothing overlaps
+    freq_rescaled: ndarray = numpy.geomspace(freq_original[0] / 100., freq_original[-1] * 100., 30)
+    weights: ndarray = frequency_weights(freq_original, freq_rescaled, method='average')
+    result: ndarray = rebin_frequency(values, weights, block_size=100)
+    expected: ndarray = _average_loop(values, freq_original, freq_rescaled)
+
+    assert numpy.isnan(expected[:, 0]).all() and numpy.isnan(expected[:, -1]).all()
+    numpy.testing.assert_allclose(result, expected, rtol=1e-12)
+
+
+def test_average_conserves_constant(freq_original: ndarray):
+    freq_rescaled: ndarray = numpy.geomspace(freq_original[0], freq_original[-1], 12)
+    weights: ndarray = frequency_weights(freq_original, freq_rescaled, method='average')
+
+    numpy.testing.assert_allclose(rebin_frequency(numpy.full((3, len(freq_original)), 7.), weights), 7.)
+
+
+def test_unknown_method(freq_original: ndarray):
+    with pytest.raises(ValueError):
+        frequency_weights(freq_original, freq_original, method='nearest')
+
+
+@pytest.fixture
+def signed() -> ndarray:
+    # Like the degree of polarization: half negative, with some gaps
+    rng = numpy.random.default_rng(3)
+    values: ndarray = rng.uniform(-1., 1., size=(4000, 6))
+    values[rng.random(values.shape) < 0.05] = numpy.nan
+    return values
+
+
+@pytest.mark.parametrize(
+    'method, reduction', [('mean', numpy.nanmean), ('median', numpy.nanmedian), ('max', numpy.nanmax)]
+)
+def test_downsample_time_matches_loop(signed: ndarray, method, reduction):
+    # Irregular sampling with a gap, so some bins are empty
+    rng = numpy.random.default_rng(4)
+    time: ndarray = numpy.sort(rng.uniform(0., 1000., len(signed)))
+    time[(time > 400.) & (time < 450.)] += 100.
+    time = numpy.sort(time)
+    centres, edges = time_bins(time[0], time[-1], 7.)
+    result: ndarray = downsample_time(time, signed, edges, method=method, positive_only=False)
+
+    expected: ndarray = numpy.full(result.shape, numpy.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        for index in range(len(centres)):
+            rows: ndarray = (time >= edges[index]) & (time < edges[index + 1])
+            if rows.any():
+                expected[index] = reduction(signed[rows], axis=0)
+
+    assert numpy.isnan(result).all(axis=1).any()
+    numpy.testing.assert_allclose(result, expected, rtol=1e-12, equal_nan=True)
+
+
+def test_decimate_keeps_sign(signed: ndarray):
+    levels = decimate(signed, [4, 16], positive_only=False)
+    finite: ndarray = signed[numpy.isfinite(signed)]
+
+    for (mean, peak), factor in zip(levels, [4, 16]):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            blocks: ndarray = signed.reshape(-1, factor, signed.shape[1])
+            numpy.testing.assert_allclose(mean, numpy.nanmean(blocks, axis=1), rtol=1e-12, equal_nan=True)
+            numpy.testing.assert_array_equal(peak, numpy.nanmax(blocks, axis=1))
+
+    # The means of a symmetric measurement should be negative about as often as the samples are
+    mean_coarse: ndarray = levels[-1][0]
+    assert abs((mean_coarse < 0.).mean() - (finite < 0.).mean()) < 0.05
+
+
+@pytest.mark.parametrize('method', ['mean', 'median', 'max'])
+def test_log_measurements_ignore_fill(method):
+    # Zeros and negative values are fill in a log-scaled measurement, so don't drag the bins down
+    rng = numpy.random.default_rng(11)
+    values: ndarray = 10 ** rng.normal(-18., 1., size=(1200, 4))
+    filled: ndarray = values.copy()
+    filled[rng.random(values.shape) < 0.3] = 0.
+    filled[rng.random(values.shape) < 0.05] = -1e-18
+    filled[:100] = 0.
+    time: ndarray = numpy.arange(len(values), dtype=float)
+    _, edges = time_bins(time[0], time[-1], 10.)
+
+    result: ndarray = downsample_time(time, filled, edges, method=method)
+    expected: ndarray = downsample_time(time, numpy.where(filled > 0., filled, numpy.nan), edges, method=method)
+    assert numpy.isnan(result[:10]).all()
+    numpy.testing.assert_allclose(result, expected, rtol=1e-12, equal_nan=True)
+
+    for (mean, peak), (mean_expected, peak_expected) in zip(
+            decimate(filled, [4, 16]), decimate(numpy.where(filled > 0., filled, numpy.nan), [4, 16])
+    ):
+        numpy.testing.assert_allclose(mean, mean_expected, rtol=1e-12, equal_nan=True)
+        numpy.testing.assert_array_equal(peak, peak_expected)
+
+
+def test_median_of_burst(signed: ndarray):
+    # One bin holding most of the samples, as in a burst-mode interval, among thousands of sparse ones
+    time: ndarray = numpy.concatenate((numpy.arange(2000.), numpy.linspace(2000., 2001., 2000, endpoint=False)))
+    values: ndarray = signed[:len(time)]
+    centres, edges = time_bins(time[0], time[-1], 1.)
+
+    tracemalloc.start()
+    result: ndarray = downsample_time(time, values, edges, method='median', positive_only=False)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        expected: ndarray = numpy.array([
+            numpy.nanmedian(values[(time >= edges[index]) & (time < edges[index + 1])], axis=0)
+            for index in range(len(centres))
+        ])
+    numpy.testing.assert_allclose(result, expected, rtol=1e-12, equal_nan=True)
+    # Padding every bin out to the burst's size took around 500 times the measurement
+    assert peak < 20 * values.nbytes
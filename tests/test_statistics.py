@@ -0,0 +1,80 @@
+"""
+Checks the colour-scale limits estimated from histograms against the exact quantiles they replaced.
+"""
+from pathlib import Path
+
+import numpy
+import pytest
+from numpy import ndarray
+
+from spacelabel.models.dataset.hdf5 import DataSetHDF5
+from spacelabel.models.dataset.preprocessed import DataSetPreprocessed
+from spacelabel.models.dataset.rebin import (
+    STATISTICS_BLOCK_SIZE, block_histograms, histogram_edges, histogram_quantiles
+)
+
+from conftest import write_cassini
+
+FRACTIONS = [0.05, 0.5, 0.95]
+
+
+@pytest.fixture
+def values() -> ndarray:
+    # Spread over several decades, with zeros, negatives and NaNs that the colour scale ignores
+    rng = numpy.random.default_rng(5)
+    values: ndarray = 10 ** rng.normal(-18., 1.5, size=(5000, 30))
+    values[rng.random(values.shape) < 0.1] = numpy.nan
+    values[rng.random(values.shape) < 0.05] = 0.
+    values[rng.random(values.shape) < 0.05] *= -1.
+    return values
+
+
+def _exact(values: ndarray) -> ndarray:
+    """
+    The original limits: exact quantiles of the positive values.
+    """
+    return numpy.nanpercentile(numpy.where(values > 0., values, numpy.nan), numpy.array(FRACTIONS) * 100.)
+
+
+def test_quantiles_within_a_bin(values: ndarray):
+    positive: ndarray = values[numpy.isfinite(values) & (values > 0.)]
+    edges: ndarray = histogram_edges(positive.min(), positive.max())
+    counts: ndarray = block_histograms(values, edges)
+    width: float = edges[1] - edges[0]
+
+    # Over the whole measurement, and over a run of whole blocks
+    for blocks in (slice(None), slice(1, 3)):
+        rows: slice = slice(
+            (blocks.start or 0) * STATISTICS_BLOCK_SIZE, blocks.stop and blocks.stop * STATISTICS_BLOCK_SIZE
+        )
+        estimate: ndarray = histogram_quantiles(counts[blocks].sum(axis=0), edges, FRACTIONS)
+        assert numpy.all(numpy.abs(numpy.log10(estimate) - numpy.log10(_exact(values[rows]))) <= width)
+
+
+def test_empty_histogram():
+    edges: ndarray = histogram_edges(1e-20, 1e-10)
+    assert numpy.isnan(histogram_quantiles(numpy.zeros(len(edges) - 1), edges, FRACTIONS)).all()
+
+
+def test_get_dynamic_range(tmp_path: Path):
+    source: Path = write_cassini(tmp_path / 'cassini.hdf5', samples=6000)
+    dataset: DataSetHDF5 = DataSetHDF5(source, config_name='cassini')
+    dataset.load()
+    dataset = DataSetPreprocessed(dataset.preprocess(pyramid=False))
+    dataset.load()
+    flux: ndarray = numpy.asarray(dataset._data['Flux density'])
+    statistics = dataset._get_statistics('Flux density')
+    width: float = statistics.edges[1] - statistics.edges[0]
+
+    fractions = (FRACTIONS[0], FRACTIONS[-1])
+    limits = dataset.get_dynamic_range(
+        dataset._get_time(0), dataset._get_time(-1), fractions, measurements='Flux density', normalisation='global'
+    )['Flux density']
+    assert numpy.all(numpy.abs(numpy.log10(limits) - numpy.log10(_exact(flux)[[0, -1]])) <= width)
+
+    # A window of whole blocks covers exactly the samples in it
+    window: slice = slice(STATISTICS_BLOCK_SIZE, 3 * STATISTICS_BLOCK_SIZE)
+    limits = dataset.get_dynamic_range(
+        dataset._get_time(window.start), dataset._get_time(window.stop - 1), fractions, measurements='Flux density'
+    )['Flux density']
+    assert numpy.all(numpy.abs(numpy.log10(limits) - numpy.log10(_exact(flux[window])[[0, -1]])) <= width)
@@ -0,0 +1,115 @@
+"""
+Checks the parts of the matplotlib view that can be run headless, on the Agg backend.
+"""
+from typing import List, Tuple
+
+import matplotlib
+import numpy
+import pytest
+from numpy import ndarray
+
+matplotlib.use('Agg')
+from matplotlib.axes import Axes  # noqa: E402
+from matplotlib.backend_bases import MouseEvent  # noqa: E402
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+from matplotlib.colors import same_color  # noqa: E402
+from matplotlib.figure import Figure  # noqa: E402
+
+from spacelabel.views.matplotlib import (  # noqa: E402
+    REGULAR_TOLERANCE, BlitLayer, BlitPolygonSelector, ImageRenderer, MeshRenderer, get_renderer
+)
+
+TIME: ndarray = numpy.datetime64('2005-01-01T00:00:30') + numpy.arange(500) * numpy.timedelta64(60, 's')
+FREQ: ndarray = numpy.geomspace(3.5, 16000., 49)
+
+
+def _mouse(axis: Axes, name: str, x: float, y: float):
+    """
+    Sends a mouse event at a point in an axis' data co-ordinates.
+    """
+    canvas = axis.figure.canvas
+    x_display, y_display = axis.transData.transform((x, y))
+    canvas.callbacks.process(name, MouseEvent(name, canvas, x_display, y_display, button=1))
+
+
+def _click(axis: Axes, x: float, y: float):
+    for name in ('motion_notify_event', 'button_press_event', 'button_release_event'):
+        _mouse(axis, name, x, y)
+
+
+@pytest.fixture
+def axis() -> Axes:
+    fig: Figure = Figure(figsize=(6, 4))
+    FigureCanvasAgg(fig)
+    axis: Axes = fig.add_subplot()
+    axis.set_xlim(0., 10.)
+    axis.set_ylim(0., 10.)
+    return axis
+
+
+def test_polygon_selector_completes(axis: Axes):
+    layer: BlitLayer = BlitLayer(axis.figure, [axis])
+    selected: List[List[Tuple[float, float]]] = []
+    selector: BlitPolygonSelector = BlitPolygonSelector(
+        axis, onselect=selected.append, blit_layer=layer, useblit=True,
+        props={'color': 'red', 'linestyle': '--', 'linewidth': 1.5, 'alpha': 0.75}
+    )
+    draws: List[int] = []
+    axis.figure.canvas.mpl_connect('draw_event', lambda event: draws.append(1))
+    axis.figure.canvas.draw()
+    assert layer.get_background(axis) is not None
+    assert same_color(selector.artists[0].get_color(), 'red')
+
+    vertexes: ndarray = numpy.array([(2., 2.), (8., 2.), (8., 7.), (3., 8.)])
+    for x, y in vertexes:
+        _click(axis, x, y)
+        _mouse(axis, 'motion_notify_event', x + 0.5, y + 0.5)
+    assert not selected
+    # Placing the vertexes and moving between them draws over the cached background, not the whole figure again
+    assert len(draws) == 1
+
+    # Clicking the first vertex again closes the polygon
+    _click(axis, *vertexes[0])
+    assert len(selected) == 1
+    numpy.testing.assert_allclose(selected[0], vertexes)
+    numpy.testing.assert_allclose(selector.verts, vertexes)
+
+
+def test_polygon_selector_remove(axis: Axes):
+    layer: BlitLayer = BlitLayer(axis.figure, [axis])
+    selected: List = []
+    selector: BlitPolygonSelector = BlitPolygonSelector(axis, onselect=selected.append, blit_layer=layer)
+    artists: int = len(axis.get_children())
+    selector.remove()
+
+    assert len(axis.get_children()) == artists - len(selector.artists)
+    _click(axis, 2., 2.)
+    assert not selector.verts
+
+
+def test_regular_grid_drawn_as_image():
+    assert get_renderer(TIME, FREQ) is ImageRenderer
+
+
+@pytest.mark.parametrize('axis', ['time', 'freq'])
+def test_regular_within_tolerance(axis: str):
+    # One bin is stretched by just under the tolerance, and then by just over it
+    for stretch, renderer in ((0.9, ImageRenderer), (1.1, MeshRenderer)):
+        time: ndarray = TIME.astype('datetime64[ms]')
+        freq: ndarray = FREQ.copy()
+        if axis == 'time':
+            time[10:] += numpy.timedelta64(int(60000 * REGULAR_TOLERANCE * stretch), 'ms')
+        else:
+            freq[10:] *= 10 ** (numpy.log10(FREQ[1] / FREQ[0]) * REGULAR_TOLERANCE * stretch)
+        assert get_renderer(time, freq) is renderer, stretch
+
+
+def test_irregular_grid_drawn_as_mesh():
+    rng = numpy.random.default_rng(9)
+    # Raw data: channels spaced unevenly, linearly spaced channels, or samples with a gap
+    assert get_renderer(TIME, numpy.sort(10 ** rng.uniform(0.5, 4., 49))) is MeshRenderer
+    assert get_renderer(TIME, numpy.linspace(3.5, 16000., 49)) is MeshRenderer
+    assert get_renderer(numpy.delete(TIME, numpy.s_[100:110]), FREQ) is MeshRenderer
+    # Too little to tell the spacing from, or frequencies that can't be drawn on a log axis
+    assert get_renderer(TIME[:1], FREQ) is MeshRenderer
+    assert get_renderer(TIME, numpy.concatenate(([0.], FREQ[1:]))) is MeshRenderer